@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Literal, Optional, Sequence
+from uuid import UUID, uuid4
+
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status
+from pydantic import BaseModel, Field, model_validator
+from starlette.concurrency import run_in_threadpool
+
+from ..db import DB_CONFIG
+from ..models import AnalysisStatus
+from ..repositories.batches import BatchJob, complete_batch, create_batch_async, get_batch_state_async
+from ..repositories.reports import find_latest_completed_job_ids_async
+from ..repositories.users import get_user_async
+from ..scheduling import BATCH_MAX_PROJECTS, BATCH_PARALLELISM, BATCH_ROUTE, batch_lanes
+from ..security import find_projects, resolve_path
+from ..tasks import schedule_batch
+from . import routes
+from .reports import ReportSummary
+
+router = APIRouter(prefix="/api/batches", tags=["batches"])
+
+#: Directory levels below root searched for projects unless the request says otherwise.
+DEFAULT_SCAN_DEPTH = 3
+
+
+class BatchAnalyzeRequest(BaseModel):
+    # Either explicit projects or a root whose projects (see KEY_PROJECT_FILES) are analysed.
+    projectPaths: list[str] | None = Field(default=None, min_length=1)
+    root: str | None = None
+    maxDepth: int = Field(default=DEFAULT_SCAN_DEPTH, ge=0, le=10)
+    userId: UUID | None = None
+    incremental: bool = True
+    parallelism: int | None = Field(default=None, gt=0)
+    timeBudget: float | None = Field(default=None, gt=0)
+    fileBudget: int | None = Field(default=None, gt=0)
+
+    @model_validator(mode="after")
+    def one_source(self) -> "BatchAnalyzeRequest":
+        if (self.projectPaths is None) == (self.root is None):
+            raise ValueError("Pass either projectPaths or root")
+        return self
+
+
+class BatchJobResponse(BaseModel):
+    jobId: str
+    projectPath: str
+
+
+class BatchResponse(BaseModel):
+    batchId: str
+    parallelism: int
+    queue: str
+    jobs: list[BatchJobResponse]
+
+
+class BatchStatusResponse(BaseModel):
+    batchId: str
+    status: Literal["pending", "running", "completed", "failed", "partial"]
+    root: Optional[str] = None
+    parallelism: int
+    total: int
+    pending: int
+    running: int
+    completed: int
+    failed: int
+    createdAt: datetime
+    completedAt: Optional[datetime] = None
+    jobs: list[ReportSummary]
+
+
+@router.post("", response_model=BatchResponse, status_code=status.HTTP_202_ACCEPTED)
+async def start_batch(request: BatchAnalyzeRequest, background_tasks: BackgroundTasks) -> BatchResponse:
+    """Analyse many projects with one request.
+
+    The projects are dealt into at most `parallelism` lanes that each run
+    one analysis at a time. Every project gets its own job (pollable as
+    usual); GET /api/batches/{batchId} aggregates them. Batch jobs do not
+    count towards the per-user limit on interactive analyses.
+    """
+    user_id = None
+    if request.userId:
+        user = await get_user_async(request.userId)
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        user_id = user.id
+    root = None
+    if request.root is not None:
+        root = await run_in_threadpool(resolve_path, request.root)
+        paths = [str(path) for path in await run_in_threadpool(find_projects, root, max_depth=request.maxDepth)]
+        if not paths:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No projects found below root")
+    else:
+        resolved = await run_in_threadpool(lambda: [resolve_path(path) for path in request.projectPaths or ()])
+        paths = list(dict.fromkeys(str(path) for path in resolved))
+    if len(paths) > BATCH_MAX_PROJECTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch may contain at most {BATCH_MAX_PROJECTS} projects, got {len(paths)}",
+        )
+
+    bases = await find_latest_completed_job_ids_async(paths) if request.incremental else {}
+    celery = routes.TASK_MODE == "celery"
+    jobs = [
+        BatchJob(str(uuid4()) if celery else uuid4().hex, path, bases.get(path), BATCH_ROUTE.queue) for path in paths
+    ]
+    batch_id = uuid4().hex
+    parallelism = min(request.parallelism or BATCH_PARALLELISM, BATCH_PARALLELISM)
+    await create_batch_async(batch_id, jobs, user_id=user_id, root=str(root) if root else None, parallelism=parallelism)
+
+    lanes = batch_lanes(jobs, parallelism)
+    if celery:
+        await run_in_threadpool(
+            schedule_batch,
+            batch_id,
+            lanes,
+            queue=BATCH_ROUTE.queue,
+            priority=BATCH_ROUTE.priority,
+            time_budget=request.timeBudget,
+            file_budget=request.fileBudget,
+        )
+    else:
+        background_tasks.add_task(run_inline_batch, batch_id, lanes, request.timeBudget, request.fileBudget)
+    return BatchResponse(
+        batchId=batch_id,
+        parallelism=parallelism,
+        queue=BATCH_ROUTE.queue,
+        jobs=[BatchJobResponse(jobId=job.job_id, projectPath=job.project_path) for job in jobs],
+    )
+
+
+@router.get("/{batch_id}", response_model=BatchStatusResponse)
+async def get_batch_status(batch_id: str) -> BatchStatusResponse:
+    state = await get_batch_state_async(batch_id)
+    if state is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found")
+    counts = state.counts()
+    return BatchStatusResponse(
+        batchId=state.batch.batch_id,
+        status=state.status,
+        root=state.batch.root,
+        parallelism=state.batch.parallelism,
+        total=len(state.jobs),
+        pending=counts[AnalysisStatus.PENDING],
+        running=counts[AnalysisStatus.RUNNING],
+        completed=counts[AnalysisStatus.COMPLETED],
+        failed=counts[AnalysisStatus.FAILED],
+        createdAt=state.batch.created_at,
+        completedAt=state.batch.completed_at,
+        jobs=[
+            ReportSummary(
+                jobId=job.job_id,
+                projectPath=job.project_path,
+                status=job.status,
+                summary=job.summary,
+                createdAt=job.created_at,
+                completedAt=job.completed_at,
+                baseJobId=job.base_job_id,
+                revision=job.revision,
+            )
+            for job in state.jobs
+        ],
+    )
+
+
+def run_inline_batch(
+    batch_id: str,
+    lanes: Sequence[Sequence[BatchJob]],
+    time_budget: float | None = None,
+    file_budget: int | None = None,
+) -> None:
+    """Inline counterpart of tasks.schedule_batch: one thread per lane.
+
+    An in-memory database is a single shared connection, so there the lanes
+    run one after another.
+    """
+
+    def run_lane(lane: Sequence[BatchJob]) -> None:
+        for job in lane:
+            routes.run_inline_analysis(job.job_id, job.project_path, job.base_job_id, time_budget, file_budget)
+
+    workers = 1 if DB_CONFIG.uses_memory else max(1, len(lanes))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nexus-batch") as executor:
+        list(executor.map(run_lane, lanes))
+    complete_batch(batch_id)
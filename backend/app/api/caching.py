@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from typing import Collection, Dict, Optional
+
+from fastapi import Response
+from starlette.concurrency import run_in_threadpool
+
+from ..core.compression import PREFERRED_ENCODINGS
+from ..models import AnalysisReport
+from ..repositories.renditions import get_report_rendition_async, report_encodings_async, save_report_renditions
+from ..repositories.udm import get_report_sections
+from .streaming import MEDIA_TYPES, udm_response
+
+#: Finished reports never change, so clients and proxies may keep them for good.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Collection[str]) -> Optional[str]:
+    """Pick the content coding to send for an Accept-Encoding header, or None for identity.
+
+    The highest q-value wins; ties go to the order in PREFERRED_ENCODINGS.
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[token] = weight
+
+    best, best_weight = None, 0.0
+    for name in PREFERRED_ENCODINGS:
+        if name not in available:
+            continue
+        weight = weights.get(name, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+def entity_tag(digest: str, variant: Optional[str] = None) -> str:
+    """Strong ETag for a report representation; each coding or envelope is its own variant."""
+    return f'"{digest}-{variant}"' if variant else f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so a W/ prefix is ignored.
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+async def report_digest(report: AnalysisReport) -> Optional[str]:
+    """The report's content digest, storing its renditions first if that never happened.
+
+    Reports finished (or migrated) before renditions existed get them on
+    their first full fetch.
+    """
+    return report.etag or await run_in_threadpool(save_report_renditions, report.job_id)
+
+
+async def stored_report_response(
+    report: AnalysisReport, accept_encoding: Optional[str], if_none_match: Optional[str]
+) -> Optional[Response]:
+    """Serve the complete UDM JSON of a finished report from its stored renditions.
+
+    Sends the precompressed bytes for the negotiated coding (streaming from
+    the tables for identity), or 304 when the client already holds them.
+    Returns None when the report has no stored UDM.
+    """
+    digest = await report_digest(report)
+    if digest is None:
+        return None
+    encoding = negotiate_encoding(accept_encoding, await report_encodings_async(report.id))
+    headers = {"ETag": entity_tag(digest, encoding), "Cache-Control": IMMUTABLE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    data = await get_report_rendition_async(report.id, encoding) if encoding else None
+    if data is not None:
+        return Response(data, media_type=MEDIA_TYPES["json"], headers={**headers, "Content-Encoding": encoding})
+    headers["ETag"] = entity_tag(digest)
+    sections = get_report_sections(report)
+    if sections is None:
+        return None
+    response = udm_response(sections)
+    response.headers.update(headers)
+    return response
+
+
+__all__ = [
+    "IMMUTABLE_CACHE_CONTROL",
+    "entity_tag",
+    "etag_matches",
+    "negotiate_encoding",
+    "report_digest",
+    "stored_report_response",
+]
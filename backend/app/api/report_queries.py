@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from typing import Literal, Optional
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+
+from ..core.serialize import UDM_FIELDS
+from ..core.udm import CodeUnitType
+from ..models import AnalysisReport
+from ..repositories.udm import UNIT_METRICS, InvalidCursor, UnitQuery, directory_level, query_code_units
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+
+class CodeUnitPage(BaseModel):
+    items: list[dict]
+    nextCursor: Optional[str] = None
+
+
+class TreeEntry(BaseModel):
+    name: str
+    path: str
+    type: Literal["directory", "file"]
+    files: int
+    loc: int
+    complexity: float
+
+
+class ReportTree(BaseModel):
+    path: str
+    entries: list[TreeEntry]
+
+
+def _split(value: Optional[str]) -> Optional[tuple[str, ...]]:
+    if value is None:
+        return None
+    return tuple(part.strip() for part in value.split(",") if part.strip())
+
+
+def report_fields(
+    fields: Optional[str] = Query(default=None, description="Comma-separated top-level UDM fields to return"),
+) -> Optional[tuple[str, ...]]:
+    selected = _split(fields)
+    unknown = sorted(set(selected or ()) - set(UDM_FIELDS))
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+
+def unit_query(
+    pathPrefix: Optional[str] = Query(default=None),
+    minComplexity: Optional[float] = Query(default=None, ge=0),
+    unitType: Optional[CodeUnitType] = Query(default=None),
+    sort: Literal["report", "path", "loc", "complexity"] = Query(default="report"),
+    metrics: Optional[str] = Query(default=None, description="Comma-separated code unit metrics to return"),
+    top: Optional[int] = Query(default=None, ge=1, description="Only the N units with the most lines of code"),
+) -> Optional[UnitQuery]:
+    """Build the code unit filter from query parameters; None when nothing was asked for."""
+    selected_metrics = _split(metrics)
+    unknown = sorted(set(selected_metrics or ()) - set(UNIT_METRICS))
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown metrics: {', '.join(unknown)}")
+    query = UnitQuery(
+        path_prefix=pathPrefix or None,
+        min_complexity=minComplexity,
+        unit_type=unitType.value if unitType else None,
+        sort="loc" if top else sort,
+        metrics=selected_metrics,
+        limit=top,
+    )
+    return None if query == UnitQuery() else query
+
+
+def code_unit_page(
+    report: AnalysisReport, query: Optional[UnitQuery], cursor: Optional[str], limit: int
+) -> CodeUnitPage:
+    if report.nexus_version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not ready")
+    query = query or UnitQuery()
+    if query.limit is not None:
+        limit = min(query.limit, MAX_PAGE_SIZE)
+    try:
+        items, next_cursor = query_code_units(report.id, query, cursor=cursor, limit=limit)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    if query.limit is not None:
+        # top-N is a single page by definition.
+        next_cursor = None
+    return CodeUnitPage(items=items, nextCursor=next_cursor)
+
+
+def report_tree(report: AnalysisReport, path: str) -> ReportTree:
+    if report.nexus_version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not ready")
+    normalized = path.strip("/")
+    entries = [TreeEntry(**entry) for entry in directory_level(report.id, normalized)]
+    return ReportTree(path=normalized or ".", entries=entries)
+
+
+__all__ = [
+    "CodeUnitPage",
+    "DEFAULT_PAGE_SIZE",
+    "MAX_PAGE_SIZE",
+    "ReportTree",
+    "TreeEntry",
+    "code_unit_page",
+    "report_fields",
+    "report_tree",
+    "unit_query",
+]
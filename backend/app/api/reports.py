@@ -4,11 +4,25 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
-from ..models import AnalysisStatus
-from ..repositories.reports import get_report, list_reports_for_user
+from ..models import AnalysisReport, AnalysisStatus
+from ..repositories.reports import get_report_async, list_reports_for_user_async
+from ..repositories.udm import UnitQuery, get_report_sections
+from .caching import IMMUTABLE_CACHE_CONTROL, entity_tag, etag_matches, report_digest
+from .report_queries import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    CodeUnitPage,
+    ReportTree,
+    code_unit_page,
+    report_fields,
+    report_tree,
+    unit_query,
+)
+from .streaming import wrapped_udm_response
 
 router = APIRouter(prefix="/api/reports", tags=["reports"])
 
@@ -20,6 +34,8 @@ class ReportSummary(BaseModel):
     summary: Optional[str] = None
     createdAt: datetime
     completedAt: Optional[datetime] = None
+    baseJobId: Optional[str] = None
+    revision: Optional[str] = None
 
 
 class ReportDetail(ReportSummary):
@@ -27,8 +43,8 @@ class ReportDetail(ReportSummary):
 
 
 @router.get("/user/{user_id}", response_model=list[ReportSummary])
-def reports_for_user(user_id: UUID) -> list[ReportSummary]:
-    reports = list_reports_for_user(user_id)
+async def reports_for_user(user_id: UUID) -> list[ReportSummary]:
+    reports = await list_reports_for_user_async(user_id)
     return [
         ReportSummary(
             jobId=report.job_id,
@@ -37,22 +53,74 @@ def reports_for_user(user_id: UUID) -> list[ReportSummary]:
             summary=report.summary,
             createdAt=report.created_at,
             completedAt=report.completed_at,
+            baseJobId=report.base_job_id,
+            revision=report.revision,
         )
         for report in reports
     ]
 
 
 @router.get("/{job_id}", response_model=ReportDetail)
-def report_detail(job_id: str, include_udm: bool = Query(default=True)) -> ReportDetail:
-    report = get_report(job_id)
+async def report_detail(
+    job_id: str,
+    include_udm: bool = Query(default=True),
+    fields: Optional[tuple[str, ...]] = Depends(report_fields),
+    units: Optional[UnitQuery] = Depends(unit_query),
+    if_none_match: Optional[str] = Header(default=None),
+):
+    report = await get_report_async(job_id)
     if report is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
-    return ReportDetail(
+    detail = ReportDetail(
         jobId=report.job_id,
         projectPath=report.project_path,
         status=report.status,
         summary=report.summary,
         createdAt=report.created_at,
         completedAt=report.completed_at,
-        udm=report.udm if include_udm else None,
+        baseJobId=report.base_job_id,
+        revision=report.revision,
     )
+    sections = (
+        get_report_sections(report, units=units)
+        if include_udm and report.status == AnalysisStatus.COMPLETED
+        else None
+    )
+    if sections is None:
+        return detail
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    digest = await report_digest(report) if fields is None and units is None else None
+    if digest is not None:
+        # A finished report's envelope is fixed too, so the UDM digest identifies it.
+        headers["ETag"] = entity_tag(digest, "detail")
+        if etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+    response = wrapped_udm_response(detail.model_dump_json(exclude={"udm"}), sections, fields)
+    response.headers.update(headers)
+    return response
+
+
+async def completed_report(job_id: str) -> AnalysisReport:
+    report = await get_report_async(job_id)
+    if report is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
+    if report.status != AnalysisStatus.COMPLETED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not ready")
+    return report
+
+
+@router.get("/{job_id}/units", response_model=CodeUnitPage)
+async def report_units(
+    job_id: str,
+    cursor: Optional[str] = Query(default=None),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    units: Optional[UnitQuery] = Depends(unit_query),
+) -> CodeUnitPage:
+    report = await completed_report(job_id)
+    return await run_in_threadpool(code_unit_page, report, units, cursor, limit)
+
+
+@router.get("/{job_id}/tree", response_model=ReportTree)
+async def report_tree_level(job_id: str, path: str = Query(default="")) -> ReportTree:
+    report = await completed_report(job_id)
+    return await run_in_threadpool(report_tree, report, path)
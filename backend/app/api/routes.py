@@ -1,17 +1,51 @@
 from __future__ import annotations
 
+import json
 import logging
 import os
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Optional
 from uuid import UUID, uuid4
 
 from celery.result import AsyncResult
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, status
-from pydantic import BaseModel
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 
-from ..repositories.reports import create_report, get_report as get_report_record
-from ..repositories.users import get_user
+from ..celery_app import LARGE_QUEUE, SMALL_QUEUE
+from ..core.orchestrator import AnalysisError, ProjectProbe
+from ..models import AnalysisReport, AnalysisStatus
+from ..progress import TERMINAL_STATUSES, ProgressBroker, local_broker, progress_event, redis_broker
+from ..repositories.reports import (
+    CANCELLED_SUMMARY,
+    count_active_jobs_async,
+    create_or_share_report_async,
+    find_latest_completed_job_id_async,
+    find_shared_job_id_async,
+    get_report_async,
+    get_report_status_async,
+    queue_stats_async,
+    request_cancellation_async,
+)
+from ..repositories.udm import UnitQuery, get_report_sections
+from ..repositories.users import get_user_async
+from ..scheduling import LARGE_PROJECT_FILES, USER_MAX_ACTIVE_JOBS, over_user_limit, route_job
 from ..security import get_allowed_root, list_directory, resolve_path
-from ..tasks import JobStatus, celery_app, execute_analysis_task, map_celery_state, perform_analysis
+from ..settings import env_number
+from ..tasks import JobStatus, celery_app, execute_analysis_task, map_celery_state, orchestrator, perform_analysis
+from .caching import IMMUTABLE_CACHE_CONTROL, stored_report_response
+from .report_queries import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    CodeUnitPage,
+    ReportTree,
+    code_unit_page,
+    report_fields,
+    report_tree,
+    unit_query,
+)
+from .streaming import ReportFormat, udm_response
 
 router = APIRouter(prefix="/api", tags=["nexus"])
 LOGGER = logging.getLogger(__name__)
@@ -31,10 +65,33 @@ class FilesystemResponse(BaseModel):
 class AnalyzeRequest(BaseModel):
     projectPath: str
     userId: UUID | None = None
+    baseJobId: str | None = None
+    incremental: bool = True
+    # Per-job limits; the server-wide NEXUS_ANALYSIS_*_BUDGET still applies when tighter.
+    timeBudget: float | None = Field(default=None, gt=0)
+    fileBudget: int | None = Field(default=None, gt=0)
 
 
 class AnalyzeResponse(BaseModel):
     jobId: str
+    # True when the request was handed an identical job that was already running or just finished.
+    shared: bool = False
+    queue: str | None = None
+
+
+class QueueStats(BaseModel):
+    name: str
+    depth: int = 0
+    running: int = 0
+    oldestWaitSeconds: float = 0.0
+    started: int = 0
+    avgWaitSeconds: float = 0.0
+    maxWaitSeconds: float = 0.0
+
+
+class QueueMetricsResponse(BaseModel):
+    windowSeconds: int
+    queues: list[QueueStats]
 
 
 class JobStatusResponse(BaseModel):
@@ -42,6 +99,11 @@ class JobStatusResponse(BaseModel):
     progress: int
     message: str | None = None
     error: str | None = None
+    phase: str | None = None
+    filesDone: int | None = None
+    filesTotal: int | None = None
+    filesDiscovered: int | None = None
+    bytesRead: int | None = None
 
 
 @router.get("/filesystem", response_model=FilesystemResponse)
@@ -54,89 +116,291 @@ def browse_filesystem(path: str | None = Query(default=None)) -> FilesystemRespo
 
 
 TASK_MODE = os.getenv("NEXUS_TASK_MODE", "celery").lower()
+#: Seconds between keep-alive comments on an idle progress stream; at least one, so the stream cannot spin.
+SSE_HEARTBEAT = env_number("NEXUS_SSE_HEARTBEAT", 15.0, float, minimum=1.0)
+#: Seconds a completed report is handed out again for an identical request (0 = only share running jobs).
+REUSE_WINDOW = env_number("NEXUS_REUSE_WINDOW", 300.0, float, minimum=0.0)
+
+
+def progress_broker() -> ProgressBroker:
+    """Where progress events for this API's jobs are published."""
+    return redis_broker() if TASK_MODE == "celery" else local_broker
 
 
 @router.post("/analyze", response_model=AnalyzeResponse, status_code=status.HTTP_202_ACCEPTED)
-def start_analysis(request: AnalyzeRequest, background_tasks: BackgroundTasks) -> AnalyzeResponse:
-    project_path = resolve_path(request.projectPath)
+async def start_analysis(request: AnalyzeRequest, background_tasks: BackgroundTasks) -> AnalyzeResponse:
+    project_path = await run_in_threadpool(resolve_path, request.projectPath)
     user_id = None
     if request.userId:
-        user = get_user(request.userId)
+        user = await get_user_async(request.userId)
         if user is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         user_id = user.id
     resolved_path = str(project_path)
+    base_job_id = await resolve_base_job(request, resolved_path)
+    probe = await probe_project(resolved_path)
+    fingerprint = probe.fingerprint if probe else None
 
+    if fingerprint is not None:
+        # A non-incremental request asks for a fresh read, so only a running job will do.
+        window = REUSE_WINDOW if request.incremental else 0
+        completed_since = datetime.now(timezone.utc) - timedelta(seconds=window)
+        shared_job_id = await find_shared_job_id_async(resolved_path, fingerprint, completed_since)
+        if shared_job_id is not None:
+            return AnalyzeResponse(jobId=shared_job_id, shared=True)
+    active_jobs = await count_active_jobs_async(user_id) if user_id else 0
+    if over_user_limit(active_jobs):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"At most {USER_MAX_ACTIVE_JOBS} analyses per user may be pending or running",
+            headers={"Retry-After": "30"},
+        )
+    route = route_job(probe.files if probe else 0, active_jobs)
+    # The report row must exist before the worker starts writing UDM rows for it. An identical
+    # request may have registered its job since the lookup above, in this process or another.
+    job_id, shared = await create_or_share_report_async(
+        str(uuid4()) if TASK_MODE == "celery" else uuid4().hex,
+        resolved_path,
+        user_id,
+        base_job_id=base_job_id,
+        fingerprint=fingerprint,
+        queue=route.queue,
+    )
+    if shared:
+        return AnalyzeResponse(jobId=job_id, shared=True)
+
+    args = (resolved_path, base_job_id, request.timeBudget, request.fileBudget)
     if TASK_MODE == "celery":
-        async_result = execute_analysis_task.delay(resolved_path)
-        create_report(async_result.id, resolved_path, user_id)
-        return AnalyzeResponse(jobId=async_result.id)
+        await run_in_threadpool(
+            execute_analysis_task.apply_async, args=args, task_id=job_id, queue=route.queue, priority=route.priority
+        )
+    else:
+        background_tasks.add_task(run_inline_analysis, job_id, *args)
+    return AnalyzeResponse(jobId=job_id, queue=route.queue)
+
+
+@router.get("/queues", response_model=QueueMetricsResponse)
+async def get_queue_metrics(window: int = Query(default=3600, ge=1, le=7 * 24 * 3600)) -> QueueMetricsResponse:
+    """Depth, running jobs and wait times per analysis queue; wait statistics cover the last window seconds."""
+    started_since = datetime.now(timezone.utc) - timedelta(seconds=window)
+    stats = {item["name"]: item for item in await queue_stats_async(started_since)}
+    for name in (SMALL_QUEUE, LARGE_QUEUE):
+        stats.setdefault(name, {"name": name})
+    return QueueMetricsResponse(windowSeconds=window, queues=[QueueStats(**item) for item in stats.values()])
+
+
+@router.delete("/analyze/{job_id}", response_model=JobStatusResponse, status_code=status.HTTP_202_ACCEPTED)
+async def cancel_analysis(job_id: str) -> JobStatusResponse:
+    """Ask a pending or running analysis to stop.
+
+    A running analysis notices within NEXUS_CANCEL_POLL_INTERVAL seconds,
+    stops between files and completes with the files read so far, marked
+    truncated. A job that has not started yet fails straight away.
+    """
+    previous = await request_cancellation_async(job_id)
+    if previous is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if previous in {AnalysisStatus.COMPLETED, AnalysisStatus.FAILED}:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Job has already finished")
+    if previous == AnalysisStatus.PENDING:
+        event = progress_event(job_id, JobStatus.FAILED.value, 100, CANCELLED_SUMMARY, error=CANCELLED_SUMMARY)
+        await run_in_threadpool(progress_broker().publish, job_id, event)
+        return JobStatusResponse.model_validate(event)
+    latest = await progress_broker().latest(job_id) or {}
+    return JobStatusResponse(status=JobStatus.RUNNING, progress=latest.get("progress", 0), message="Cancellation requested")
+
+
+async def probe_project(project_path: str) -> ProjectProbe | None:
+    """Size and fingerprint the project for routing and coalescing.
+
+    Counting stops at LARGE_PROJECT_FILES, past which the queue is decided.
+    None when no analyzer applies; the job that runs anyway reports why.
+    """
+    try:
+        return await run_in_threadpool(orchestrator.probe, project_path, limit=LARGE_PROJECT_FILES)
+    except (AnalysisError, OSError):
+        return None
+
 
-    job_id = uuid4().hex
-    create_report(job_id, resolved_path, user_id)
-    background_tasks.add_task(run_inline_analysis, job_id, resolved_path)
-    return AnalyzeResponse(jobId=job_id)
+async def resolve_base_job(request: AnalyzeRequest, project_path: str) -> str | None:
+    """Pick the report an incremental run builds on.
+
+    An explicit baseJobId must be a completed report of the same project;
+    otherwise the latest completed report for the path is used, if any.
+    """
+    if not request.incremental:
+        return None
+    if not request.baseJobId:
+        return await find_latest_completed_job_id_async(project_path)
+
+    base = await get_report_async(request.baseJobId)
+    if base is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Base report not found")
+    if base.project_path != project_path:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Base report belongs to another project")
+    if base.status != AnalysisStatus.COMPLETED:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Base report has not completed")
+    return base.job_id
 
 
 @router.get("/status/{job_id}", response_model=JobStatusResponse)
-def get_job_status(job_id: str) -> JobStatusResponse:
-    if TASK_MODE != "celery":
-        report = get_report_record(job_id)
-        if report is None:
+async def get_job_status(job_id: str) -> JobStatusResponse:
+    """Report job progress.
+
+    Finished jobs (and every job when running inline) are answered from the
+    report row alone; only jobs still in flight under Celery consult the
+    result backend, which is a blocking call and so runs in the threadpool.
+    """
+    report_status = await get_report_status_async(job_id)
+    if TASK_MODE != "celery" or (
+        report_status is not None and report_status[0] in {AnalysisStatus.COMPLETED, AnalysisStatus.FAILED}
+    ):
+        if report_status is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
-        status_value = JobStatus(report.status.value)
+        report_state, summary = report_status
+        if report_state == AnalysisStatus.RUNNING:
+            latest = await local_broker.latest(job_id)
+            if latest is not None and latest["status"] == JobStatus.RUNNING.value:
+                return JobStatusResponse.model_validate(latest)
+        status_value = JobStatus(report_state.value)
         progress = 100 if status_value == JobStatus.COMPLETED else (50 if status_value == JobStatus.RUNNING else 0)
         return JobStatusResponse(
             status=status_value,
             progress=progress,
-            message=report.summary,
-            error=report.summary if status_value == JobStatus.FAILED else None,
+            message=summary,
+            error=summary if status_value == JobStatus.FAILED else None,
         )
     result = AsyncResult(job_id, app=celery_app)
-    payload = map_celery_state(result)
-    return JobStatusResponse(
-        status=payload["status"],
-        progress=payload["progress"],
-        message=payload["message"],
-        error=payload["error"],
+    payload = await run_in_threadpool(map_celery_state, result)
+    return JobStatusResponse.model_validate(payload)
+
+
+def finished_event(job_id: str, report_status: tuple[AnalysisStatus, str | None] | None) -> dict | None:
+    """The final progress event of a job that has finished according to its report row."""
+    if report_status is None or report_status[0] not in {AnalysisStatus.COMPLETED, AnalysisStatus.FAILED}:
+        return None
+    report_state, summary = report_status
+    failed = report_state == AnalysisStatus.FAILED
+    return progress_event(job_id, report_state.value, 100, summary, error=summary if failed else None)
+
+
+@router.get("/status/{job_id}/events")
+async def stream_job_status(job_id: str) -> StreamingResponse:
+    """Push job progress as server-sent "progress" events until the job finishes.
+
+    Each event carries the /api/status fields, including the phase and
+    file/byte counts. Replaces polling: the stream ends after the completed or
+    failed event.
+    """
+    report_status = await get_report_status_async(job_id)
+    if report_status is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return StreamingResponse(
+        progress_events(job_id, finished_event(job_id, report_status)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
+async def progress_events(job_id: str, finished: dict | None = None) -> AsyncIterator[str]:
+    if finished is not None:
+        yield f"event: progress\ndata: {json.dumps(finished)}\n\n"
+        return
+    async for event in progress_broker().subscribe(job_id, heartbeat=SSE_HEARTBEAT):
+        if event is None:
+            # Idle: a job whose worker died never publishes its end, so ask the report row.
+            event = finished_event(job_id, await get_report_status_async(job_id))
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+        yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+        if event["status"] in TERMINAL_STATUSES:
+            return
+
+
+async def completed_report(job_id: str) -> AnalysisReport:
+    """Load a finished report or raise the HTTP error explaining why it is unavailable."""
+    report = await get_report_async(job_id)
+    if report is not None and report.status == AnalysisStatus.COMPLETED:
+        return report
+
+    if TASK_MODE == "celery":
+        # A worker that died before recording the failure only left it in the result backend.
+        result = AsyncResult(job_id, app=celery_app)
+        if await run_in_threadpool(result.failed):
+            detail = str(result.info) if result.info else "Analysis failed"
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+    if report is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
+    if report.status == AnalysisStatus.FAILED:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=report.summary or "Analysis failed")
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not ready")
+
+
 @router.get("/report/{job_id}")
-def get_report(job_id: str):
-    if TASK_MODE != "celery":
-        report = get_report_record(job_id)
-        if report is None:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
-        status_value = JobStatus(report.status.value)
-        if status_value == JobStatus.FAILED:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=report.summary or "Analysis failed")
-        if status_value == JobStatus.COMPLETED and report.udm:
-            return report.udm
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not ready")
-    result = AsyncResult(job_id, app=celery_app)
-    if result.failed():
-        detail = str(result.info) if result.info else "Analysis failed"
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
-    if not result.ready():
-        stored = get_report_record(job_id)
-        if stored and stored.udm:
-            return stored.udm
+async def get_report(
+    job_id: str,
+    format: ReportFormat = Query(default="json"),
+    fields: Optional[tuple[str, ...]] = Depends(report_fields),
+    units: Optional[UnitQuery] = Depends(unit_query),
+    accept_encoding: Optional[str] = Header(default=None),
+    if_none_match: Optional[str] = Header(default=None),
+):
+    """Stream the finished UDM as one JSON document, or as NDJSON records with format=ndjson.
+
+    fields projects top-level UDM fields; the code unit filters (pathPrefix,
+    minComplexity, unitType, sort, metrics, top) narrow the codeUnits list.
+    The complete JSON document is served precompressed with a strong ETag.
+    """
+    report = await completed_report(job_id)
+    if format == "json" and fields is None and units is None:
+        response = await stored_report_response(report, accept_encoding, if_none_match)
+        if response is not None:
+            return response
+    sections = get_report_sections(report, units=units)
+    if sections is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not ready")
+    response = udm_response(sections, format, fields)
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
+
 
-    data = result.result
-    if data is None:
-        stored = get_report_record(job_id)
-        if stored and stored.udm:
-            return stored.udm
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report unavailable")
+@router.get("/report/{job_id}/units", response_model=CodeUnitPage)
+async def get_report_units(
+    job_id: str,
+    cursor: Optional[str] = Query(default=None),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    units: Optional[UnitQuery] = Depends(unit_query),
+) -> CodeUnitPage:
+    """Page through code units; pass nextCursor back as cursor for the following page."""
+    report = await completed_report(job_id)
+    return await run_in_threadpool(code_unit_page, report, units, cursor, limit)
 
-    return data
 
+@router.get("/report/{job_id}/tree", response_model=ReportTree)
+async def get_report_tree(job_id: str, path: str = Query(default="")) -> ReportTree:
+    """Aggregate files one directory level below path (the project root by default)."""
+    report = await completed_report(job_id)
+    return await run_in_threadpool(report_tree, report, path)
 
-def run_inline_analysis(job_id: str, project_path: str) -> None:
+
+def run_inline_analysis(
+    job_id: str,
+    project_path: str,
+    base_job_id: str | None = None,
+    time_budget: float | None = None,
+    file_budget: int | None = None,
+) -> None:
     try:
-        perform_analysis(job_id, project_path)
+        perform_analysis(
+            job_id,
+            project_path,
+            base_job_id=base_job_id,
+            progress_broker=local_broker,
+            time_budget=time_budget,
+            file_budget=file_budget,
+        )
     except Exception as exc:  # pragma: no cover - defensive
         # perform_analysis already records failure status; just log
         LOGGER = logging.getLogger(__name__)
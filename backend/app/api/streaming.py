@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from typing import Collection, Iterator, Literal, Optional
+
+from fastapi.responses import StreamingResponse
+
+from ..core.serialize import SectionReader, iter_udm_json, iter_udm_ndjson
+
+ReportFormat = Literal["json", "ndjson"]
+
+MEDIA_TYPES = {"json": "application/json", "ndjson": "application/x-ndjson"}
+
+
+Fields = Optional[Collection[str]]
+
+
+def iter_udm(sections: SectionReader, report_format: ReportFormat = "json", fields: Fields = None) -> Iterator[str]:
+    if report_format == "ndjson":
+        return iter_udm_ndjson(sections, fields=fields)
+    return iter_udm_json(sections, fields=fields)
+
+
+def udm_response(
+    sections: SectionReader, report_format: ReportFormat = "json", fields: Fields = None
+) -> StreamingResponse:
+    """Stream a stored UDM without building it in memory first."""
+    return StreamingResponse(iter_udm(sections, report_format, fields), media_type=MEDIA_TYPES[report_format])
+
+
+def wrapped_udm_response(envelope: str, sections: SectionReader, fields: Fields = None) -> StreamingResponse:
+    """Stream the JSON object envelope with a "udm" member appended chunk by chunk."""
+
+    def body() -> Iterator[str]:
+        yield envelope[:-1] + ("," if envelope != "{}" else "") + '"udm":'
+        yield from iter_udm_json(sections, fields=fields)
+        yield "}"
+
+    return StreamingResponse(body(), media_type=MEDIA_TYPES["json"])
+
+
+__all__ = ["MEDIA_TYPES", "ReportFormat", "iter_udm", "udm_response", "wrapped_udm_response"]
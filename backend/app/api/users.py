@@ -5,7 +5,7 @@ from uuid import UUID
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel, EmailStr
 
-from ..repositories.users import create_user, get_user, list_users
+from ..repositories.users import create_user_async, get_user_async, list_users_async
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
@@ -22,21 +22,22 @@ class UserResponse(BaseModel):
 
 
 @router.post("", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register_user(payload: CreateUserRequest) -> UserResponse:
-    user = create_user(email=payload.email, display_name=payload.displayName)
+async def register_user(payload: CreateUserRequest) -> UserResponse:
+    user = await create_user_async(email=payload.email, display_name=payload.displayName)
     return UserResponse(id=user.id, email=user.email, displayName=user.display_name)
 
 
 @router.get("", response_model=list[UserResponse])
-def fetch_users() -> list[UserResponse]:
+async def fetch_users() -> list[UserResponse]:
     return [
-        UserResponse(id=user.id, email=user.email, displayName=user.display_name) for user in list_users()
+        UserResponse(id=user.id, email=user.email, displayName=user.display_name)
+        for user in await list_users_async()
     ]
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-def fetch_user(user_id: UUID) -> UserResponse:
-    user = get_user(user_id)
+async def fetch_user(user_id: UUID) -> UserResponse:
+    user = await get_user_async(user_id)
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return UserResponse(id=user.id, email=user.email, displayName=user.display_name)
@@ -3,9 +3,16 @@ from __future__ import annotations
 import os
 
 from celery import Celery
+from celery.signals import worker_process_init
+from kombu import Queue
 
 BROKER_URL = os.getenv("NEXUS_CELERY_BROKER", "redis://localhost:6379/0")
 RESULT_BACKEND = os.getenv("NEXUS_CELERY_BACKEND", BROKER_URL)
+#: Analyses are routed by size so big projects never sit in front of small ones.
+SMALL_QUEUE = os.getenv("NEXUS_QUEUE_SMALL", "nexus.small")
+LARGE_QUEUE = os.getenv("NEXUS_QUEUE_LARGE", "nexus.large")
+#: Message priorities 0 (first) to 9; with Redis, lower numbers are consumed first.
+MAX_PRIORITY = 9
 
 celery_app = Celery("nexus", broker=BROKER_URL, backend=RESULT_BACKEND)
 
@@ -17,6 +24,21 @@ celery_app.conf.update(
     result_extended=True,
     worker_send_task_events=True,
     timezone="UTC",
+    # Workers consume both queues unless started with -Q for one of them.
+    task_queues=(Queue(SMALL_QUEUE), Queue(LARGE_QUEUE)),
+    task_default_queue=SMALL_QUEUE,
+    # One message per worker process at a time, so priorities decide what runs next.
+    worker_prefetch_multiplier=1,
+    broker_transport_options={"priority_steps": list(range(MAX_PRIORITY + 1)), "queue_order_strategy": "priority"},
 )
 
-__all__ = ["celery_app"]
+
+@worker_process_init.connect
+def reset_database_connections(**_kwargs) -> None:
+    """Prefork children must not share the parent's pooled database connections."""
+    from .db import reset_engines_after_fork
+
+    reset_engines_after_fork()
+
+
+__all__ = ["LARGE_QUEUE", "MAX_PRIORITY", "SMALL_QUEUE", "celery_app"]
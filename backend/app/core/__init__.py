@@ -1,13 +1,21 @@
 from .analyzer import AnalyzerPlugin
-from .orchestrator import AnalysisOrchestrator, AnalysisError, PluginNotFoundError
-from .plugins import PluginManager
+from .context import AnalysisContext
+from .orchestrator import AnalysisOrchestrator, AnalysisError, AnalysisResult, AnalysisStream, PluginNotFoundError
+from .plugins import PluginManager, PluginSpec
 from .udm import UnifiedDataModel
+from .walker import FileIndex, scan_tree
 
 __all__ = [
+    "AnalysisContext",
     "AnalyzerPlugin",
     "AnalysisError",
     "AnalysisOrchestrator",
+    "AnalysisResult",
+    "AnalysisStream",
+    "FileIndex",
     "PluginManager",
     "PluginNotFoundError",
+    "PluginSpec",
     "UnifiedDataModel",
+    "scan_tree",
 ]
@@ -1,10 +1,38 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from .context import AnalysisContext
+    from .discovery import RootScan
 
 
 class AnalyzerPlugin(ABC):
-    """Contract shared by all analyzer plugins."""
+    """Contract shared by all analyzer plugins.
+
+    Plugins may additionally define stream(path, context=None) yielding
+    (kind, value) records as described in app.core.stream. The orchestrator
+    prefers it over analyze() so large reports never have to be built as a
+    single dictionary; analyze() is still required for direct callers.
+
+    Plugins that set reports_progress call context.progress themselves:
+    start(phase) when they move on to another phase, expect(n) for the files
+    they are about to process, then advance() per file and add_bytes() for
+    what they read. For other plugins the orchestrator counts their
+    file-level code units instead.
+    """
+
+    #: Bumped whenever per-file results change shape or meaning; part of cache keys.
+    version: str = "0"
+    #: Lower-case file extensions the plugin reads from the shared file index.
+    extensions: frozenset[str] = frozenset()
+    #: Directory names the plugin never wants descended into.
+    skip_dirs: frozenset[str] = frozenset()
+    #: True when the plugin advances context.progress itself.
+    reports_progress: bool = False
+    #: Root file names that identify a project the plugin handles (package.json, pom.xml, ...).
+    markers: frozenset[str] = frozenset()
 
     @property
     @abstractmethod
@@ -15,6 +43,20 @@ class AnalyzerPlugin(ABC):
     def discover(self, path: str) -> bool:
         """Return True when the plugin can handle the project at path."""
 
+    def applies_to(self, scan: "RootScan") -> Optional[bool]:
+        """Decide from the shared shallow scan of the project root, or None to fall back to discover().
+
+        PluginManager scans a root once for all plugins and remembers the
+        result, so deciding here costs nothing per plugin. By default a
+        plugin with markers applies when the root holds one of them.
+        """
+        return scan.has_marker(self.markers) if self.markers else None
+
     @abstractmethod
-    def analyze(self, path: str) -> dict:
-        """Perform the analysis and return a UDM-compatible dictionary."""
+    def analyze(self, path: str, context: Optional["AnalysisContext"] = None) -> dict:
+        """Perform the analysis and return a UDM-compatible dictionary.
+
+        When context is provided its file index should be used instead of
+        walking the project again. Plugins written before the context existed
+        may omit the parameter; the orchestrator only passes it when accepted.
+        """
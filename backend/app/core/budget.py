@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Optional
+
+#: Why an analysis stopped early; stored on the report as its truncation reason.
+CANCELLED = "cancelled"
+TIME_BUDGET = "timeBudget"
+FILE_BUDGET = "fileBudget"
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+class AnalysisBudget:
+    """Decide when an analysis has to stop early: cancellation, time or file budget.
+
+    AnalysisContext.measure calls admit() before handing each file to a
+    plugin; once it returns False the plugin stops reading and finishes with
+    what it has, and reason says why. cancelled is an optional check for an
+    external cancellation request (e.g. a flag in the database); it is polled
+    at most once per poll_interval seconds because it may be a round trip.
+    max_seconds and max_files of None (or 0) mean no limit.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_seconds: Optional[float] = None,
+        max_files: Optional[int] = None,
+        cancelled: Optional[Callable[[], bool]] = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_seconds = max_seconds or None
+        self.max_files = max_files or None
+        self.cancelled = cancelled
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.started_at = clock()
+        self.files_admitted = 0
+        self.reason: Optional[str] = None
+        self._lock = threading.Lock()
+        self._last_poll: Optional[float] = None
+
+    def __getstate__(self) -> dict:
+        # Process pool workers keep the deadline and file budget but cannot poll.
+        state = self.__dict__.copy()
+        state.update(cancelled=None, clock=time.monotonic, _lock=None, _last_poll=None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def exhausted(self) -> bool:
+        return self.reason is not None
+
+    def cancel(self, reason: str = CANCELLED) -> None:
+        with self._lock:
+            if self.reason is None:
+                self.reason = reason
+
+    def stopped(self) -> bool:
+        """Return True once the analysis has to stop; cheap enough to call per file."""
+        if self.reason is not None:
+            return True
+        now = self.clock()
+        if self.max_seconds is not None and now - self.started_at >= self.max_seconds:
+            self.cancel(TIME_BUDGET)
+            return True
+        if self.cancelled is not None:
+            with self._lock:
+                due = self._last_poll is None or now - self._last_poll >= self.poll_interval
+                if due:
+                    self._last_poll = now
+            if due and self.cancelled():
+                self.cancel(CANCELLED)
+                return True
+        return False
+
+    def admit(self) -> bool:
+        """Account for one more file, or return False when it must not be processed."""
+        if self.stopped():
+            return False
+        with self._lock:
+            if self.max_files is not None and self.files_admitted >= self.max_files:
+                if self.reason is None:
+                    self.reason = FILE_BUDGET
+                return False
+            self.files_admitted += 1
+        return True
+
+
+__all__ = ["AnalysisBudget", "CANCELLED", "DEFAULT_POLL_INTERVAL", "FILE_BUDGET", "TIME_BUDGET"]
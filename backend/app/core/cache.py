@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+from ..settings import env_number
+
+LOGGER = logging.getLogger(__name__)
+
+FINGERPRINT_MODES = ("stat", "content")
+DEFAULT_MAX_ENTRIES = 200_000
+_LOOKUP_BATCH = 500
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+def file_fingerprint(path: Path, mode: str = "stat") -> Optional[str]:
+    """Identify the current state of a file, or None if it cannot be read.
+
+    "stat" mode combines mtime, size and inode and never opens the file;
+    "content" mode hashes the bytes and survives checkouts that touch mtimes.
+    """
+    try:
+        if mode == "content":
+            digest = hashlib.blake2b(digest_size=16)
+            with open(path, "rb") as handle:
+                for block in iter(lambda: handle.read(1 << 16), b""):
+                    digest.update(block)
+            return digest.hexdigest()
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat_fingerprint(stat)
+
+
+def stat_fingerprint(stat: os.stat_result) -> str:
+    """The "stat" fingerprint of a file from a stat result already taken."""
+    return f"{stat.st_mtime_ns}:{stat.st_size}:{stat.st_ino}"
+
+
+class MetricsCache:
+    """Persistent, size-bounded cache of per-file analysis results.
+
+    Entries are keyed by plugin name, plugin version, relative path and file
+    fingerprint (see file_fingerprint), so bumping a plugin's version invalidates everything it
+    cached. Values are whatever JSON-serialisable record the plugin needs to
+    rebuild a file's code units and summary contribution. Storage is a SQLite
+    file in WAL mode so several workers can share it. Once it grows past
+    max_entries, the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: Path, *, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["MetricsCache"]:
+        """Build the cache from NEXUS_CACHE_* settings; an empty directory disables it."""
+        directory = os.getenv("NEXUS_CACHE_DIR", str(Path.home() / ".cache" / "nexus"))
+        if not directory:
+            return None
+        return cls(
+            Path(directory).expanduser() / "metrics.sqlite3",
+            max_entries=env_number("NEXUS_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES, int, minimum=1),
+        )
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        state["_lock"] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS file_metrics ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used INTEGER NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS ix_file_metrics_last_used ON file_metrics (last_used)")
+            self._connection = connection
+        return self._connection
+
+    @staticmethod
+    def _key(plugin: str, version: str, rel_path: str, fingerprint: str) -> str:
+        raw = "\0".join((plugin, version, rel_path, fingerprint))
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def lookup(self, plugin: str, version: str, fingerprints: Mapping[str, str]) -> Dict[str, Any]:
+        """Return cached values for the (rel_path -> fingerprint) entries that hit."""
+        keys = {self._key(plugin, version, rel_path, fingerprint): rel_path for rel_path, fingerprint in fingerprints.items()}
+        hits: Dict[str, Any] = {}
+        try:
+            with self._lock:
+                connection = self._connect()
+                key_list = list(keys)
+                now = time.time_ns()
+                for start in range(0, len(key_list), _LOOKUP_BATCH):
+                    batch = key_list[start : start + _LOOKUP_BATCH]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = connection.execute(
+                        f"SELECT key, value FROM file_metrics WHERE key IN ({placeholders})", batch
+                    ).fetchall()
+                    for key, value in rows:
+                        hits[keys[key]] = json.loads(value)
+                    if rows:
+                        connection.execute("BEGIN")
+                        connection.executemany(
+                            "UPDATE file_metrics SET last_used = ? WHERE key = ?", [(now, key) for key, _ in rows]
+                        )
+                        connection.execute("COMMIT")
+        except sqlite3.Error as exc:
+            LOGGER.warning("Metrics cache lookup failed, analysing without it: %s", exc)
+            self._rollback()
+            hits = {}
+
+        with self._lock:
+            self.stats.hits += len(hits)
+            self.stats.misses += len(fingerprints) - len(hits)
+        return hits
+
+    def store(self, plugin: str, version: str, entries: Iterable[Tuple[str, str, Any]]) -> None:
+        """Persist (rel_path, fingerprint, value) entries and evict overflow."""
+        now = time.time_ns()
+        rows = [
+            (self._key(plugin, version, rel_path, fingerprint), json.dumps(value, separators=(",", ":")), now)
+            for rel_path, fingerprint, value in entries
+        ]
+        if not rows:
+            return
+        try:
+            with self._lock:
+                connection = self._connect()
+                connection.execute("BEGIN")
+                connection.executemany("INSERT OR REPLACE INTO file_metrics VALUES (?, ?, ?)", rows)
+                (count,) = connection.execute("SELECT COUNT(*) FROM file_metrics").fetchone()
+                overflow = count - self.max_entries
+                if overflow > 0:
+                    connection.execute(
+                        "DELETE FROM file_metrics WHERE key IN "
+                        "(SELECT key FROM file_metrics ORDER BY last_used LIMIT ?)",
+                        (overflow,),
+                    )
+                    self.stats.evictions += overflow
+                connection.execute("COMMIT")
+        except sqlite3.Error as exc:
+            LOGGER.warning("Metrics cache store failed: %s", exc)
+            self._rollback()
+
+    def _rollback(self) -> None:
+        with self._lock:
+            connection = self._connection
+            if connection is not None and connection.in_transaction:
+                connection.rollback()
+
+    def snapshot(self) -> dict:
+        return asdict(self.stats)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+__all__ = ["CacheStats", "FINGERPRINT_MODES", "MetricsCache", "file_fingerprint", "stat_fingerprint"]
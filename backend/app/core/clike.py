@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+
+class Capture(NamedTuple):
+    kind: str
+    value: str
+    #: Nesting depth where the capture starts, and the shallowest depth a closing delimiter
+    #: returned to since the capture before it (depth when none did); both 0 without nesting.
+    depth: int = 0
+    low: int = 0
+
+
+class SourceMetrics(NamedTuple):
+    loc: int
+    comment_lines: int
+    complexity: float
+    #: Every capture (see CLikeScanner), in source order.
+    captured: Tuple[Capture, ...] = ()
+
+
+#: Blank lines swallowed by a multi-line comment or string token.
+_INNER_BLANK = re.compile(r"\n[ \t\r\f\v]*(?=\n)")
+_LEADING_BLANK = re.compile(r"[ \t\r\f\v]*(?:\n|\Z)")
+
+_BLANK, _LINE_COMMENT, _BLOCK_COMMENT, _STRING, _CAPTURE = "blank", "line_comment", "block_comment", "string", "capture"
+_OPEN, _CLOSE = "open", "close"
+
+
+def _branches(alternatives: Iterable[Tuple[str, str]]) -> str:
+    """One alternation of (token, group) pairs in which every branch starts with a literal character.
+
+    Tokens are given as patterns; those sharing a first character are merged
+    under it. sre then knows the set of characters a match can start with
+    and skips everything else in C instead of trying each branch at every
+    position, which is most of the scanning cost.
+    """
+    by_first: Dict[str, List[str]] = {}
+    for token, group in alternatives:
+        first, rest = token[0], token[1:]
+        by_first.setdefault(first, []).append(f"(?P<{group}>{rest})")
+    return "|".join(f"{re.escape(first)}(?:{'|'.join(rests)})" for first, rests in by_first.items())
+
+
+class CLikeScanner:
+    """Count lines, comment lines and complexity of C-like source in a single pass.
+
+    One precompiled pattern tokenizes comments, string literals, blank lines
+    and the tokens that add complexity; finditer walks the text once and
+    nothing is collected along the way. Keywords inside comments and string
+    literals are not counted. weights maps each group of counted tokens
+    (keywords are matched as whole words, anything else literally) to the
+    complexity it adds per occurrence; complexity is at least 1.
+
+    loc counts non-blank lines, comment lines included; comment_lines counts
+    lines that hold comment text. Strings follow the usual C rules: quotes
+    end at a newline unless listed in multiline_strings.
+
+    captures maps a kind to a pattern whose matches outside comments and
+    strings are collected into SourceMetrics.captured, e.g. the specifier of
+    an import statement. A pattern starts with a literal character (an
+    identifier one only matches at a word start), uses no backreferences,
+    and its value is the last of its groups that took part in the match.
+    nesting names the (open, close) delimiters whose depth captures record,
+    so that a capture can be placed inside the block of an earlier one.
+    """
+
+    def __init__(
+        self,
+        tokens: Mapping[str, Sequence[str]],
+        weights: Mapping[str, float],
+        *,
+        strings: Sequence[str] = ('"', "'"),
+        multiline_strings: Sequence[str] = (),
+        captures: Optional[Mapping[str, str]] = None,
+        nesting: Optional[Tuple[str, str]] = None,
+    ) -> None:
+        # Group names are unique per branch; kinds maps each back to what it counts.
+        self.kinds: Dict[str, str] = {}
+        alternatives: List[Tuple[str, str]] = []
+
+        def add(kind: str, first: str, rest: str) -> None:
+            group = f"g{len(alternatives)}"
+            self.kinds[group] = kind
+            alternatives.append((first + rest, group))
+
+        add(_LINE_COMMENT, "/", r"/[^\n]*")
+        add(_BLOCK_COMMENT, "/", r"\*[\s\S]*?(?:\*/|\Z)")
+        for delimiter in sorted(multiline_strings, key=len, reverse=True):
+            quote = re.escape(delimiter)
+            add(_STRING, delimiter[0], rf"{re.escape(delimiter[1:])}[\s\S]*?(?:(?<!\\){quote}|\Z)")
+        for delimiter in strings:
+            quote = re.escape(delimiter)
+            add(_STRING, delimiter[0], rf"{re.escape(delimiter[1:])}(?:[^{quote}\\\n]|\\.)*{quote}?")
+        # A blank line is matched at the newline ending the line before it; a blank first line is checked apart.
+        add(_BLANK, "\n", r"[ \t\r\f\v]*(?=\n|\Z)")
+        capture_groups: Dict[str, Tuple[str, int]] = {}
+        for kind, capture in (captures or {}).items():
+            rest = capture[1:]
+            if capture[0].isalnum() or capture[0] in "_$":
+                rest = rf"(?<![\w$].){rest}"
+            add(_CAPTURE, capture[0], rest)
+            capture_groups[alternatives[-1][1]] = (kind, re.compile(capture).groups)
+        for kind, words in tokens.items():
+            for word in sorted(words, key=len, reverse=True):
+                if word.isidentifier():
+                    # Whole words only: the look-behind covers the character before the first one.
+                    add(kind, word[0], rf"(?<![\w$].){re.escape(word[1:])}(?![\w$])")
+                else:
+                    add(kind, word[0], re.escape(word[1:]))
+        for kind, delimiter in zip((_OPEN, _CLOSE), nesting or ()):
+            add(kind, delimiter[0], re.escape(delimiter[1:]))
+        self.weights = {kind: float(weights[kind]) for kind in tokens}
+        self.pattern = re.compile(_branches(alternatives))
+        #: Capture group -> (kind, numbers of its own groups, last first).
+        self.captures: Dict[str, Tuple[str, range]] = {
+            group: (kind, range(self.pattern.groupindex[group] + count, self.pattern.groupindex[group], -1))
+            for group, (kind, count) in capture_groups.items()
+        }
+
+    def scan(self, text: str) -> SourceMetrics:
+        kinds = self.kinds
+        weights = self.weights
+        complexity = 0.0
+        blank = 1 if _LEADING_BLANK.match(text) else 0
+        comment_lines = 0
+        line = 0
+        position = 0
+        last_comment_line = -1
+        captured: List[Capture] = []
+        captures = self.captures
+        append = captured.append
+        depth = 0
+        low = _UNSET = 1 << 62
+        for match in self.pattern.finditer(text):
+            group = match.lastgroup
+            kind = kinds[group]
+            if kind == _BLANK:
+                blank += 1
+            elif kind == _OPEN:
+                depth += 1
+            elif kind == _CLOSE:
+                depth -= 1
+                if depth < low:
+                    low = depth
+            elif kind == _STRING or kind == _CAPTURE:
+                token = match.group()
+                if "\n" in token:  # a string or capture spanning lines
+                    blank += sum(1 for _ in _INNER_BLANK.finditer(token))
+                if kind == _CAPTURE:
+                    capture_kind, numbers = captures[group]
+                    value = None
+                    for number in numbers:
+                        value = match.group(number)
+                        if value is not None:
+                            break
+                    append(Capture(capture_kind, value or "", depth, min(low, depth)))
+                    low = _UNSET
+            elif kind == _LINE_COMMENT or kind == _BLOCK_COMMENT:
+                start = match.start()
+                line += text.count("\n", position, start)
+                position = start
+                token = match.group()
+                span = token.count("\n")
+                inner_blank = sum(1 for _ in _INNER_BLANK.finditer(token)) if span else 0
+                blank += inner_blank
+                lines = span + 1 - inner_blank
+                if line == last_comment_line:
+                    lines -= 1
+                comment_lines += lines
+                last_comment_line = line + span
+            else:
+                complexity += weights[kind]
+        total = text.count("\n") + 1
+        return SourceMetrics(
+            loc=total - blank, comment_lines=comment_lines, complexity=max(1.0, complexity), captured=tuple(captured)
+        )
+
+
+__all__ = ["CLikeScanner", "Capture", "SourceMetrics"]
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import hashlib
+import zlib
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+#: Content codings in order of preference when a client accepts several equally.
+PREFERRED_ENCODINGS = ("br", "zstd", "gzip")
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 10
+
+
+class _GzipEncoder:
+    def __init__(self) -> None:
+        # wbits=31 writes a gzip header and trailer around the deflate stream.
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+def _brotli_encoder() -> Optional[Callable[[], Any]]:
+    try:
+        import brotli
+    except ModuleNotFoundError:
+        return None
+
+    class _BrotliEncoder:
+        def __init__(self) -> None:
+            self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY)
+
+        def compress(self, data: bytes) -> bytes:
+            return self._compressor.process(data)
+
+        def flush(self) -> bytes:
+            return self._compressor.finish()
+
+    return _BrotliEncoder
+
+
+def _zstd_encoder() -> Optional[Callable[[], Any]]:
+    try:
+        import zstandard
+    except ModuleNotFoundError:
+        return None
+
+    class _ZstdEncoder:
+        def __init__(self) -> None:
+            self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+        def compress(self, data: bytes) -> bytes:
+            return self._compressor.compress(data)
+
+        def flush(self) -> bytes:
+            return self._compressor.flush()
+
+    return _ZstdEncoder
+
+
+def available_encoders() -> Dict[str, Callable[[], Any]]:
+    """Map content coding to encoder factory; br and zstd only when their modules are installed."""
+    encoders: Dict[str, Callable[[], Any]] = {"gzip": _GzipEncoder}
+    for name, factory in (("br", _brotli_encoder()), ("zstd", _zstd_encoder())):
+        if factory is not None:
+            encoders[name] = factory
+    return encoders
+
+
+def compress_document(
+    chunks: Iterable[str], encodings: Optional[Sequence[str]] = None
+) -> Tuple[str, Dict[str, bytes]]:
+    """Encode a streamed document once per content coding in a single pass.
+
+    Returns (sha256 hex digest of the plain UTF-8 bytes, {coding: compressed
+    bytes}). Only the compressed forms are held in memory; the plain
+    document is hashed and discarded chunk by chunk.
+    encodings restricts the codings produced (unavailable ones are skipped).
+    """
+    factories = available_encoders()
+    selected = [name for name in (encodings or factories) if name in factories]
+    encoders = {name: factories[name]() for name in selected}
+    outputs: Dict[str, list] = {name: [] for name in selected}
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        digest.update(data)
+        for name, encoder in encoders.items():
+            piece = encoder.compress(data)
+            if piece:
+                outputs[name].append(piece)
+    for name, encoder in encoders.items():
+        outputs[name].append(encoder.flush())
+    return digest.hexdigest(), {name: b"".join(parts) for name, parts in outputs.items()}
+
+
+__all__ = ["PREFERRED_ENCODINGS", "available_encoders", "compress_document"]
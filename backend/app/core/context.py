@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, Mapping, Optional, Sequence, Tuple
+
+from .budget import AnalysisBudget
+from .cache import MetricsCache, file_fingerprint
+from .progress import ProgressTracker
+from .walker import FileIndex
+
+if TYPE_CHECKING:
+    from .analyzer import AnalyzerPlugin
+
+Measure = Callable[[Sequence[str]], Iterable[Tuple[str, Any]]]
+Fingerprinter = Callable[[Path, str], Optional[str]]
+
+#: Per-plugin record of what each file looked like and what it measured as:
+#: {"version": plugin version, "files": {rel_path: [fingerprint, record]}}.
+FileState = Dict[str, Any]
+
+_STORE_BATCH = 1000
+
+
+@dataclass
+class AnalysisContext:
+    """Shared state handed to analyzer plugins for a single analysis run.
+
+    baseline holds the file state recorded by a previous report of the same
+    project; files whose fingerprint still matches are carried forward from
+    it without being read. file_states collects the state of this run so it
+    can be stored alongside the new report. fingerprinter, when set, replaces
+    the plain stat/content fingerprint (e.g. with git blob ids). progress is
+    where plugins report phases, files processed and bytes read; it only
+    forwards anything when the orchestrator attached a callback. budget
+    decides when the run has to stop early (cancellation, time or file
+    budget); measure() checks it between files.
+    """
+
+    root: Path
+    files: FileIndex
+    cache: Optional[MetricsCache] = None
+    fingerprint: str = "stat"
+    fingerprinter: Optional[Fingerprinter] = None
+    baseline: Mapping[str, FileState] = field(default_factory=dict)
+    file_states: Dict[str, FileState] = field(default_factory=dict)
+    progress: ProgressTracker = field(default_factory=ProgressTracker)
+    budget: AnalysisBudget = field(default_factory=AnalysisBudget)
+
+    def measure(
+        self, plugin: "AnalyzerPlugin", rel_paths: Sequence[str], measure: Measure
+    ) -> Iterator[Tuple[str, Any]]:
+        """Yield (rel_path, record) in rel_paths order, measuring only changed files.
+
+        Records are reused from the baseline report first, then from the
+        metrics cache; measure is called once with whatever is left and yields
+        (rel_path, record) pairs in the order given, skipping unreadable files
+        as it sees fit. Fresh records are passed on as soon as they arrive so
+        a streaming plugin never holds the whole tree's results at once.
+        Fingerprints are taken before measuring, so a file edited mid-run is
+        simply picked up again next time. Once the budget runs out no further
+        files are yielded (or measured), leaving the plugin with a partial
+        but consistent result.
+        """
+        fingerprints: Dict[str, str] = {}
+        for rel_path in rel_paths:
+            if self.budget.stopped():
+                return
+            fingerprint = self.fingerprint_file(rel_path)
+            if fingerprint is not None:
+                fingerprints[rel_path] = fingerprint
+
+        records: Dict[str, Any] = {}
+        previous = self.baseline.get(plugin.name)
+        if previous and previous.get("version") == plugin.version:
+            previous_files = previous.get("files") or {}
+            for rel_path, fingerprint in fingerprints.items():
+                entry = previous_files.get(rel_path)
+                if entry and entry[0] == fingerprint:
+                    records[rel_path] = entry[1]
+
+        if self.cache is not None:
+            pending = {rel: fp for rel, fp in fingerprints.items() if rel not in records}
+            if pending:
+                records.update(self.cache.lookup(plugin.name, plugin.version, pending))
+
+        misses = [rel_path for rel_path in rel_paths if rel_path not in records]
+        measured = iter(measure(misses)) if misses else iter(())
+        upcoming = next(measured, None)
+        to_store: list = []
+
+        state = self.file_states.setdefault(plugin.name, {"version": plugin.version, "files": {}})
+        state_files = state["files"]
+        try:
+            for rel_path in rel_paths:
+                if not self.budget.admit():
+                    break
+                record = records.get(rel_path)
+                if record is None:
+                    # measure yields in the order it was given misses, so the
+                    # next fresh record either belongs here or to a later file.
+                    if upcoming is None or upcoming[0] != rel_path:
+                        continue
+                    record = upcoming[1]
+                    upcoming = next(measured, None)
+                    if self.cache is not None and rel_path in fingerprints:
+                        to_store.append((rel_path, fingerprints[rel_path], record))
+                    if len(to_store) >= _STORE_BATCH:
+                        self.cache.store(plugin.name, plugin.version, to_store)
+                        to_store = []
+                if rel_path in fingerprints:
+                    state_files[rel_path] = [fingerprints[rel_path], record]
+                yield rel_path, record
+        finally:
+            # Lets measure release its resources (e.g. cancel queued pool work) when stopping early.
+            close = getattr(measured, "close", None)
+            if close is not None:
+                close()
+            if to_store:
+                self.cache.store(plugin.name, plugin.version, to_store)
+
+    def fingerprint_file(self, rel_path: str) -> Optional[str]:
+        if self.fingerprinter is not None:
+            return self.fingerprinter(self.root, rel_path)
+        return file_fingerprint(self.root / rel_path, self.fingerprint)
+
+
+def count_changed_files(baseline: Mapping[str, FileState], file_state: Mapping[str, FileState]) -> int:
+    """Count files in file_state that are new or differ from baseline."""
+    changed = 0
+    for plugin_name, state in file_state.items():
+        previous = baseline.get(plugin_name) or {}
+        previous_files = (previous.get("files") or {}) if previous.get("version") == state.get("version") else {}
+        for rel_path, (fingerprint, _) in (state.get("files") or {}).items():
+            entry = previous_files.get(rel_path)
+            if not entry or entry[0] != fingerprint:
+                changed += 1
+    return changed
+
+
+__all__ = ["AnalysisContext", "FileState", "Fingerprinter", "count_changed_files"]
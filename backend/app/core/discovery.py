@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import os
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import AbstractSet, Deque, Set, Tuple
+
+#: Directory levels below the root sampled for file extensions.
+SAMPLE_DEPTH = 2
+#: Directories read while sampling, the root included; bounds discovery on huge trees.
+SAMPLE_MAX_DIRS = 64
+#: Never sampled besides hidden directories: dependencies and build output say nothing about the project.
+SAMPLE_SKIP_DIRS = frozenset({"node_modules", "venv", "__pycache__", "dist", "build", "target", "out"})
+#: Project roots whose scans are remembered.
+SCAN_CACHE_SIZE = 256
+
+
+@dataclass(frozen=True)
+class RootScan:
+    """What a shallow look at a project root found, shared by every plugin's discovery.
+
+    files holds the names of the root's own files (where marker files like
+    package.json live); extensions the lower-case extensions seen in the root
+    and a bounded sample of the directories below it.
+    """
+
+    root: str
+    files: frozenset[str] = frozenset()
+    extensions: frozenset[str] = frozenset()
+
+    def has_marker(self, names: AbstractSet[str]) -> bool:
+        return not self.files.isdisjoint(names)
+
+    def has_extension(self, extensions: AbstractSet[str]) -> bool:
+        return not self.extensions.isdisjoint(extensions)
+
+
+def root_scan(path: str) -> RootScan:
+    """Scan path once per modification of the root directory; an empty scan when it is not a directory.
+
+    Adding or removing a root entry changes the root's mtime and so refreshes
+    the scan. Changes deeper in the tree only show up once the root changes,
+    which is fine for deciding what kind of project it is.
+    """
+    root = os.path.abspath(path)
+    try:
+        stat = os.stat(root)
+    except OSError:
+        return RootScan(root)
+    if not os.path.isdir(root):
+        return RootScan(root)
+    return _scan(root, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=SCAN_CACHE_SIZE)
+def _scan(root: str, _mtime_ns: int) -> RootScan:
+    files: Set[str] = set()
+    extensions: Set[str] = set()
+    pending: Deque[Tuple[str, int]] = deque([(root, 0)])
+    visited = 0
+    while pending and visited < SAMPLE_MAX_DIRS:
+        directory, depth = pending.popleft()
+        visited += 1
+        try:
+            with os.scandir(directory) as iterator:
+                entries = sorted(iterator, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    skipped = entry.name.startswith(".") or entry.name in SAMPLE_SKIP_DIRS
+                    if depth < SAMPLE_DEPTH and not skipped:
+                        pending.append((entry.path, depth + 1))
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            if depth == 0:
+                files.add(entry.name)
+            extension = os.path.splitext(entry.name)[1].lower()
+            if extension:
+                extensions.add(extension)
+    return RootScan(root, frozenset(files), frozenset(extensions))
+
+
+__all__ = ["RootScan", "SAMPLE_DEPTH", "SAMPLE_MAX_DIRS", "root_scan"]
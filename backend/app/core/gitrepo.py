@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import logging
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+from .cache import file_fingerprint, stat_fingerprint
+
+LOGGER = logging.getLogger(__name__)
+
+_HEADER = struct.Struct(">4sLL")
+_ENTRY = struct.Struct(">LLLLLLLLLL")
+_EXTENDED_FLAG = 0x4000
+_SKIP_WORKTREE = 0x4000
+_NAME_MASK = 0x0FFF
+_STAGE_MASK = 0x3000
+_GITLINK_MODE = 0o160000
+_DIRECTORY_MODE = 0o040000
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    """Cached stat data and blob id for one tracked file in the git index."""
+
+    mtime_s: int
+    mtime_ns: int
+    ino: int
+    size: int
+    sha: str
+
+
+class GitIndexError(ValueError):
+    """Raised when the index file cannot be parsed."""
+
+
+def _read_varint(data: bytes, offset: int) -> tuple[int, int]:
+    # Offset encoding used by index v4 path compression.
+    if offset >= len(data):
+        raise GitIndexError("index is truncated")
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        if offset >= len(data):
+            raise GitIndexError("index is truncated")
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, offset
+
+
+def parse_index(data: bytes, *, hash_size: int = 20) -> Dict[str, IndexEntry]:
+    """Parse a git index (versions 2-4) into {posix path: IndexEntry}.
+
+    Conflicted, skip-worktree, submodule and sparse-directory entries are
+    left out; callers treat such paths as untracked.
+    """
+    if len(data) < _HEADER.size:
+        raise GitIndexError("index is truncated")
+    signature, version, count = _HEADER.unpack_from(data, 0)
+    if signature != b"DIRC" or version not in (2, 3, 4):
+        raise GitIndexError(f"unsupported index signature/version {signature!r} v{version}")
+
+    entries: Dict[str, IndexEntry] = {}
+    offset = _HEADER.size
+    previous_path = b""
+    for _ in range(count):
+        if offset + _ENTRY.size + hash_size + 2 > len(data):
+            raise GitIndexError("index is truncated")
+        start = offset
+        (_, _, mtime_s, mtime_ns, _, ino, mode, _, _, size) = _ENTRY.unpack_from(data, offset)
+        offset += _ENTRY.size
+        sha = data[offset : offset + hash_size].hex()
+        offset += hash_size
+        (flags,) = struct.unpack_from(">H", data, offset)
+        offset += 2
+        extended = 0
+        if flags & _EXTENDED_FLAG:
+            (extended,) = struct.unpack_from(">H", data, offset)
+            offset += 2
+
+        if version == 4:
+            strip, offset = _read_varint(data, offset)
+            end = data.find(b"\0", offset)
+            if end < 0:
+                raise GitIndexError("index is truncated")
+            path = previous_path[: len(previous_path) - strip] + data[offset:end]
+            offset = end + 1
+        else:
+            name_length = flags & _NAME_MASK
+            if name_length < _NAME_MASK:
+                end = offset + name_length
+            else:
+                end = data.index(b"\0", offset)
+            path = data[offset:end]
+            # Entries are NUL padded to a multiple of eight bytes.
+            offset = start + ((end - start) // 8 + 1) * 8
+        previous_path = path
+
+        object_type = mode & 0o170000
+        if flags & _STAGE_MASK or extended & _SKIP_WORKTREE or object_type in (_GITLINK_MODE, _DIRECTORY_MODE):
+            continue
+        entries[path.decode("utf-8", "surrogateescape")] = IndexEntry(mtime_s, mtime_ns, ino, size, sha)
+    return entries
+
+
+class GitWorkTree:
+    """Read-only view of a local git working tree: HEAD and the index."""
+
+    def __init__(self, top: Path, git_dir: Path) -> None:
+        self.top = top
+        self.git_dir = git_dir
+        common = git_dir / "commondir"
+        if common.is_file():
+            self.common_dir = (git_dir / common.read_text(encoding="utf-8").strip()).resolve()
+        else:
+            self.common_dir = git_dir
+
+    @classmethod
+    def discover(cls, path: Path) -> Optional["GitWorkTree"]:
+        """Find the working tree containing path, following .git files of worktrees/submodules."""
+        for candidate in (path, *path.parents):
+            marker = candidate / ".git"
+            if marker.is_dir():
+                return cls(candidate, marker)
+            if marker.is_file():
+                content = marker.read_text(encoding="utf-8", errors="ignore").strip()
+                if content.startswith("gitdir:"):
+                    git_dir = (candidate / content[len("gitdir:") :].strip()).resolve()
+                    if git_dir.is_dir():
+                        return cls(candidate, git_dir)
+        return None
+
+    def index_mtime_ns(self) -> Optional[int]:
+        """The index file's mtime, which changes whenever git writes it (staging, commits, checkouts)."""
+        try:
+            return (self.git_dir / "index").stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def head_commit(self) -> Optional[str]:
+        try:
+            head = (self.git_dir / "HEAD").read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        if not head.startswith("ref:"):
+            return head or None
+        return self._resolve_ref(head[len("ref:") :].strip())
+
+    def _resolve_ref(self, ref: str) -> Optional[str]:
+        for base in (self.git_dir, self.common_dir):
+            try:
+                return (base / ref).read_text(encoding="utf-8").strip() or None
+            except OSError:
+                continue
+        try:
+            packed = (self.common_dir / "packed-refs").read_text(encoding="utf-8")
+        except OSError:
+            return None
+        for line in packed.splitlines():
+            if line and line[0] not in "#^" and line.endswith(" " + ref):
+                return line.split(" ", 1)[0]
+        return None
+
+    def _hash_size(self) -> int:
+        try:
+            config = (self.common_dir / "config").read_text(encoding="utf-8", errors="ignore")
+        except OSError:
+            return 20
+        return 32 if "objectformat = sha256" in config.replace("\t", " ").lower() else 20
+
+    def read_index(self) -> tuple[Dict[str, IndexEntry], Optional[int]]:
+        """Return the index entries and the index file's own mtime in nanoseconds."""
+        index_path = self.git_dir / "index"
+        try:
+            data = index_path.read_bytes()
+            index_mtime = index_path.stat().st_mtime_ns
+        except OSError:
+            return {}, None
+        return parse_index(data, hash_size=self._hash_size()), index_mtime
+
+
+class GitFingerprints:
+    """Fingerprint files by the blob id the git index already recorded for them.
+
+    A tracked file whose size, inode and mtime still match its index entry
+    is fingerprinted as its blob id without being read, which also makes the
+    fingerprint stable across clones and CI checkouts. Entries at least as
+    new as the index file itself are "racily clean" in git's terms and are
+    not trusted. Untracked and modified files fall back to fallback.
+
+    Every file is still stat'ed once, even when HEAD and the index are the
+    ones the baseline report saw: an edit that has not been staged changes
+    nothing but the file's own stat data, so skipping the stat would carry
+    stale records forward. git status makes the same check for the same
+    reason (short of an fsmonitor daemon).
+    """
+
+    def __init__(
+        self,
+        entries: Mapping[str, IndexEntry],
+        *,
+        index_mtime_ns: Optional[int] = None,
+        fallback: str = "stat",
+    ) -> None:
+        self.entries = entries
+        self.index_mtime_ns = index_mtime_ns
+        self.fallback = fallback
+
+    @classmethod
+    def for_project(cls, worktree: GitWorkTree, root: Path, *, fallback: str = "stat") -> Optional["GitFingerprints"]:
+        try:
+            entries, index_mtime = worktree.read_index()
+        except (GitIndexError, struct.error, ValueError) as exc:
+            LOGGER.warning("Ignoring unreadable git index in %s: %s", worktree.git_dir, exc)
+            return None
+        relative = root.relative_to(worktree.top).as_posix()
+        if relative != ".":
+            # Keep only this project's slice of a (possibly huge) monorepo index.
+            prefix = relative + "/"
+            entries = {path[len(prefix) :]: entry for path, entry in entries.items() if path.startswith(prefix)}
+        return cls(entries, index_mtime_ns=index_mtime, fallback=fallback)
+
+    def blob_id(self, root: Path, rel_path: str) -> Optional[str]:
+        """Return the index blob id if the working file is unchanged, else None."""
+        entry = self.entries.get(rel_path.replace(os.sep, "/"))
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(root / rel_path)
+        except OSError:
+            return None
+        return self._clean_sha(entry, stat)
+
+    def _clean_sha(self, entry: IndexEntry, stat: os.stat_result) -> Optional[str]:
+        mtime_s, mtime_ns = divmod(stat.st_mtime_ns, 1_000_000_000)
+        if entry.size != stat.st_size & 0xFFFFFFFF or entry.mtime_s != mtime_s & 0xFFFFFFFF:
+            return None
+        if entry.mtime_ns and entry.mtime_ns != mtime_ns:
+            return None
+        if entry.ino and entry.ino != stat.st_ino & 0xFFFFFFFF:
+            return None
+        if self.index_mtime_ns is not None and stat.st_mtime_ns >= self.index_mtime_ns:
+            return None
+        return entry.sha
+
+    def __call__(self, root: Path, rel_path: str) -> Optional[str]:
+        entry = self.entries.get(rel_path.replace(os.sep, "/"))
+        if entry is None or self.fallback != "stat":
+            sha = self.blob_id(root, rel_path) if entry is not None else None
+            return f"git:{sha}" if sha is not None else file_fingerprint(root / rel_path, self.fallback)
+        # A modified tracked file is fingerprinted from the stat already taken.
+        try:
+            stat = os.stat(root / rel_path)
+        except OSError:
+            return None
+        sha = self._clean_sha(entry, stat)
+        if sha is not None:
+            return f"git:{sha}"
+        return stat_fingerprint(stat)
+
+
+__all__ = ["GitFingerprints", "GitIndexError", "GitWorkTree", "IndexEntry", "parse_index"]
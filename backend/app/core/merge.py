@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from .stream import CODE_UNIT, CONNECTION, DEPENDENCY, LANGUAGES, SECTIONS, SUMMARY
+
+
+class UDMMerger:
+    """Incrementally combine the record streams of several plugins.
+
+    Code units, dependencies and connections are admitted in arrival order
+    with duplicates dropped; only their keys are remembered, so the merger
+    stays small while the records themselves stream past. With dedupe off
+    (a single plugin) nothing is remembered at all. The combined summary
+    adds up file and line counts and weights each plugin's average
+    complexity by the number of files it saw.
+    """
+
+    def __init__(self, *, dedupe: bool = True) -> None:
+        self.dedupe = dedupe
+        self.languages: List[str] = []
+        self._seen: Dict[str, set] = {kind: set() for kind in SECTIONS}
+        self.dependency_count = 0
+        self.total_files = 0
+        self.total_loc = 0
+        self.weighted_complexity = 0.0
+
+    def admit(self, kind: str, value: Any) -> bool:
+        """Account for one record; return False for a duplicate item to drop."""
+        if kind in SECTIONS:
+            if self.dedupe:
+                key = _item_key(kind, value)
+                seen = self._seen[kind]
+                if key in seen:
+                    return False
+                seen.add(key)
+            if kind == DEPENDENCY:
+                self.dependency_count += 1
+        elif kind == LANGUAGES:
+            for language in [value] if isinstance(value, str) else value:
+                if language not in self.languages:
+                    self.languages.append(language)
+        elif kind == SUMMARY:
+            files = int(value.get("totalFiles") or 0)
+            self.total_files += files
+            self.total_loc += int(value.get("totalLinesOfCode") or 0)
+            self.weighted_complexity += float(value.get("avgComplexity") or 0.0) * files
+        return True
+
+    def summary(self) -> dict:
+        return {
+            "totalFiles": self.total_files,
+            "totalLinesOfCode": self.total_loc,
+            "avgComplexity": round(self.weighted_complexity / self.total_files, 2) if self.total_files else 0.0,
+            "dependencyCount": self.dependency_count,
+        }
+
+
+def _item_key(kind: str, value: dict) -> Any:
+    if kind == CODE_UNIT:
+        return (value.get("id"), value.get("type"), value.get("path"))
+    if kind == CONNECTION:
+        return (value.get("sourceUnitId"), value.get("targetUnitId"), value.get("type"))
+    return value.get("id")
+
+
+__all__ = ["UDMMerger"]
@@ -1,11 +1,42 @@
 from __future__ import annotations
 
+import hashlib
+import inspect
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
 
+from .analyzer import AnalyzerPlugin
+from .budget import AnalysisBudget
+from .cache import FINGERPRINT_MODES, MetricsCache, file_fingerprint
+from .context import AnalysisContext, FileState
+from .gitrepo import GitFingerprints, GitWorkTree
+from .merge import UDMMerger
 from .plugins import PluginManager
-from .udm import UnifiedDataModel
+from .progress import ProgressCallback, ProgressTracker
+from .stream import (
+    CODE_UNIT,
+    CONNECTION,
+    DEPENDENCY,
+    HEADER,
+    LANGUAGES,
+    META,
+    SUMMARY,
+    UDMRecord,
+    collect_payload,
+    payload_records,
+)
+from .udm import CodeUnit, Connection, Dependency, Summary, UnifiedDataModel
+from .walker import VCS_DIRS, FileIndex, iter_files, scan_tree
+
+LOGGER = logging.getLogger(__name__)
 
 
 class AnalysisError(RuntimeError):
@@ -16,23 +47,385 @@ class PluginNotFoundError(AnalysisError):
     """Raised when no analyzer plugin can handle the project."""
 
 
+EXECUTOR_KINDS = ("thread", "process", "serial")
+#: "git" fingerprints tracked files by their index blob id and falls back to
+#: "stat" for untracked/modified files and for projects outside a git tree.
+FINGERPRINT_STRATEGIES = (*FINGERPRINT_MODES, "git")
+
+_ITEM_MODELS = {CODE_UNIT: CodeUnit, DEPENDENCY: Dependency, CONNECTION: Connection}
+_HEADER_FIELDS = {"nexusVersion", "projectName", "languages", "analysisTimestamp"}
+#: Records buffered between plugin threads and the consumer of a stream.
+_STREAM_BUFFER = 1024
+_FINISHED = None
+
+
+@dataclass
+class AnalysisResult:
+    """A validated report plus the per-file state needed to build on it later."""
+
+    udm: UnifiedDataModel
+    file_state: Dict[str, FileState] = field(default_factory=dict)
+    revision: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ProjectProbe:
+    """What a quick look at a project tells before analysing it (see AnalysisOrchestrator.probe)."""
+
+    #: None when the project is too large to fingerprint cheaply.
+    fingerprint: Optional[str]
+    #: Files the analysis would read, counted up to the probe's limit.
+    files: int
+
+
+def run_plugin(
+    plugin: AnalyzerPlugin, project_path: str, context: AnalysisContext
+) -> Tuple[dict, Optional[FileState], Optional[str]]:
+    """Invoke plugin.analyze, passing the context only to plugins that accept it.
+
+    Returns the payload with the file state the plugin recorded and the
+    reason its budget ran out (if it did), which is how both make it back
+    from a process pool worker.
+    """
+    if _accepts_context(plugin.analyze):
+        payload = plugin.analyze(project_path, context=context)
+    else:
+        payload = plugin.analyze(project_path)
+    return payload, context.file_states.get(plugin.name), context.budget.reason
+
+
+def stream_plugin(plugin: AnalyzerPlugin, project_path: str, context: AnalysisContext) -> Iterator[UDMRecord]:
+    """Yield the plugin's UDM records, wrapping analyze() for plugins without stream()."""
+    stream = getattr(plugin, "stream", None)
+    if callable(stream):
+        if _accepts_context(stream):
+            yield from stream(project_path, context=context)
+        else:
+            yield from stream(project_path)
+        return
+    payload, _, _ = run_plugin(plugin, project_path, context)
+    yield from payload_records(_check_payload(payload))
+
+
+def _accepts_context(method: Any) -> bool:
+    try:
+        return "context" in inspect.signature(method).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def _check_payload(payload: Any) -> dict:
+    if not isinstance(payload, dict):
+        raise AnalysisError("Analyzer plugins must return a dictionary payload")
+    return payload
+
+
+class AnalysisStream:
+    """Lazily produced, validated UDM records of one analysis.
+
+    Iterating yields ("codeUnit" | "dependency" | "connection", item) records
+    as plugins produce them, followed by one "header" record (nexusVersion,
+    projectName, languages, analysisTimestamp) and one "summary" record.
+    Items are validated and normalised one at a time, so consumers such as
+    the report writer never need the whole report in memory. file_state and
+    summary are filled in once the stream is exhausted, as is truncated:
+    the reason the context's budget ran out, in which case the summary says
+    so too and the report only covers the files read until then. Iterate
+    only once.
+    progress is shared with the plugins through the context; for plugins
+    that do not report progress themselves (and for every plugin on a
+    process pool, whose workers only see a detached copy) each file-level
+    code unit is counted as it goes by.
+    """
+
+    def __init__(
+        self,
+        orchestrator: "AnalysisOrchestrator",
+        plugins: Sequence[AnalyzerPlugin],
+        context: AnalysisContext,
+        *,
+        revision: Optional[str] = None,
+        progress: Optional[ProgressTracker] = None,
+    ) -> None:
+        self.orchestrator = orchestrator
+        self.plugins = list(plugins)
+        self.context = context
+        self.revision = revision
+        self.file_state: Dict[str, FileState] = {}
+        self.summary: Optional[dict] = None
+        self.truncated: Optional[str] = None
+        self.started_at = datetime.now(timezone.utc)
+        self.progress = progress or context.progress
+
+    def __iter__(self) -> Iterator[UDMRecord]:
+        merger = UDMMerger(dedupe=len(self.plugins) > 1)
+        overrides: Dict[str, Any] = {}
+        summaries: List[dict] = []
+        languages: Dict[str, List[str]] = {}
+        pooled = self.orchestrator.executor == "process" and len(self.plugins) > 1
+        self_reporting = {
+            plugin.name for plugin in self.plugins if getattr(plugin, "reports_progress", False) and not pooled
+        }
+
+        self.context.progress = self.progress
+        self.progress.start("analyzing")
+        for plugin, kind, value in self.orchestrator._plugin_records(self.plugins, self.context):
+            if kind in _ITEM_MODELS:
+                item = _ITEM_MODELS[kind].model_validate(value).model_dump(mode="json", by_alias=True)
+                if merger.admit(kind, item):
+                    if kind == CODE_UNIT and item.get("type") == "FILE" and plugin.name not in self_reporting:
+                        self.progress.advance()
+                    yield kind, item
+            elif kind == LANGUAGES:
+                languages.setdefault(plugin.name, []).extend([value] if isinstance(value, str) else value)
+            elif kind == SUMMARY:
+                summaries.append(value or {})
+                merger.admit(kind, value or {})
+            elif kind == META:
+                for key, meta_value in value.items():
+                    if key in _HEADER_FIELDS - {"languages"}:
+                        overrides.setdefault(key, meta_value)
+
+        header = {"projectName": self.context.root.name, "analysisTimestamp": self.started_at, **overrides}
+        # Plugin order, not arrival order, so threaded runs stay reproducible.
+        for plugin in self.plugins:
+            merger.admit(LANGUAGES, languages.get(plugin.name) or [plugin.name])
+        header["languages"] = merger.languages
+        udm = UnifiedDataModel.model_validate(header)
+        summary = summaries[0] if len(self.plugins) == 1 and summaries else merger.summary()
+        self.truncated = self.context.budget.reason
+        if self.truncated:
+            summary = {**summary, "truncated": self.truncated}
+        self.summary = Summary.model_validate(summary).model_dump(mode="json")
+        self.file_state = {name: state for name, state in self.context.file_states.items() if state}
+        cache = self.orchestrator.cache
+        if cache is not None:
+            LOGGER.info("Metrics cache totals after %s: %s", self.context.root, cache.snapshot())
+        self.progress.finish()
+        yield HEADER, udm.model_dump(mode="json", include=_HEADER_FIELDS)
+        yield SUMMARY, self.summary
+
+
 class AnalysisOrchestrator:
-    """Coordinates analyzer discovery and execution."""
+    """Coordinates analyzer discovery and execution.
 
-    def __init__(self, plugin_manager: Optional[PluginManager] = None) -> None:
+    Every applicable plugin runs against the same file index and their
+    payloads are merged into one report. With more than one plugin they run
+    on a thread or process pool (executor) so a polyglot analysis costs about
+    as much as its slowest plugin. An optional MetricsCache is shared with
+    plugins so unchanged files are not re-read on the next run, and run()
+    accepts the file state of a previous report to analyse incrementally.
+    """
+
+    def __init__(
+        self,
+        plugin_manager: Optional[PluginManager] = None,
+        *,
+        executor: str = "thread",
+        max_workers: Optional[int] = None,
+        cache: Optional[MetricsCache] = None,
+        fingerprint: str = "stat",
+    ) -> None:
+        if executor not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor {executor!r}; expected one of {', '.join(EXECUTOR_KINDS)}")
+        if fingerprint not in FINGERPRINT_STRATEGIES:
+            raise ValueError(f"Unknown fingerprint mode {fingerprint!r}")
         self.plugin_manager = plugin_manager or PluginManager()
+        self.executor = executor
+        self.max_workers = max_workers
+        self.cache = cache
+        self.fingerprint = fingerprint
 
     def analyze(self, project_path: str) -> UnifiedDataModel:
+        return self.run(project_path).udm
+
+    def run(self, project_path: str, *, baseline: Optional[Mapping[str, FileState]] = None) -> AnalysisResult:
+        """Analyse project_path, reusing unchanged files recorded in baseline."""
+        stream = self.stream(project_path, baseline=baseline)
+        payload = collect_payload(stream)
+        return AnalysisResult(
+            udm=UnifiedDataModel.model_validate(payload),
+            file_state=stream.file_state,
+            revision=stream.revision,
+        )
+
+    def stream(
+        self,
+        project_path: str,
+        *,
+        baseline: Optional[Mapping[str, FileState]] = None,
+        progress: Optional[ProgressCallback] = None,
+        budget: Optional[AnalysisBudget] = None,
+    ) -> AnalysisStream:
+        """Prepare a streaming analysis of project_path (see AnalysisStream).
+
+        Path and plugin lookup errors are raised here; the plugins themselves
+        only run while the returned stream is iterated. progress receives
+        rate-limited ProgressTracker snapshots while it is, and budget (by
+        default unlimited) can stop it early with partial results.
+        """
         normalized = self._normalize_path(project_path)
         applicable_plugins = self.plugin_manager.find_applicable(str(normalized))
         if not applicable_plugins:
             raise PluginNotFoundError(f"No analyzer plugin supports {normalized}")
 
-        # Milestone 1: run the first suitable plugin.
-        plugin = applicable_plugins[0]
-        raw_udm = plugin.analyze(str(normalized))
-        payload = self._ensure_payload(raw_udm, project_path=str(normalized), plugin_name=plugin.name)
-        return UnifiedDataModel.model_validate(payload)
+        tracker = ProgressTracker(progress)
+        tracker.start("discovering")
+        context = self._build_context(normalized, applicable_plugins)
+        context.baseline = baseline or {}
+        if budget is not None:
+            context.budget = budget
+        tracker.discover(len(context.files))
+        revision = self._attach_git(context)
+        return AnalysisStream(self, applicable_plugins, context, revision=revision, progress=tracker)
+
+    def probe(self, project_path: str, *, limit: Optional[int] = None) -> ProjectProbe:
+        """Count and fingerprint what an analysis of project_path would read, without reading it.
+
+        Files are counted by a walk that stops after limit files, which is
+        all a caller choosing between a small and a large queue needs. The
+        fingerprint digests the applicable plugins and their versions with,
+        inside a git working tree (the default "git" fingerprint strategy),
+        the HEAD commit and the index file's mtime. Elsewhere the walk's files
+        and those at the project root are stat fingerprinted, provided the
+        walk ended before limit; past it the project gets no fingerprint.
+        Equal fingerprints let callers share one analysis between identical
+        requests. The git inputs miss unstaged edits and untracked files, so
+        at worst a request is handed a report from just before them.
+        """
+        normalized = self._normalize_path(project_path)
+        plugins = self.plugin_manager.find_applicable(str(normalized))
+        if not plugins:
+            raise PluginNotFoundError(f"No analyzer plugin supports {normalized}")
+        walk = self._walk_filter(plugins)
+        files = iter_files(normalized, skip_dirs=walk[1], extensions=walk[0]) if walk else iter(())
+        rel_paths = [rel_path for rel_path, _ in islice(files, limit)]
+
+        digest = hashlib.blake2b(digest_size=16)
+        for plugin in plugins:
+            digest.update(f"{plugin.name}@{plugin.version}\0".encode())
+        worktree = GitWorkTree.discover(normalized) if self.fingerprint == "git" else None
+        head = worktree.head_commit() if worktree is not None else None
+        if worktree is not None and head is not None:
+            digest.update(f"git\0{head}\0{worktree.index_mtime_ns()}\0".encode())
+        elif limit is None or len(rel_paths) < limit:
+            with os.scandir(normalized) as entries:
+                root_files = {entry.name for entry in entries if entry.is_file()}
+            for rel_path in sorted(root_files.union(rel_paths)):
+                digest.update(f"{rel_path}\0{file_fingerprint(normalized / rel_path) or ''}\0".encode())
+        else:
+            return ProjectProbe(fingerprint=None, files=len(rel_paths))
+        return ProjectProbe(fingerprint=digest.hexdigest(), files=len(rel_paths))
+
+    def _attach_git(self, context: AnalysisContext) -> Optional[str]:
+        """Use git index blob ids as fingerprints; return the HEAD commit if any."""
+        if self.fingerprint != "git":
+            return None
+        context.fingerprint = "stat"
+        worktree = GitWorkTree.discover(context.root)
+        if worktree is None:
+            return None
+        context.fingerprinter = GitFingerprints.for_project(worktree, context.root)
+        return worktree.head_commit()
+
+    def _plugin_records(
+        self, plugins: Sequence[AnalyzerPlugin], context: AnalysisContext
+    ) -> Iterator[Tuple[AnalyzerPlugin, Optional[str], Any]]:
+        """Yield (plugin, kind, value) records, then (plugin, None, None) once it is done."""
+        project_path = str(context.root)
+        if len(plugins) == 1 or self.executor == "serial":
+            for plugin in plugins:
+                for kind, value in stream_plugin(plugin, project_path, context):
+                    yield plugin, kind, value
+                yield plugin, _FINISHED, None
+        elif self.executor == "process":
+            # Generators cannot cross process boundaries: workers return whole
+            # payloads, which are streamed on from here in plugin order.
+            with self._create_executor(len(plugins)) as pool:
+                futures = [pool.submit(run_plugin, plugin, project_path, context) for plugin in plugins]
+                for plugin, future in zip(plugins, futures):
+                    payload, state, stopped = future.result()
+                    if state:
+                        context.file_states[plugin.name] = state
+                    if stopped:
+                        context.budget.cancel(stopped)
+                    for kind, value in payload_records(_check_payload(payload)):
+                        yield plugin, kind, value
+                    yield plugin, _FINISHED, None
+        else:
+            yield from self._thread_records(plugins, project_path, context)
+
+    def _thread_records(
+        self, plugins: Sequence[AnalyzerPlugin], project_path: str, context: AnalysisContext
+    ) -> Iterator[Tuple[AnalyzerPlugin, Optional[str], Any]]:
+        """Interleave plugin streams running on threads through a bounded queue."""
+        feed: "queue.Queue[tuple]" = queue.Queue(maxsize=_STREAM_BUFFER)
+        stop = threading.Event()
+
+        def put(item: tuple) -> bool:
+            while not stop.is_set():
+                try:
+                    feed.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce(plugin: AnalyzerPlugin) -> None:
+            try:
+                for kind, value in stream_plugin(plugin, project_path, context):
+                    if not put((plugin, kind, value)):
+                        return
+                put((plugin, _FINISHED, None))
+            except BaseException as exc:  # handed to the consumer below
+                put((plugin, _FINISHED, exc))
+
+        with self._create_executor(len(plugins)) as pool:
+            for plugin in plugins:
+                pool.submit(produce, plugin)
+            try:
+                remaining = len(plugins)
+                while remaining:
+                    plugin, kind, value = feed.get()
+                    if kind is _FINISHED:
+                        if isinstance(value, BaseException):
+                            raise value
+                        remaining -= 1
+                        value = None
+                    yield plugin, kind, value
+            finally:
+                stop.set()
+
+    def _create_executor(self, plugin_count: int) -> Executor:
+        workers = min(plugin_count, self.max_workers or plugin_count)
+        if self.executor == "process":
+            return ProcessPoolExecutor(max_workers=workers)
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nexus-plugin")
+
+    def _build_context(self, root: Path, plugins: Sequence[AnalyzerPlugin]) -> AnalysisContext:
+        """Walk the project once for every plugin that consumes the file index.
+
+        Only directories that all consumers skip are pruned during the walk;
+        each plugin filters its own extra skip directories from the index.
+        """
+        walk = self._walk_filter(plugins)
+        if walk is None:
+            return AnalysisContext(root=root, files=FileIndex(root=root), cache=self.cache, fingerprint=self.fingerprint)
+        extensions, skip_dirs = walk
+        files = scan_tree(root, skip_dirs=skip_dirs, extensions=extensions)
+        return AnalysisContext(root=root, files=files, cache=self.cache, fingerprint=self.fingerprint)
+
+    def _walk_filter(self, plugins: Sequence[AnalyzerPlugin]) -> Optional[Tuple[set[str], set[str]]]:
+        """(extensions, skip_dirs) of the one walk serving plugins, or None when none of them reads files."""
+        consumers = [plugin for plugin in plugins if plugin.extensions]
+        if not consumers:
+            return None
+        extensions: set[str] = set()
+        skip_dirs: Optional[set[str]] = None
+        for plugin in consumers:
+            extensions.update(plugin.extensions)
+            skip_dirs = set(plugin.skip_dirs) if skip_dirs is None else skip_dirs & plugin.skip_dirs
+        return extensions, VCS_DIRS | (skip_dirs or set())
 
     def _normalize_path(self, project_path: str) -> Path:
         path = Path(project_path).expanduser().resolve()
@@ -41,28 +434,3 @@ class AnalysisOrchestrator:
         if not path.is_dir():
             raise NotADirectoryError(f"Project path {project_path} is not a directory")
         return path
-
-    def _ensure_payload(self, payload: dict, *, project_path: str, plugin_name: str) -> dict:
-        if not isinstance(payload, dict):
-            raise AnalysisError("Analyzer plugins must return a dictionary payload")
-
-        path = Path(project_path)
-        timestamp = datetime.now(timezone.utc)
-
-        merged = {
-            "projectName": path.name,
-            "analysisTimestamp": timestamp,
-            "languages": [plugin_name],
-        }
-        merged.update(payload)
-
-        languages = merged.get("languages")
-        if not languages:
-            merged["languages"] = [plugin_name]
-        elif isinstance(languages, str):
-            merged["languages"] = [languages]
-
-        if "analysisTimestamp" not in payload:
-            merged["analysisTimestamp"] = timestamp
-
-        return merged
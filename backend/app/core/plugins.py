@@ -1,33 +1,159 @@
 from __future__ import annotations
 
+import importlib
 import logging
+import sys
+import threading
+from dataclasses import dataclass
 from importlib.metadata import entry_points
-from typing import Dict, List, Optional, Sequence
+from typing import Callable, Dict, List, Optional, Sequence, Union
 
 from .analyzer import AnalyzerPlugin
+from .discovery import RootScan, root_scan
 
 LOGGER = logging.getLogger(__name__)
 NEXUS_ANALYZER_GROUP = "nexus.analyzers"
+#: Methods of the analyzer protocol (see AnalyzerPlugin) that is_analyzer checks for.
+ANALYZER_METHODS = ("discover", "analyze")
+
+
+@dataclass(frozen=True)
+class PluginSpec:
+    """What PluginManager knows about a plugin before importing it.
+
+    target names the plugin like an entry point does ("module:attribute");
+    it may be a plugin instance, class or factory. Declaring markers and
+    extensions lets discovery skip the import for projects that have none of
+    them; a spec without either is imported the first time any project is
+    discovered. path is put on sys.path right before the import.
+    """
+
+    name: str
+    target: str
+    markers: frozenset[str] = frozenset()
+    extensions: frozenset[str] = frozenset()
+    path: Optional[str] = None
+
+    def may_apply(self, scan: RootScan) -> bool:
+        """False only when the plugin certainly does not handle the scanned project."""
+        if not self.markers and not self.extensions:
+            return True
+        return scan.has_marker(self.markers) or scan.has_extension(self.extensions)
+
+    @classmethod
+    def from_metadata(cls, module_name: str, path: Optional[str] = None) -> "PluginSpec":
+        """The spec a plugin package publishes in a light module of constants.
+
+        The module (say nexus_analyzer_python.metadata) defines NAME and
+        TARGET, and optionally MARKERS and DISCOVERY_EXTENSIONS; it must not
+        import the analyzer, so reading it leaves the plugin unloaded.
+        Raises ImportError when the module cannot be imported.
+        """
+        _add_to_path(path)
+        metadata = importlib.import_module(module_name)
+        return cls(
+            name=metadata.NAME,
+            target=metadata.TARGET,
+            markers=frozenset(getattr(metadata, "MARKERS", ())),
+            extensions=frozenset(getattr(metadata, "DISCOVERY_EXTENSIONS", ())),
+            path=path,
+        )
+
+    def load(self) -> object:
+        _add_to_path(self.path)
+        module_name, _, attribute = self.target.partition(":")
+        loaded: object = importlib.import_module(module_name)
+        for part in attribute.split(".") if attribute else ():
+            loaded = getattr(loaded, part)
+        return loaded
+
+
+def _add_to_path(path: Optional[str]) -> None:
+    if path and path not in sys.path:
+        sys.path.append(path)
+
+
+def is_analyzer(candidate: object) -> bool:
+    """True for an analyzer plugin instance.
+
+    Bundled plugins subclass the AnalyzerPlugin of the backend.app import
+    path, which is a different class from this one, so they are checked
+    against its protocol instead: a string name and callable discover() and
+    analyze().
+    """
+    if isinstance(candidate, AnalyzerPlugin):
+        return True
+    if isinstance(candidate, (type, PluginSpec)):
+        return False
+    return isinstance(getattr(candidate, "name", None), str) and all(
+        callable(getattr(candidate, member, None)) for member in ANALYZER_METHODS
+    )
 
 
 class PluginManager:
-    """Discovers and manages analyzer plugins."""
+    """Discovers and manages analyzer plugins.
+
+    Plugins registered by spec, and those published as entry points, are
+    only imported when first needed: entry point metadata is read on first
+    use, and find_applicable imports just the plugins that may apply to the
+    project at hand. Importing the API or a worker therefore costs nothing
+    per plugin.
+    """
 
     def __init__(self) -> None:
-        self._plugins: Dict[str, AnalyzerPlugin] = {}
-        self._load_entry_point_plugins()
+        # Registration order is kept; specs are replaced by their plugin once loaded.
+        self._entries: Dict[str, Union[AnalyzerPlugin, PluginSpec]] = {}
+        self._entry_points_read = False
+        self._lock = threading.RLock()
 
     @property
     def plugins(self) -> Sequence[AnalyzerPlugin]:
-        return tuple(self._plugins.values())
+        self._load_pending(lambda spec: True)
+        return self._loaded()
 
     def register(self, plugin: AnalyzerPlugin) -> None:
-        if plugin.name in self._plugins:
-            LOGGER.debug("Plugin %s already registered, skipping.", plugin.name)
+        with self._lock:
+            if any(entry.name == plugin.name for entry in self._loaded()) or plugin.name in self._entries:
+                LOGGER.debug("Plugin %s already registered, skipping.", plugin.name)
+                return
+            self._entries[plugin.name] = plugin
+
+    def register_lazy(self, spec: PluginSpec) -> None:
+        """Register a plugin by its spec; it is imported when a project may need it."""
+        with self._lock:
+            if spec.name in self._entries:
+                LOGGER.debug("Plugin %s already registered, skipping.", spec.name)
+                return
+            self._entries[spec.name] = spec
+
+    def _loaded(self) -> tuple[AnalyzerPlugin, ...]:
+        return tuple(entry for entry in self._entries.values() if not isinstance(entry, PluginSpec))
+
+    def _load_pending(self, wanted: Callable[[PluginSpec], bool]) -> None:
+        with self._lock:
+            self._read_entry_points()
+            for key, entry in list(self._entries.items()):
+                if isinstance(entry, PluginSpec) and wanted(entry):
+                    self._load_spec(key, entry)
+
+    def _load_spec(self, key: str, spec: PluginSpec) -> None:
+        plugin = None
+        try:
+            plugin = self._coerce_plugin(spec.load())
+            if plugin is None:
+                LOGGER.warning("Plugin %s is not a valid AnalyzerPlugin.", spec.name)
+        except Exception as exc:
+            LOGGER.exception("Failed loading plugin %s: %s", spec.name, exc)
+        if plugin is None or any(entry.name == plugin.name for entry in self._loaded()):
+            del self._entries[key]
             return
-        self._plugins[plugin.name] = plugin
+        # Assigning to the existing key keeps the plugin at its registration position.
+        self._entries[key] = plugin
 
-    def _load_entry_point_plugins(self) -> None:
+    def _read_entry_points(self) -> None:
+        if self._entry_points_read:
+            return
+        self._entry_points_read = True
         try:
             eps = entry_points().select(group=NEXUS_ANALYZER_GROUP)  # type: ignore[attr-defined]
         except Exception as exc:  # pragma: no cover - defensive
@@ -35,50 +161,46 @@ class PluginManager:
             return
 
         for ep in eps:
-            try:
-                plugin_candidate = ep.load()
-            except Exception as exc:
-                LOGGER.exception("Failed loading plugin %s: %s", ep.name, exc)
-                continue
-
-            plugin = self._coerce_plugin(plugin_candidate)
-            if plugin is None:
-                LOGGER.warning("Entry point %s is not a valid AnalyzerPlugin.", ep.name)
-                continue
-
-            self.register(plugin)
-
-    def _coerce_plugin(self, candidate) -> Optional[AnalyzerPlugin]:
-        if isinstance(candidate, AnalyzerPlugin):
-            return candidate
-
-        if isinstance(candidate, type) and issubclass(candidate, AnalyzerPlugin):
-            try:
-                return candidate()
-            except Exception as exc:
-                LOGGER.exception("Failed instantiating plugin %s: %s", candidate, exc)
-                return None
-
-        if callable(candidate):
-            try:
-                produced = candidate()
-            except Exception as exc:
-                LOGGER.exception("Callable plugin factory failed: %s", exc)
-                return None
-            return self._coerce_plugin(produced)
-
-        return None
+            self.register_lazy(PluginSpec(name=ep.name, target=ep.value))
+
+    def _coerce_plugin(self, candidate: object) -> Optional[AnalyzerPlugin]:
+        # A target names an analyzer instance, an analyzer class or a factory returning either.
+        if is_analyzer(candidate):
+            return candidate  # type: ignore[return-value]
+        if isinstance(candidate, PluginSpec) or not callable(candidate):
+            return None
+        if isinstance(candidate, type) and not all(callable(getattr(candidate, m, None)) for m in ANALYZER_METHODS):
+            return None
+        try:
+            produced = candidate()
+        except Exception as exc:
+            LOGGER.exception("Failed instantiating plugin %s: %s", candidate, exc)
+            return None
+        return produced if is_analyzer(produced) else None
 
     def find_applicable(self, project_path: str) -> List[AnalyzerPlugin]:
-        """Return all plugins that report support for path."""
+        """Return all plugins that report support for path.
+
+        Plugins decide from one memoized shallow scan of the root (see
+        AnalyzerPlugin.applies_to); only those that cannot are asked to
+        discover() the path themselves. Plugins not imported yet are only
+        imported when their spec says they may apply.
+        """
+        scan = root_scan(project_path)
+        self._load_pending(lambda spec: spec.may_apply(scan))
         applicable = []
-        for plugin in self._plugins.values():
+        for plugin in self._loaded():
             try:
-                if plugin.discover(project_path):
+                # Plugins built against the other import path of the core are duck-typed.
+                applies_to = getattr(plugin, "applies_to", None)
+                verdict = applies_to(scan) if applies_to is not None else None
+                if verdict is None:
+                    verdict = plugin.discover(project_path)
+                if verdict:
                     applicable.append(plugin)
             except Exception as exc:
                 LOGGER.exception("Plugin %s discover() failed: %s", plugin.name, exc)
         return applicable
 
     def get_plugin(self, name: str) -> Optional[AnalyzerPlugin]:
-        return self._plugins.get(name)
+        return next((plugin for plugin in self.plugins if plugin.name == name), None)
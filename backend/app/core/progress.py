@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Optional
+
+#: Receives progress snapshots:
+#: {"phase", "filesDiscovered", "filesTotal", "filesDone", "bytesRead", "fraction"}.
+ProgressCallback = Callable[[dict], None]
+
+DEFAULT_INTERVAL = 0.25
+
+
+class ProgressTracker:
+    """Count analysed files and forward snapshots to a callback, rate limited.
+
+    The orchestrator records the files its walk discovered; plugins announce
+    the files they are about to process with expect(), then call advance()
+    per file and add_bytes() for what they actually read. These calls are
+    cheap and may come from any thread; the callback runs at most once per
+    interval seconds (plus on phase changes and finish()), so publishing
+    progress never becomes the bottleneck of a large analysis.
+    """
+
+    def __init__(
+        self,
+        callback: Optional[ProgressCallback] = None,
+        *,
+        interval: float = DEFAULT_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.callback = callback
+        self.interval = interval
+        self.clock = clock
+        self.phase = "discovering"
+        self.files_discovered = 0
+        self.files_total = 0
+        self.files_done = 0
+        self.bytes_read = 0
+        self._lock = threading.Lock()
+        self._last_emit: Optional[float] = None
+
+    def __getstate__(self) -> dict:
+        # Process pool workers get a detached copy: counts, but no callback.
+        state = self.__dict__.copy()
+        state.update(callback=None, clock=time.monotonic, _lock=None, _last_emit=None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def start(self, phase: str, files_total: Optional[int] = None) -> None:
+        with self._lock:
+            self.phase = phase
+            if files_total is not None:
+                self.files_total = files_total
+        self.emit(force=True)
+
+    def discover(self, files: int) -> None:
+        with self._lock:
+            self.files_discovered += files
+        self.emit()
+
+    def expect(self, files: int) -> None:
+        with self._lock:
+            self.files_total += files
+        self.emit()
+
+    def advance(self, files: int = 1) -> None:
+        with self._lock:
+            self.files_done += files
+        self.emit()
+
+    def add_bytes(self, count: int) -> None:
+        with self._lock:
+            self.bytes_read += count
+        self.emit()
+
+    def finish(self) -> None:
+        with self._lock:
+            self.phase = "finished"
+            self.files_total = max(self.files_total, self.files_done)
+        self.emit(force=True)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            # Until a plugin announces its files, the walk's count stands in.
+            total = self.files_total or self.files_discovered
+            done = self.files_done
+            if self.phase == "finished":
+                fraction = 1.0
+            else:
+                fraction = min(1.0, done / total) if total else 0.0
+            return {
+                "phase": self.phase,
+                "filesDiscovered": self.files_discovered,
+                "filesTotal": total,
+                "filesDone": done,
+                "bytesRead": self.bytes_read,
+                "fraction": fraction,
+            }
+
+    def emit(self, *, force: bool = False) -> None:
+        if self.callback is None:
+            return
+        now = self.clock()
+        with self._lock:
+            if not force and self._last_emit is not None and now - self._last_emit < self.interval:
+                return
+            self._last_emit = now
+        self.callback(self.snapshot())
+
+
+__all__ = ["DEFAULT_INTERVAL", "ProgressCallback", "ProgressTracker"]
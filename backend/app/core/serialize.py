@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Collection, Dict, Iterable, Iterator, List, Optional
+
+from .stream import HEADER, SECTIONS, SUMMARY
+
+#: Section names as stored, in the order they appear in the JSON document.
+SECTION_ORDER = (HEADER, SUMMARY, *SECTIONS.values())
+#: Top-level UDM fields, as accepted by the fields projection.
+UDM_FIELDS = ("nexusVersion", "projectName", "languages", "analysisTimestamp", SUMMARY, *SECTIONS.values())
+
+#: Returns the data of one section as blocks of newline-separated JSON items, in order.
+SectionReader = Callable[[str], Iterable[str]]
+
+
+def dump_line(value: Any) -> str:
+    # Compact and newline free: JSON escapes newlines inside strings, so a
+    # block can hold one item per line.
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def _project_header(header: str, fields: Optional[Collection[str]]) -> str:
+    if fields is None:
+        return header
+    return dump_line({key: value for key, value in json.loads(header).items() if key in fields})
+
+
+def iter_udm_json(read_section: SectionReader, *, fields: Optional[Collection[str]] = None) -> Iterator[str]:
+    """Assemble stored sections into a single UDM JSON document, piece by piece.
+
+    fields, when given, limits the document to those top-level UDM fields;
+    sections left out are never read.
+    """
+    header = _project_header("".join(read_section(HEADER)) or "{}", fields)
+    separator = "" if header == "{}" else ","
+    yield header[:-1]
+    if fields is None or SUMMARY in fields:
+        summary = "".join(read_section(SUMMARY)) or "{}"
+        yield f'{separator}"summary":{summary}'
+        separator = ","
+    for section in SECTIONS.values():
+        if fields is not None and section not in fields:
+            continue
+        yield f'{separator}"{section}":['
+        separator = ","
+        first = True
+        for data in read_section(section):
+            yield ("" if first else ",") + data.replace("\n", ",")
+            first = False
+        yield "]"
+    yield "}"
+
+
+def iter_udm_ndjson(read_section: SectionReader, *, fields: Optional[Collection[str]] = None) -> Iterator[str]:
+    """Stream stored sections as newline-delimited {"kind": ..., "data": ...} records."""
+    kinds = {section: kind for kind, section in SECTIONS.items()}
+    for section in SECTION_ORDER:
+        if fields is not None and section not in (*fields, HEADER):
+            continue
+        prefix = f'{{"kind":"{kinds.get(section, section)}","data":'
+        for data in read_section(section):
+            if section == HEADER:
+                data = _project_header(data, fields)
+            yield "".join(f"{prefix}{line}}}\n" for line in data.split("\n"))
+
+
+def payload_sections(payload: dict) -> SectionReader:
+    """Expose an in-memory UDM dict (e.g. a legacy report) as a SectionReader."""
+    header = {key: value for key, value in payload.items() if key not in {*SECTIONS.values(), SUMMARY}}
+    blocks: Dict[str, List[str]] = {HEADER: [dump_line(header)], SUMMARY: [dump_line(payload.get(SUMMARY) or {})]}
+    for section in SECTIONS.values():
+        items = payload.get(section) or []
+        if items:
+            blocks[section] = ["\n".join(dump_line(item) for item in items)]
+    return lambda section: blocks.get(section, [])
+
+
+__all__ = [
+    "SECTION_ORDER",
+    "UDM_FIELDS",
+    "SectionReader",
+    "dump_line",
+    "iter_udm_json",
+    "iter_udm_ndjson",
+    "payload_sections",
+]
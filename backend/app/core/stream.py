@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+#: Record kinds emitted by AnalyzerPlugin.stream(). Units, dependencies and
+#: connections may be interleaved freely; a plugin's summary comes last.
+CODE_UNIT = "codeUnit"
+DEPENDENCY = "dependency"
+CONNECTION = "connection"
+LANGUAGES = "languages"
+SUMMARY = "summary"
+#: Extra top-level UDM fields (e.g. projectName) a plugin wants to override.
+META = "meta"
+#: Emitted once by the orchestrator with nexusVersion, projectName,
+#: languages and analysisTimestamp of the merged report.
+HEADER = "header"
+
+#: UDM list field each item kind belongs to.
+SECTIONS = {CODE_UNIT: "codeUnits", DEPENDENCY: "dependencies", CONNECTION: "connections"}
+
+UDMRecord = Tuple[str, Any]
+
+
+def payload_records(payload: dict) -> Iterator[UDMRecord]:
+    """Turn a UDM-style payload dict into a record stream."""
+    meta = {key: value for key, value in payload.items() if key not in {*SECTIONS.values(), LANGUAGES, SUMMARY}}
+    if meta:
+        yield META, meta
+    if payload.get(LANGUAGES):
+        yield LANGUAGES, payload[LANGUAGES]
+    for kind, section in SECTIONS.items():
+        for item in payload.get(section) or []:
+            yield kind, item
+    yield SUMMARY, payload.get(SUMMARY) or {}
+
+
+def collect_payload(records: Iterable[UDMRecord]) -> dict:
+    """Materialise a record stream back into a UDM-style payload dict."""
+    payload: Dict[str, Any] = {section: [] for section in SECTIONS.values()}
+    languages: List[str] = []
+    for kind, value in records:
+        section = SECTIONS.get(kind)
+        if section is not None:
+            payload[section].append(value)
+        elif kind == LANGUAGES:
+            languages.extend(language for language in value if language not in languages)
+        elif kind in (META, HEADER):
+            payload.update(value)
+        elif kind == SUMMARY:
+            payload[SUMMARY] = value
+    if languages and LANGUAGES not in payload:
+        payload[LANGUAGES] = languages
+    return payload
+
+
+__all__ = [
+    "CODE_UNIT",
+    "CONNECTION",
+    "DEPENDENCY",
+    "HEADER",
+    "LANGUAGES",
+    "META",
+    "SECTIONS",
+    "SUMMARY",
+    "UDMRecord",
+    "collect_payload",
+    "payload_records",
+]
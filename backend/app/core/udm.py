@@ -4,7 +4,7 @@ from datetime import datetime
 from enum import Enum
 from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_serializer
 
 
 class CodeUnitType(str, Enum):
@@ -61,6 +61,16 @@ class Summary(BaseModel):
     totalLinesOfCode: int = 0
     avgComplexity: float = 0.0
     dependencyCount: int = 0
+    #: Set when the analysis stopped early (see app.core.budget); the report is partial.
+    truncated: Optional[str] = None
+
+    @model_serializer(mode="wrap")
+    def _omit_untruncated(self, handler):
+        # Complete reports keep the summary shape they always had.
+        data = handler(self)
+        if data.get("truncated") is None:
+            data.pop("truncated", None)
+        return data
 
 
 class UnifiedDataModel(BaseModel):
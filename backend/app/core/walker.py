@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AbstractSet, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+VCS_DIRS = frozenset({".git", ".hg", ".svn"})
+
+
+def iter_files(
+    root: Path,
+    *,
+    skip_dirs: AbstractSet[str] = frozenset(),
+    extensions: Optional[AbstractSet[str]] = None,
+) -> Iterator[Tuple[str, str]]:
+    """Yield ``(relative_path, extension)`` for every file below root.
+
+    Directories named in skip_dirs are pruned before they are descended into,
+    so large vendored trees cost a single directory entry rather than a full
+    traversal. Symlinked directories are not followed. Entries are visited in
+    name order so results are deterministic across runs.
+    """
+    stack: List[Tuple[str, str]] = [(str(root), "")]
+    while stack:
+        directory, prefix = stack.pop()
+        try:
+            with os.scandir(directory) as iterator:
+                entries = sorted(iterator, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        subdirs: List[Tuple[str, str]] = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in skip_dirs:
+                        subdirs.append((entry.path, prefix + entry.name + os.sep))
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            extension = os.path.splitext(entry.name)[1].lower()
+            if extensions is None or extension in extensions:
+                yield prefix + entry.name, extension
+
+        stack.extend(reversed(subdirs))
+
+
+@dataclass(frozen=True)
+class FileIndex:
+    """Files discovered by a single walk of a project, bucketed by extension."""
+
+    root: Path
+    buckets: Mapping[str, Tuple[str, ...]] = field(default_factory=dict)
+    pruned: frozenset[str] = frozenset()
+
+    def __len__(self) -> int:
+        return sum(len(paths) for paths in self.buckets.values())
+
+    def select(self, extensions: Iterable[str], skip_dirs: AbstractSet[str] = frozenset()) -> List[str]:
+        """Return sorted relative paths with the given extensions.
+
+        The walk only prunes directories every consumer agreed to skip, so
+        callers pass their own skip set to drop anything the walk kept for
+        somebody else.
+        """
+        selected: List[str] = []
+        for extension in {ext.lower() for ext in extensions}:
+            selected.extend(self.buckets.get(extension, ()))
+        extra = set(skip_dirs) - self.pruned
+        if extra:
+            selected = [rel for rel in selected if extra.isdisjoint(rel.split(os.sep)[:-1])]
+        selected.sort()
+        return selected
+
+
+def scan_tree(
+    root: Path,
+    *,
+    skip_dirs: AbstractSet[str] = frozenset(),
+    extensions: Optional[AbstractSet[str]] = None,
+) -> FileIndex:
+    """Walk root once and return a FileIndex bucketed by lower-case extension."""
+    buckets: Dict[str, List[str]] = {}
+    for rel_path, extension in iter_files(root, skip_dirs=skip_dirs, extensions=extensions):
+        buckets.setdefault(extension, []).append(rel_path)
+    return FileIndex(
+        root=root,
+        buckets={extension: tuple(paths) for extension, paths in buckets.items()},
+        pruned=frozenset(skip_dirs),
+    )
+
+
+__all__ = ["FileIndex", "VCS_DIRS", "iter_files", "scan_tree"]
@@ -1,33 +1,235 @@
 from __future__ import annotations
 
+import functools
+import logging
 import os
-from contextlib import contextmanager
-from typing import Iterator
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, replace
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
 
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.pool import StaticPool
 from sqlmodel import Session, SQLModel, create_engine
+from starlette.concurrency import run_in_threadpool
+
+from .settings import env_number
+
+LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
 
 DEFAULT_DB_URL = "sqlite+pysqlite:///:memory:"
 DATABASE_URL = os.getenv("NEXUS_DATABASE_URL", DEFAULT_DB_URL)
 
-is_sqlite = DATABASE_URL.startswith("sqlite")
-uses_memory = is_sqlite and ":memory:" in DATABASE_URL
 
-if uses_memory:
-    connect_args = {"check_same_thread": False}
-    engine = create_engine(
-        DATABASE_URL,
-        echo=False,
-        connect_args=connect_args,
-        poolclass=StaticPool,
-    )
-else:
-    connect_args = {"check_same_thread": False} if is_sqlite else {}
-    engine = create_engine(DATABASE_URL, echo=False, connect_args=connect_args)
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+@dataclass(frozen=True)
+class DatabaseConfig:
+    """Engine settings shared by the API and the Celery workers.
+
+    The pool settings apply to server databases and file SQLite. For file
+    SQLite every new connection also gets the journal_mode, synchronous and
+    busy_timeout pragmas: WAL lets readers proceed while a worker writes, and
+    the busy timeout makes concurrent writers wait for the lock instead of
+    failing with "database is locked".
+    """
+
+    url: str = DEFAULT_DB_URL
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    sqlite_journal_mode: str = "wal"
+    sqlite_synchronous: str = "normal"
+    sqlite_busy_timeout_ms: int = 30000
+
+    @classmethod
+    def from_env(cls) -> "DatabaseConfig":
+        """Build the configuration from NEXUS_DATABASE_URL, NEXUS_DB_* and NEXUS_SQLITE_* settings."""
+        defaults = cls()
+        return cls(
+            url=DATABASE_URL,
+            pool_size=env_number("NEXUS_DB_POOL_SIZE", defaults.pool_size, int, minimum=1),
+            max_overflow=env_number("NEXUS_DB_MAX_OVERFLOW", defaults.max_overflow, int, minimum=0),
+            pool_timeout=env_number("NEXUS_DB_POOL_TIMEOUT", defaults.pool_timeout, float, minimum=0.0),
+            pool_recycle=env_number("NEXUS_DB_POOL_RECYCLE", defaults.pool_recycle, int),
+            pool_pre_ping=_env_flag("NEXUS_DB_POOL_PRE_PING", defaults.pool_pre_ping),
+            sqlite_journal_mode=os.getenv("NEXUS_SQLITE_JOURNAL_MODE", defaults.sqlite_journal_mode).lower(),
+            sqlite_synchronous=os.getenv("NEXUS_SQLITE_SYNCHRONOUS", defaults.sqlite_synchronous).lower(),
+            sqlite_busy_timeout_ms=env_number(
+                "NEXUS_SQLITE_BUSY_TIMEOUT_MS", defaults.sqlite_busy_timeout_ms, int, minimum=0
+            ),
+        )
+
+    @property
+    def is_sqlite(self) -> bool:
+        return make_url(self.url).get_backend_name() == "sqlite"
+
+    @property
+    def uses_memory(self) -> bool:
+        return self.is_sqlite and make_url(self.url).database in {None, "", ":memory:"}
+
+    def engine_options(self) -> Dict[str, Any]:
+        """Keyword arguments for create_engine / create_async_engine."""
+        if self.uses_memory:
+            # One shared connection holds the whole in-memory database.
+            return {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+        options: Dict[str, Any] = {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": self.pool_pre_ping,
+        }
+        if self.is_sqlite:
+            options["connect_args"] = {
+                "check_same_thread": False,
+                "timeout": self.sqlite_busy_timeout_ms / 1000,
+            }
+        return options
+
+    def sqlite_pragmas(self) -> Dict[str, str]:
+        if not self.is_sqlite or self.uses_memory:
+            return {}
+        return {
+            "journal_mode": self.sqlite_journal_mode,
+            "synchronous": self.sqlite_synchronous,
+            "busy_timeout": str(self.sqlite_busy_timeout_ms),
+        }
+
+
+def apply_sqlite_pragmas(sync_engine: Engine, pragmas: Dict[str, str]) -> None:
+    """Run the given PRAGMA statements on every new DBAPI connection of sync_engine."""
+    if not pragmas:
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_connection: Any, _record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def create_db_engine(config: DatabaseConfig) -> Engine:
+    db_engine = create_engine(config.url, echo=False, **config.engine_options())
+    apply_sqlite_pragmas(db_engine, config.sqlite_pragmas())
+    return db_engine
+
+
+DB_CONFIG = DatabaseConfig.from_env()
+engine = create_db_engine(DB_CONFIG)
+
+#: asyncio drivers used for the API's async session path, by database backend.
+#: SQLite is deliberately absent: aiosqlite runs every call on a helper thread
+#: anyway and benchmarks no faster than the sync driver in the threadpool
+#: (see benchmarks/status_load.py). Set NEXUS_ASYNC_DATABASE_URL to opt in.
+ASYNC_DRIVERS = {"postgresql": "asyncpg"}
+
+
+def async_database_url(url: str = DATABASE_URL) -> Optional[str]:
+    """The asyncio flavour of url, from NEXUS_ASYNC_DATABASE_URL or by swapping in the async driver.
+
+    None for backends without an async driver in ASYNC_DRIVERS.
+    """
+    explicit = os.getenv("NEXUS_ASYNC_DATABASE_URL")
+    if explicit:
+        return explicit
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return None
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def create_async_engine_from_env(config: DatabaseConfig = DB_CONFIG) -> Optional[Any]:
+    url = async_database_url()
+    if url is None:
+        return None
+    async_config = replace(config, url=url)
+    try:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        async_db_engine = create_async_engine(url, echo=False, **async_config.engine_options())
+    except ModuleNotFoundError as exc:
+        LOGGER.warning("Async database driver unavailable (%s); API queries run in the threadpool.", exc)
+        return None
+    apply_sqlite_pragmas(async_db_engine.sync_engine, async_config.sqlite_pragmas())
+    return async_db_engine
+
+
+async_engine = create_async_engine_from_env()
 
 
 def init_db() -> None:
+    from . import models  # noqa: F401  - register tables on SQLModel.metadata
+
+    from .repositories.udm import migrate_legacy_reports
+
     SQLModel.metadata.create_all(engine)
+    upgrade_schema()
+    migrate_legacy_reports()
+
+
+def upgrade_schema() -> None:
+    """Add columns and indexes introduced after a table was first created.
+
+    create_all only creates missing tables, so databases from older releases
+    get new (nullable) columns and indexes added in place.
+    """
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    unique_indexes = []
+    with engine.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(
+                    text(f"ALTER TABLE {preparer.quote(table.name)} ADD COLUMN {preparer.quote(column.name)} {column_type}")
+                )
+            for index in table.indexes:
+                if index.unique:
+                    unique_indexes.append(index)
+                else:
+                    index.create(connection, checkfirst=True)
+    # Rows written before a unique index existed may violate it; that must not stop the app starting.
+    for index in unique_indexes:
+        try:
+            with engine.begin() as connection:
+                index.create(connection, checkfirst=True)
+        except IntegrityError as exc:
+            LOGGER.warning("Could not create unique index %s on existing rows: %s", index.name, exc)
+
+
+def reset_engines_after_fork() -> None:
+    """Give a freshly forked process connection pools of its own.
+
+    Pooled connections inherited from the parent are dropped without being
+    closed, since closing them would also tear down the parent's sockets;
+    the child then opens new connections on first use. Called from Celery's
+    worker_process_init signal.
+    """
+    if DB_CONFIG.uses_memory:
+        return
+    engine.dispose(close=False)
+    if async_engine is not None:
+        async_engine.sync_engine.dispose(close=False)
 
 
 @contextmanager
@@ -36,4 +238,46 @@ def get_session() -> Iterator[Session]:
         yield session
 
 
-__all__ = ["engine", "init_db", "get_session"]
+@asynccontextmanager
+async def get_async_session() -> AsyncIterator[Any]:
+    if async_engine is None:
+        raise RuntimeError("No async database engine is configured")
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+def async_repository(sync_fn: Callable[..., T]) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Mark an async repository function as the non-blocking twin of sync_fn.
+
+    Without an async engine (in-memory SQLite, or the driver is not
+    installed) calls fall back to running sync_fn in the threadpool, so
+    callers can always await the async variant.
+    """
+
+    def decorate(async_fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(async_fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            if async_engine is None:
+                return await run_in_threadpool(sync_fn, *args, **kwargs)
+            return await async_fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+__all__ = [
+    "DB_CONFIG",
+    "DatabaseConfig",
+    "async_engine",
+    "async_repository",
+    "create_db_engine",
+    "engine",
+    "get_async_session",
+    "get_session",
+    "init_db",
+    "reset_engines_after_fork",
+    "upgrade_schema",
+]
@@ -6,6 +6,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
+from .api.batches import router as batches_router
 from .api.reports import router as reports_router
 from .api.routes import router as api_router
 from .api.users import router as users_router
@@ -24,6 +25,7 @@ app.add_middleware(
 app.include_router(api_router)
 app.include_router(users_router)
 app.include_router(reports_router)
+app.include_router(batches_router)
 
 
 def mount_frontend() -> None:
@@ -5,7 +5,7 @@ from enum import Enum
 from typing import Optional
 from uuid import UUID, uuid4
 
-from sqlalchemy import Column, JSON
+from sqlalchemy import Column, Index, JSON, LargeBinary, UniqueConstraint, and_
 from sqlmodel import Field, SQLModel
 
 
@@ -24,13 +24,132 @@ class User(SQLModel, table=True):
 
 
 class AnalysisReport(SQLModel, table=True):
+    __table_args__ = (
+        # Per-user limits and queue metrics count the jobs in flight.
+        Index("ix_analysisreport_user_status", "user_id", "status"),
+        Index("ix_analysisreport_queue_status", "queue", "status"),
+    )
+
     id: UUID = Field(default_factory=uuid4, primary_key=True, nullable=False)
     job_id: str = Field(index=True, unique=True, nullable=False)
-    project_path: str = Field(nullable=False)
+    project_path: str = Field(index=True, nullable=False)
     status: AnalysisStatus = Field(default=AnalysisStatus.PENDING, nullable=False)
     summary: Optional[str] = Field(default=None)
     udm: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+    base_job_id: Optional[str] = Field(default=None)
+    revision: Optional[str] = Field(default=None)
+    file_state: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+    # UDM header and summary; set once the report's rows have been written.
+    nexus_version: Optional[str] = Field(default=None)
+    project_name: Optional[str] = Field(default=None)
+    languages: Optional[list] = Field(default=None, sa_column=Column(JSON))
+    analyzed_at: Optional[datetime] = Field(default=None)
+    total_files: Optional[int] = Field(default=None)
+    total_loc: Optional[int] = Field(default=None)
+    avg_complexity: Optional[float] = Field(default=None)
+    dependency_count: Optional[int] = Field(default=None)
+    # sha256 of the serialised UDM JSON; set once its compressed renditions are stored.
+    etag: Optional[str] = Field(default=None)
+    # AnalysisOrchestrator.probe fingerprint of the project when the job was requested.
+    fingerprint: Optional[str] = Field(default=None, index=True)
+    # Why the analysis stopped before every file was read (see app.core.budget), if it did.
+    truncated: Optional[str] = Field(default=None)
+    cancel_requested_at: Optional[datetime] = Field(default=None)
+    # Where the job was routed (see app.scheduling) and when a worker picked it up.
+    queue: Optional[str] = Field(default=None)
+    started_at: Optional[datetime] = Field(default=None)
+    # The AnalysisBatch that scheduled the job, if any.
+    batch_id: Optional[str] = Field(default=None, index=True)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), nullable=False)
     completed_at: Optional[datetime] = Field(default=None)
     user_id: Optional[UUID] = Field(default=None, foreign_key="user.id")
 
+
+_reports = AnalysisReport.__table__  # type: ignore[attr-defined]
+_in_flight = and_(
+    _reports.c.status.in_([AnalysisStatus.PENDING, AnalysisStatus.RUNNING]),
+    _reports.c.fingerprint.isnot(None),
+    _reports.c.cancel_requested_at.is_(None),
+)
+# One pending or running job per project state, so identical requests racing through
+# different API processes end up sharing a job (see create_or_share_report).
+Index(
+    "uq_analysisreport_in_flight",
+    _reports.c.project_path,
+    _reports.c.fingerprint,
+    unique=True,
+    sqlite_where=_in_flight,
+    postgresql_where=_in_flight,
+)
+
+
+class AnalysisBatch(SQLModel, table=True):
+    """Analyses of many projects requested together; each one is an AnalysisReport with its batch_id."""
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True, nullable=False)
+    batch_id: str = Field(index=True, unique=True, nullable=False)
+    # The directory scanned for projects, when the batch was not given explicit paths.
+    root: Optional[str] = Field(default=None)
+    parallelism: int = Field(nullable=False)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), nullable=False)
+    # Set once every analysis of the batch has finished.
+    completed_at: Optional[datetime] = Field(default=None)
+    user_id: Optional[UUID] = Field(default=None, foreign_key="user.id")
+
+
+class CodeUnitRecord(SQLModel, table=True):
+    __tablename__ = "code_unit"
+    __table_args__ = (
+        Index("ix_code_unit_report_path", "report_id", "path"),
+        Index("ix_code_unit_report_loc", "report_id", "loc"),
+        Index("ix_code_unit_report_complexity", "report_id", "complexity"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    report_id: UUID = Field(foreign_key="analysisreport.id", nullable=False)
+    unit_id: str = Field(nullable=False)
+    type: str = Field(nullable=False)
+    path: str = Field(nullable=False)
+    loc: Optional[int] = Field(default=None)
+    complexity: Optional[float] = Field(default=None)
+    comment_lines: Optional[int] = Field(default=None)
+
+
+class DependencyRecord(SQLModel, table=True):
+    __tablename__ = "dependency"
+    __table_args__ = (Index("ix_dependency_report_name", "report_id", "name"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    report_id: UUID = Field(foreign_key="analysisreport.id", nullable=False)
+    dependency_id: str = Field(nullable=False)
+    name: str = Field(nullable=False)
+    version: Optional[str] = Field(default=None)
+    type: str = Field(nullable=False)
+    license: Optional[str] = Field(default=None)
+    vulnerabilities: Optional[list] = Field(default=None, sa_column=Column(JSON))
+
+
+class ConnectionRecord(SQLModel, table=True):
+    __tablename__ = "connection"
+    __table_args__ = (
+        Index("ix_connection_report_source", "report_id", "source_unit_id"),
+        Index("ix_connection_report_target", "report_id", "target_unit_id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    report_id: UUID = Field(foreign_key="analysisreport.id", nullable=False)
+    source_unit_id: str = Field(nullable=False)
+    target_unit_id: str = Field(nullable=False)
+    type: str = Field(nullable=False)
+
+
+class ReportRendition(SQLModel, table=True):
+    """The complete UDM JSON document of a finished report, compressed with one content coding."""
+
+    __tablename__ = "report_rendition"
+    __table_args__ = (UniqueConstraint("report_id", "encoding", name="uq_report_rendition_encoding"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    report_id: UUID = Field(foreign_key="analysisreport.id", nullable=False)
+    encoding: str = Field(nullable=False)
+    data: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
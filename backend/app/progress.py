@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional, Protocol, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = frozenset({"completed", "failed"})
+#: Seconds a subscriber waits for an event before it is handed None (a heartbeat).
+DEFAULT_HEARTBEAT = 15.0
+#: Seconds the last event of a job stays readable in Redis.
+LATEST_TTL = 24 * 3600
+#: Jobs whose last event the in-process broker remembers.
+LOCAL_HISTORY = 1024
+
+
+def progress_event(
+    job_id: str,
+    status: str,
+    progress: int,
+    message: Optional[str] = None,
+    *,
+    error: Optional[str] = None,
+    phase: Optional[str] = None,
+    files_done: Optional[int] = None,
+    files_total: Optional[int] = None,
+    files_discovered: Optional[int] = None,
+    bytes_read: Optional[int] = None,
+) -> dict:
+    """One progress update, shaped like the /api/status response."""
+    return {
+        "jobId": job_id,
+        "status": status,
+        "progress": progress,
+        "message": message,
+        "error": error,
+        "phase": phase,
+        "filesDone": files_done,
+        "filesTotal": files_total,
+        "filesDiscovered": files_discovered,
+        "bytesRead": bytes_read,
+    }
+
+
+class ProgressBroker(Protocol):
+    def publish(self, job_id: str, event: dict) -> None:
+        ...
+
+    async def latest(self, job_id: str) -> Optional[dict]:
+        ...
+
+    def subscribe(self, job_id: str, *, heartbeat: float = DEFAULT_HEARTBEAT) -> AsyncIterator[Optional[dict]]:
+        ...
+
+
+class LocalProgressBroker:
+    """In-process fan-out for inline analyses.
+
+    publish() may be called from any thread (inline jobs run in the
+    threadpool); events are handed to each subscriber's event loop with
+    call_soon_threadsafe. The last event per job is kept so late
+    subscribers and status polls start from the current state.
+    """
+
+    def __init__(self, *, history: int = LOCAL_HISTORY) -> None:
+        self.history = history
+        self._lock = threading.Lock()
+        self._latest: "OrderedDict[str, dict]" = OrderedDict()
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+    def publish(self, job_id: str, event: dict) -> None:
+        with self._lock:
+            self._latest[job_id] = event
+            self._latest.move_to_end(job_id)
+            while len(self._latest) > self.history:
+                self._latest.popitem(last=False)
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for loop, events in subscribers:
+            try:
+                loop.call_soon_threadsafe(events.put_nowait, event)
+            except RuntimeError:  # the subscriber's loop has closed
+                continue
+
+    def latest_event(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._latest.get(job_id)
+
+    async def latest(self, job_id: str) -> Optional[dict]:
+        return self.latest_event(job_id)
+
+    async def subscribe(self, job_id: str, *, heartbeat: float = DEFAULT_HEARTBEAT) -> AsyncIterator[Optional[dict]]:
+        """Yield the job's events as they are published, None after heartbeat idle seconds."""
+        entry = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append(entry)
+            current = self._latest.get(job_id)
+        try:
+            if current is not None:
+                yield current
+            while True:
+                try:
+                    yield await asyncio.wait_for(entry[1].get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                remaining = [item for item in self._subscribers.get(job_id, []) if item is not entry]
+                if remaining:
+                    self._subscribers[job_id] = remaining
+                else:
+                    self._subscribers.pop(job_id, None)
+
+
+class RedisProgressBroker:
+    """Progress over Redis pub/sub, for analyses running on Celery workers.
+
+    Workers PUBLISH each event on a per-job channel and keep the last one
+    under a key; the API subscribes to the channel. Publishing is best
+    effort: a Redis hiccup is logged and never fails the analysis.
+    """
+
+    def __init__(self, url: str, *, prefix: str = "nexus:progress") -> None:
+        self.url = url
+        self.prefix = prefix
+        self._client = None
+
+    def channel(self, job_id: str) -> str:
+        return f"{self.prefix}:{job_id}"
+
+    def latest_key(self, job_id: str) -> str:
+        return f"{self.prefix}:latest:{job_id}"
+
+    def publish(self, job_id: str, event: dict) -> None:
+        import redis
+
+        try:
+            if self._client is None:
+                self._client = redis.Redis.from_url(self.url)
+            data = json.dumps(event)
+            pipeline = self._client.pipeline()
+            pipeline.set(self.latest_key(job_id), data, ex=LATEST_TTL)
+            pipeline.publish(self.channel(job_id), data)
+            pipeline.execute()
+        except redis.RedisError as exc:
+            LOGGER.warning("Could not publish progress for %s: %s", job_id, exc)
+
+    async def latest(self, job_id: str) -> Optional[dict]:
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.url)
+        try:
+            data = await client.get(self.latest_key(job_id))
+        finally:
+            await client.aclose()
+        return json.loads(data) if data else None
+
+    async def subscribe(self, job_id: str, *, heartbeat: float = DEFAULT_HEARTBEAT) -> AsyncIterator[Optional[dict]]:
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        try:
+            # Subscribe before reading the last event so nothing falls in between.
+            await pubsub.subscribe(self.channel(job_id))
+            current = await client.get(self.latest_key(job_id))
+            if current:
+                yield json.loads(current)
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=heartbeat)
+                yield json.loads(message["data"]) if message else None
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+local_broker = LocalProgressBroker()
+
+
+@lru_cache(maxsize=1)
+def redis_broker() -> RedisProgressBroker:
+    from .celery_app import BROKER_URL
+
+    return RedisProgressBroker(BROKER_URL)
+
+
+__all__ = [
+    "DEFAULT_HEARTBEAT",
+    "LocalProgressBroker",
+    "ProgressBroker",
+    "RedisProgressBroker",
+    "TERMINAL_STATUSES",
+    "local_broker",
+    "progress_event",
+    "redis_broker",
+]
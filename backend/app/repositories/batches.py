@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from sqlmodel import select
+
+from ..db import async_repository, get_async_session, get_session
+from ..models import AnalysisBatch, AnalysisReport, AnalysisStatus
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    """One project of a batch, as it is scheduled."""
+
+    job_id: str
+    project_path: str
+    base_job_id: Optional[str] = None
+    queue: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class BatchState:
+    batch: AnalysisBatch
+    # Rows of _batch_jobs_statement: the report columns a status listing needs.
+    jobs: List[Any]
+
+    def counts(self) -> Dict[AnalysisStatus, int]:
+        counts = {status: 0 for status in AnalysisStatus}
+        for job in self.jobs:
+            counts[job.status] += 1
+        return counts
+
+    @property
+    def status(self) -> str:
+        """pending until a job starts, running while any is in flight, then completed, failed or partial."""
+        counts = self.counts()
+        if counts[AnalysisStatus.PENDING] == len(self.jobs):
+            return "pending"
+        if counts[AnalysisStatus.PENDING] or counts[AnalysisStatus.RUNNING]:
+            return "running"
+        if not counts[AnalysisStatus.FAILED]:
+            return "completed"
+        return "failed" if counts[AnalysisStatus.FAILED] == len(self.jobs) else "partial"
+
+
+def _batch_rows(
+    batch_id: str,
+    jobs: Sequence[BatchJob],
+    *,
+    user_id: Optional[UUID],
+    root: Optional[str],
+    parallelism: int,
+) -> List[object]:
+    batch = AnalysisBatch(batch_id=batch_id, root=root, parallelism=parallelism, user_id=user_id)
+    reports = [
+        AnalysisReport(
+            job_id=job.job_id,
+            project_path=job.project_path,
+            user_id=user_id,
+            base_job_id=job.base_job_id,
+            queue=job.queue,
+            batch_id=batch_id,
+        )
+        for job in jobs
+    ]
+    return [batch, *reports]
+
+
+def create_batch(
+    batch_id: str,
+    jobs: Sequence[BatchJob],
+    *,
+    user_id: Optional[UUID] = None,
+    root: Optional[str] = None,
+    parallelism: int,
+) -> None:
+    """Register a batch and the report rows of all its jobs in a single transaction."""
+    with get_session() as session:
+        session.add_all(_batch_rows(batch_id, jobs, user_id=user_id, root=root, parallelism=parallelism))
+        session.commit()
+
+
+def complete_batch(batch_id: str) -> None:
+    with get_session() as session:
+        batch = session.exec(select(AnalysisBatch).where(AnalysisBatch.batch_id == batch_id)).one_or_none()
+        if batch is None or batch.completed_at is not None:
+            return
+        batch.completed_at = datetime.now(timezone.utc)
+        session.add(batch)
+        session.commit()
+
+
+def get_batch_state(batch_id: str) -> Optional[BatchState]:
+    """Load a batch with the status columns of its jobs (never their UDM or file state)."""
+    with get_session() as session:
+        batch = session.exec(select(AnalysisBatch).where(AnalysisBatch.batch_id == batch_id)).one_or_none()
+        if batch is None:
+            return None
+        return BatchState(batch, list(session.exec(_batch_jobs_statement(batch_id))))
+
+
+def _batch_jobs_statement(batch_id: str):
+    return (
+        select(
+            AnalysisReport.job_id,
+            AnalysisReport.project_path,
+            AnalysisReport.status,
+            AnalysisReport.summary,
+            AnalysisReport.created_at,
+            AnalysisReport.completed_at,
+            AnalysisReport.base_job_id,
+            AnalysisReport.revision,
+        )
+        .where(AnalysisReport.batch_id == batch_id)
+        .order_by(AnalysisReport.project_path)
+    )
+
+
+@async_repository(create_batch)
+async def create_batch_async(
+    batch_id: str,
+    jobs: Sequence[BatchJob],
+    *,
+    user_id: Optional[UUID] = None,
+    root: Optional[str] = None,
+    parallelism: int,
+) -> None:
+    async with get_async_session() as session:
+        session.add_all(_batch_rows(batch_id, jobs, user_id=user_id, root=root, parallelism=parallelism))
+        await session.commit()
+
+
+@async_repository(get_batch_state)
+async def get_batch_state_async(batch_id: str) -> Optional[BatchState]:
+    async with get_async_session() as session:
+        statement = select(AnalysisBatch).where(AnalysisBatch.batch_id == batch_id)
+        batch = (await session.exec(statement)).one_or_none()
+        if batch is None:
+            return None
+        return BatchState(batch, list(await session.exec(_batch_jobs_statement(batch_id))))
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import os
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import delete
+from sqlmodel import select
+
+from ..core.compression import compress_document
+from ..core.serialize import iter_udm_json
+from ..db import async_repository, get_async_session, get_session
+from ..models import AnalysisReport, ReportRendition
+from .udm import get_report_sections
+
+
+def configured_encodings() -> Optional[List[str]]:
+    """Content codings to precompute, from NEXUS_REPORT_ENCODINGS (all available when unset)."""
+    raw = os.getenv("NEXUS_REPORT_ENCODINGS", "").strip()
+    if not raw:
+        return None
+    return [name.strip().lower() for name in raw.split(",") if name.strip()]
+
+
+def save_report_renditions(job_id: str) -> Optional[str]:
+    """Serialise a report's UDM once and store it compressed with each available coding.
+
+    The report's etag is set to the digest of the uncompressed document in the
+    same transaction, so a report with an etag always has its renditions.
+    Returns the etag, or None when the report has no stored UDM.
+    """
+    with get_session() as session:
+        report = session.exec(select(AnalysisReport).where(AnalysisReport.job_id == job_id)).one_or_none()
+        if report is None:
+            raise LookupError(f"Unknown report {job_id}")
+        sections = get_report_sections(report)
+        if sections is None:
+            return None
+        etag, bodies = compress_document(iter_udm_json(sections), configured_encodings())
+        session.execute(delete(ReportRendition).where(ReportRendition.report_id == report.id))
+        for encoding, data in bodies.items():
+            session.add(ReportRendition(report_id=report.id, encoding=encoding, data=data))
+        report.etag = etag
+        session.add(report)
+        session.commit()
+        return etag
+
+
+def report_encodings(report_id: UUID) -> List[str]:
+    with get_session() as session:
+        statement = select(ReportRendition.encoding).where(ReportRendition.report_id == report_id)
+        return list(session.exec(statement))
+
+
+def get_report_rendition(report_id: UUID, encoding: str) -> Optional[bytes]:
+    with get_session() as session:
+        statement = (
+            select(ReportRendition.data)
+            .where(ReportRendition.report_id == report_id)
+            .where(ReportRendition.encoding == encoding)
+        )
+        return session.exec(statement).first()
+
+
+@async_repository(report_encodings)
+async def report_encodings_async(report_id: UUID) -> List[str]:
+    async with get_async_session() as session:
+        statement = select(ReportRendition.encoding).where(ReportRendition.report_id == report_id)
+        return list(await session.exec(statement))
+
+
+@async_repository(get_report_rendition)
+async def get_report_rendition_async(report_id: UUID, encoding: str) -> Optional[bytes]:
+    async with get_async_session() as session:
+        statement = (
+            select(ReportRendition.data)
+            .where(ReportRendition.report_id == report_id)
+            .where(ReportRendition.encoding == encoding)
+        )
+        return (await session.exec(statement)).first()
+
+
+__all__ = [
+    "configured_encodings",
+    "get_report_rendition",
+    "get_report_rendition_async",
+    "report_encodings",
+    "report_encodings_async",
+    "save_report_renditions",
+]
@@ -1,18 +1,38 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from uuid import UUID
 
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 
-from ..db import get_session
+from ..db import async_repository, get_async_session, get_session
 from ..models import AnalysisReport, AnalysisStatus
 
+CANCELLED_SUMMARY = "Analysis cancelled"
+IN_FLIGHT = (AnalysisStatus.PENDING, AnalysisStatus.RUNNING)
 
-def create_report(job_id: str, project_path: str, user_id: Optional[UUID]) -> AnalysisReport:
+
+def create_report(
+    job_id: str,
+    project_path: str,
+    user_id: Optional[UUID],
+    *,
+    base_job_id: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+    queue: Optional[str] = None,
+) -> AnalysisReport:
     with get_session() as session:
-        report = AnalysisReport(job_id=job_id, project_path=project_path, user_id=user_id)
+        report = AnalysisReport(
+            job_id=job_id,
+            project_path=project_path,
+            user_id=user_id,
+            base_job_id=base_job_id,
+            fingerprint=fingerprint,
+            queue=queue,
+        )
         session.add(report)
         session.commit()
         session.refresh(report)
@@ -24,7 +44,8 @@ def update_report_status(
     status: AnalysisStatus,
     *,
     summary: Optional[str] = None,
-    udm: Optional[dict] = None,
+    file_state: Optional[dict] = None,
+    revision: Optional[str] = None,
 ) -> None:
     with get_session() as session:
         statement = select(AnalysisReport).where(AnalysisReport.job_id == job_id)
@@ -34,10 +55,13 @@ def update_report_status(
         report.status = status
         if summary is not None:
             report.summary = summary
-        if udm is not None:
-            report.udm = udm
-            report.completed_at = datetime.now(timezone.utc)
-        elif status in {AnalysisStatus.FAILED}:
+        if file_state is not None:
+            report.file_state = file_state
+        if revision is not None:
+            report.revision = revision
+        if status == AnalysisStatus.RUNNING and report.started_at is None:
+            report.started_at = datetime.now(timezone.utc)
+        if status in {AnalysisStatus.COMPLETED, AnalysisStatus.FAILED}:
             report.completed_at = datetime.now(timezone.utc)
         session.add(report)
         session.commit()
@@ -57,3 +81,357 @@ def get_report(job_id: str) -> Optional[AnalysisReport]:
     with get_session() as session:
         statement = select(AnalysisReport).where(AnalysisReport.job_id == job_id)
         return session.exec(statement).one_or_none()
+
+
+def find_latest_completed_job_id(project_path: str) -> Optional[str]:
+    """Return the job id of the newest completed report for project_path."""
+    with get_session() as session:
+        statement = (
+            select(AnalysisReport.job_id)
+            .where(AnalysisReport.project_path == project_path)
+            .where(AnalysisReport.status == AnalysisStatus.COMPLETED)
+            .order_by(AnalysisReport.created_at.desc())
+            .limit(1)
+        )
+        return session.exec(statement).first()
+
+
+def find_latest_completed_job_ids(project_paths: Iterable[str]) -> Dict[str, str]:
+    """find_latest_completed_job_id for many projects in one query; paths without a report are left out."""
+    with get_session() as session:
+        return _latest_by_path(session.exec(_latest_completed_statement(project_paths)))
+
+
+def _latest_completed_statement(project_paths: Iterable[str]):
+    return (
+        select(AnalysisReport.project_path, AnalysisReport.job_id)
+        .where(AnalysisReport.project_path.in_(list(project_paths)))
+        .where(AnalysisReport.status == AnalysisStatus.COMPLETED)
+        .order_by(AnalysisReport.created_at.desc())
+    )
+
+
+def _latest_by_path(rows: Iterable[tuple]) -> Dict[str, str]:
+    latest: Dict[str, str] = {}
+    for project_path, job_id in rows:
+        latest.setdefault(project_path, job_id)
+    return latest
+
+
+def create_or_share_report(
+    job_id: str,
+    project_path: str,
+    user_id: Optional[UUID],
+    *,
+    base_job_id: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+    queue: Optional[str] = None,
+) -> Tuple[str, bool]:
+    """Create the report of a new job unless an identical one is pending or running.
+
+    Returns the job id to hand out and whether it is another request's job.
+    The unique in-flight index on (project_path, fingerprint) makes this
+    hold across API processes: of two racing inserts one fails, and its
+    request gets the job that won.
+    """
+    report_args = dict(base_job_id=base_job_id, fingerprint=fingerprint, queue=queue)
+    try:
+        return create_report(job_id, project_path, user_id, **report_args).job_id, False
+    except IntegrityError:
+        shared = find_shared_job_id(project_path, fingerprint) if fingerprint else None
+        if shared is not None:
+            return shared, True
+    # The job in the way finished in between, so nothing blocks the insert any more.
+    return create_report(job_id, project_path, user_id, **report_args).job_id, False
+
+
+def find_shared_job_id(
+    project_path: str, fingerprint: str, completed_since: Optional[datetime] = None
+) -> Optional[str]:
+    """Return a job a new request for the same project state can use instead of starting one.
+
+    That is a pending or running job with the same fingerprint, or a
+    complete (not truncated) report with it that finished after
+    completed_since, if given. Jobs being cancelled are never shared.
+    """
+    with get_session() as session:
+        return session.exec(_shared_job_statement(project_path, fingerprint, completed_since)).first()
+
+
+def _shared_job_statement(project_path: str, fingerprint: str, completed_since: Optional[datetime]):
+    shareable = AnalysisReport.status.in_(IN_FLIGHT)
+    if completed_since is not None:
+        fresh = and_(
+            AnalysisReport.status == AnalysisStatus.COMPLETED,
+            AnalysisReport.completed_at >= completed_since,
+            AnalysisReport.truncated.is_(None),
+        )
+        shareable = or_(shareable, fresh)
+    return (
+        select(AnalysisReport.job_id)
+        .where(AnalysisReport.project_path == project_path)
+        .where(AnalysisReport.fingerprint == fingerprint)
+        .where(AnalysisReport.cancel_requested_at.is_(None))
+        .where(shareable)
+        .order_by(AnalysisReport.created_at.desc())
+        .limit(1)
+    )
+
+
+def count_active_jobs(user_id: UUID) -> int:
+    """Count the user's pending and running analyses, leaving out those of batches."""
+    with get_session() as session:
+        return session.exec(_active_jobs_statement(user_id)).one()
+
+
+def _active_jobs_statement(user_id: UUID):
+    return (
+        select(func.count())
+        .select_from(AnalysisReport)
+        .where(AnalysisReport.user_id == user_id)
+        .where(AnalysisReport.status.in_(IN_FLIGHT))
+        .where(AnalysisReport.batch_id.is_(None))
+    )
+
+
+def queue_stats(started_since: datetime) -> List[dict]:
+    """Per-queue depth (pending jobs), running jobs and wait times.
+
+    Wait is the time between a job being requested and a worker starting
+    it: oldestWaitSeconds for the longest-waiting pending job now, and the
+    mean and maximum over jobs that started since started_since.
+    """
+    with get_session() as session:
+        in_flight = session.exec(_in_flight_statement()).all()
+        started = session.exec(_started_statement(started_since)).all()
+    return _queue_stats(in_flight, started)
+
+
+def _in_flight_statement():
+    return (
+        select(AnalysisReport.queue, AnalysisReport.status, func.count(), func.min(AnalysisReport.created_at))
+        .where(AnalysisReport.status.in_(IN_FLIGHT))
+        .where(AnalysisReport.queue.is_not(None))
+        .group_by(AnalysisReport.queue, AnalysisReport.status)
+    )
+
+
+def _started_statement(started_since: datetime):
+    return (
+        select(AnalysisReport.queue, AnalysisReport.created_at, AnalysisReport.started_at)
+        .where(AnalysisReport.started_at >= started_since)
+        .where(AnalysisReport.queue.is_not(None))
+    )
+
+
+def _utc(moment: datetime) -> datetime:
+    # SQLite hands datetimes back without their timezone; they are stored as UTC.
+    return moment if moment.tzinfo is not None else moment.replace(tzinfo=timezone.utc)
+
+
+def _queue_stats(in_flight: Iterable[tuple], started: Iterable[tuple]) -> List[dict]:
+    now = datetime.now(timezone.utc)
+    stats: Dict[str, dict] = {}
+
+    def entry(queue: str) -> dict:
+        return stats.setdefault(
+            queue,
+            {"name": queue, "depth": 0, "running": 0, "oldestWaitSeconds": 0.0, "waits": []},
+        )
+
+    for queue, status, count, oldest in in_flight:
+        if status == AnalysisStatus.PENDING:
+            entry(queue)["depth"] = count
+            entry(queue)["oldestWaitSeconds"] = max(0.0, (now - _utc(oldest)).total_seconds())
+        else:
+            entry(queue)["running"] = count
+    for queue, created_at, started_at in started:
+        entry(queue)["waits"].append(max(0.0, (_utc(started_at) - _utc(created_at)).total_seconds()))
+
+    for item in stats.values():
+        waits = item.pop("waits")
+        item["started"] = len(waits)
+        item["avgWaitSeconds"] = sum(waits) / len(waits) if waits else 0.0
+        item["maxWaitSeconds"] = max(waits, default=0.0)
+    return sorted(stats.values(), key=lambda item: item["name"])
+
+
+def get_report_file_state(job_id: str) -> Optional[dict]:
+    """Load only the per-file state of a report, leaving the UDM blob untouched."""
+    with get_session() as session:
+        statement = select(AnalysisReport.file_state).where(AnalysisReport.job_id == job_id)
+        return session.exec(statement).first()
+
+
+def request_cancellation(job_id: str) -> Optional[AnalysisStatus]:
+    """Flag a report's analysis for cancellation and return the status it had.
+
+    Finished reports are left untouched. A pending job is failed straight
+    away so clients see the outcome at once; the worker skips it when it
+    gets to it. A running job notices the flag between files.
+    """
+    with get_session() as session:
+        statement = select(AnalysisReport).where(AnalysisReport.job_id == job_id)
+        report = session.exec(statement).one_or_none()
+        if report is None:
+            return None
+        previous = report.status
+        _flag_cancellation(report)
+        session.add(report)
+        session.commit()
+        return previous
+
+
+def cancellation_requested(job_id: str) -> bool:
+    with get_session() as session:
+        statement = select(AnalysisReport.cancel_requested_at).where(AnalysisReport.job_id == job_id)
+        return session.exec(statement).first() is not None
+
+
+def _flag_cancellation(report: AnalysisReport) -> None:
+    if report.status in {AnalysisStatus.COMPLETED, AnalysisStatus.FAILED}:
+        return
+    now = datetime.now(timezone.utc)
+    report.cancel_requested_at = report.cancel_requested_at or now
+    if report.status == AnalysisStatus.PENDING:
+        report.status = AnalysisStatus.FAILED
+        report.summary = CANCELLED_SUMMARY
+        report.completed_at = now
+
+
+def get_report_status(job_id: str) -> Optional[Tuple[AnalysisStatus, Optional[str]]]:
+    """Load just (status, summary) of a report, for cheap status polling."""
+    with get_session() as session:
+        statement = select(AnalysisReport.status, AnalysisReport.summary).where(AnalysisReport.job_id == job_id)
+        row = session.exec(statement).first()
+        return (row[0], row[1]) if row else None
+
+
+# Async twins used by the API so request handlers do not hold a threadpool
+# worker while waiting on the database.
+
+
+@async_repository(create_report)
+async def create_report_async(
+    job_id: str,
+    project_path: str,
+    user_id: Optional[UUID],
+    *,
+    base_job_id: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+    queue: Optional[str] = None,
+) -> AnalysisReport:
+    async with get_async_session() as session:
+        report = AnalysisReport(
+            job_id=job_id,
+            project_path=project_path,
+            user_id=user_id,
+            base_job_id=base_job_id,
+            fingerprint=fingerprint,
+            queue=queue,
+        )
+        session.add(report)
+        await session.commit()
+        await session.refresh(report)
+        return report
+
+
+@async_repository(list_reports_for_user)
+async def list_reports_for_user_async(user_id: UUID) -> List[AnalysisReport]:
+    async with get_async_session() as session:
+        statement = (
+            select(AnalysisReport)
+            .where(AnalysisReport.user_id == user_id)
+            .order_by(AnalysisReport.created_at.desc())
+        )
+        return list(await session.exec(statement))
+
+
+@async_repository(get_report)
+async def get_report_async(job_id: str) -> Optional[AnalysisReport]:
+    async with get_async_session() as session:
+        statement = select(AnalysisReport).where(AnalysisReport.job_id == job_id)
+        return (await session.exec(statement)).one_or_none()
+
+
+@async_repository(get_report_status)
+async def get_report_status_async(job_id: str) -> Optional[Tuple[AnalysisStatus, Optional[str]]]:
+    async with get_async_session() as session:
+        statement = select(AnalysisReport.status, AnalysisReport.summary).where(AnalysisReport.job_id == job_id)
+        row = (await session.exec(statement)).first()
+        return (row[0], row[1]) if row else None
+
+
+@async_repository(request_cancellation)
+async def request_cancellation_async(job_id: str) -> Optional[AnalysisStatus]:
+    async with get_async_session() as session:
+        statement = select(AnalysisReport).where(AnalysisReport.job_id == job_id)
+        report = (await session.exec(statement)).one_or_none()
+        if report is None:
+            return None
+        previous = report.status
+        _flag_cancellation(report)
+        session.add(report)
+        await session.commit()
+        return previous
+
+
+@async_repository(create_or_share_report)
+async def create_or_share_report_async(
+    job_id: str,
+    project_path: str,
+    user_id: Optional[UUID],
+    *,
+    base_job_id: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+    queue: Optional[str] = None,
+) -> Tuple[str, bool]:
+    report_args = dict(base_job_id=base_job_id, fingerprint=fingerprint, queue=queue)
+    try:
+        return (await create_report_async(job_id, project_path, user_id, **report_args)).job_id, False
+    except IntegrityError:
+        shared = await find_shared_job_id_async(project_path, fingerprint) if fingerprint else None
+        if shared is not None:
+            return shared, True
+    return (await create_report_async(job_id, project_path, user_id, **report_args)).job_id, False
+
+
+@async_repository(find_shared_job_id)
+async def find_shared_job_id_async(
+    project_path: str, fingerprint: str, completed_since: Optional[datetime] = None
+) -> Optional[str]:
+    async with get_async_session() as session:
+        return (await session.exec(_shared_job_statement(project_path, fingerprint, completed_since))).first()
+
+
+@async_repository(count_active_jobs)
+async def count_active_jobs_async(user_id: UUID) -> int:
+    async with get_async_session() as session:
+        return (await session.exec(_active_jobs_statement(user_id))).one()
+
+
+@async_repository(queue_stats)
+async def queue_stats_async(started_since: datetime) -> List[dict]:
+    async with get_async_session() as session:
+        in_flight = (await session.exec(_in_flight_statement())).all()
+        started = (await session.exec(_started_statement(started_since))).all()
+    return _queue_stats(in_flight, started)
+
+
+@async_repository(find_latest_completed_job_ids)
+async def find_latest_completed_job_ids_async(project_paths: Iterable[str]) -> Dict[str, str]:
+    async with get_async_session() as session:
+        return _latest_by_path(await session.exec(_latest_completed_statement(project_paths)))
+
+
+@async_repository(find_latest_completed_job_id)
+async def find_latest_completed_job_id_async(project_path: str) -> Optional[str]:
+    async with get_async_session() as session:
+        statement = (
+            select(AnalysisReport.job_id)
+            .where(AnalysisReport.project_path == project_path)
+            .where(AnalysisReport.status == AnalysisStatus.COMPLETED)
+            .order_by(AnalysisReport.created_at.desc())
+            .limit(1)
+        )
+        return (await session.exec(statement)).first()
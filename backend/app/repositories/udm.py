@@ -0,0 +1,486 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+from uuid import UUID
+
+from pydantic import TypeAdapter
+from sqlalchemy import String, and_, cast, delete, func, insert, or_
+from sqlmodel import Session, SQLModel, select
+
+from ..core.serialize import SectionReader, dump_line, payload_sections
+from ..core.stream import CODE_UNIT, CONNECTION, DEPENDENCY, HEADER, SECTIONS, SUMMARY, UDMRecord
+from ..db import get_session
+from ..models import AnalysisReport, CodeUnitRecord, ConnectionRecord, DependencyRecord, ReportRendition
+
+LOGGER = logging.getLogger(__name__)
+
+INSERT_BATCH = 1000
+READ_BATCH = 1000
+
+_TIMESTAMP = TypeAdapter(datetime)
+
+UNIT_SORTS = ("report", "path", "loc", "complexity")
+UNIT_METRICS = ("loc", "complexity", "commentLines")
+# Upper bound for prefix range scans, which (unlike LIKE) can use the path index.
+_MAX_CHAR = "\U0010ffff"
+
+
+@dataclass(frozen=True)
+class UnitQuery:
+    """Filters, ordering and metric projection applied to a report's code units.
+
+    sort is "report" (analysis order), "path", or "loc"/"complexity" for the
+    largest first. metrics limits which metrics are returned; limit keeps
+    only the first units in sort order (top-N).
+    """
+
+    path_prefix: Optional[str] = None
+    min_complexity: Optional[float] = None
+    unit_type: Optional[str] = None
+    sort: str = "report"
+    metrics: Optional[Tuple[str, ...]] = None
+    limit: Optional[int] = None
+
+    def project(self, unit: dict) -> dict:
+        if self.metrics is None:
+            return unit
+        metrics = unit.get("metrics") or {}
+        return {**unit, "metrics": {name: metrics.get(name) for name in self.metrics}}
+
+    def apply(self, units: Iterable[dict]) -> List[dict]:
+        """Evaluate the query in memory, for reports not stored in the tables."""
+
+        def keep(unit: dict) -> bool:
+            metrics = unit.get("metrics") or {}
+            if self.path_prefix and not unit["path"].startswith(self.path_prefix):
+                return False
+            if self.min_complexity is not None and (metrics.get("complexity") or 0) < self.min_complexity:
+                return False
+            return self.unit_type is None or unit["type"] == self.unit_type
+
+        selected = [unit for unit in units if keep(unit)]
+        if self.sort == "path":
+            selected.sort(key=lambda unit: unit["path"])
+        elif self.sort in ("loc", "complexity"):
+            selected.sort(key=lambda unit: -((unit.get("metrics") or {}).get(self.sort) or 0))
+        if self.limit is not None:
+            selected = selected[: self.limit]
+        return [self.project(unit) for unit in selected]
+
+
+class InvalidCursor(ValueError):
+    """Raised when a page cursor cannot be decoded or belongs to another ordering."""
+
+
+def _code_unit_row(report_id: UUID, unit: dict) -> dict:
+    metrics = unit.get("metrics") or {}
+    return {
+        "report_id": report_id,
+        "unit_id": unit["id"],
+        "type": unit["type"],
+        "path": unit["path"],
+        "loc": metrics.get("loc"),
+        "complexity": metrics.get("complexity"),
+        "comment_lines": metrics.get("commentLines"),
+    }
+
+
+def _dependency_row(report_id: UUID, dependency: dict) -> dict:
+    return {
+        "report_id": report_id,
+        "dependency_id": dependency["id"],
+        "name": dependency["name"],
+        "version": dependency.get("version"),
+        "type": dependency.get("type") or "DIRECT",
+        "license": dependency.get("license"),
+        "vulnerabilities": dependency.get("vulnerabilities") or [],
+    }
+
+
+def _connection_row(report_id: UUID, connection: dict) -> dict:
+    return {
+        "report_id": report_id,
+        "source_unit_id": connection["sourceUnitId"],
+        "target_unit_id": connection["targetUnitId"],
+        "type": connection["type"],
+    }
+
+
+def _code_unit_item(row: Any) -> dict:
+    return {
+        "id": row.unit_id,
+        "type": row.type,
+        "path": row.path,
+        "metrics": {"loc": row.loc, "complexity": row.complexity, "commentLines": row.comment_lines},
+    }
+
+
+def _dependency_item(row: Any) -> dict:
+    return {
+        "id": row.dependency_id,
+        "name": row.name,
+        "version": row.version,
+        "type": row.type,
+        "license": row.license,
+        "vulnerabilities": row.vulnerabilities or [],
+    }
+
+
+def _connection_item(row: Any) -> dict:
+    return {"sourceUnitId": row.source_unit_id, "targetUnitId": row.target_unit_id, "type": row.type}
+
+
+_ROW_BUILDERS: Dict[str, Tuple[Type[SQLModel], Callable[[UUID, dict], dict]]] = {
+    CODE_UNIT: (CodeUnitRecord, _code_unit_row),
+    DEPENDENCY: (DependencyRecord, _dependency_row),
+    CONNECTION: (ConnectionRecord, _connection_row),
+}
+
+_ITEM_BUILDERS: Dict[str, Tuple[Type[SQLModel], Tuple[str, ...], Callable[[Any], dict]]] = {
+    SECTIONS[CODE_UNIT]: (
+        CodeUnitRecord,
+        ("unit_id", "type", "path", "loc", "complexity", "comment_lines"),
+        _code_unit_item,
+    ),
+    SECTIONS[DEPENDENCY]: (
+        DependencyRecord,
+        ("dependency_id", "name", "version", "type", "license", "vulnerabilities"),
+        _dependency_item,
+    ),
+    SECTIONS[CONNECTION]: (ConnectionRecord, ("source_unit_id", "target_unit_id", "type"), _connection_item),
+}
+
+
+def _write_records(
+    session: Session, report: AnalysisReport, records: Iterable[UDMRecord], batch_size: int, *, commit: bool = True
+) -> None:
+    """Insert records batch_size rows at a time; without commit everything stays in the caller's transaction."""
+    report_id = report.id
+    pending: Dict[str, List[dict]] = {kind: [] for kind in _ROW_BUILDERS}
+    header: dict = {}
+    summary: dict = {}
+
+    def flush(kind: str) -> None:
+        rows = pending[kind]
+        if rows:
+            session.execute(insert(_ROW_BUILDERS[kind][0]), rows)
+            if commit:
+                session.commit()
+            pending[kind] = []
+
+    for kind, value in records:
+        builder = _ROW_BUILDERS.get(kind)
+        if builder is not None:
+            pending[kind].append(builder[1](report_id, value))
+            if len(pending[kind]) >= batch_size:
+                flush(kind)
+        elif kind == HEADER:
+            header = value
+        elif kind == SUMMARY:
+            summary = value
+    for kind in pending:
+        flush(kind)
+
+    report = session.get(AnalysisReport, report_id)
+    analyzed_at = _TIMESTAMP.validate_python(header.get("analysisTimestamp") or datetime.now(timezone.utc))
+    if analyzed_at.tzinfo is not None:
+        analyzed_at = analyzed_at.astimezone(timezone.utc)
+    # nexus_version marks the rows as complete, so it is only set at the end.
+    report.nexus_version = header.get("nexusVersion") or "1.0.0"
+    report.project_name = header.get("projectName")
+    report.languages = header.get("languages") or []
+    report.analyzed_at = analyzed_at
+    report.total_files = int(summary.get("totalFiles") or 0)
+    report.total_loc = int(summary.get("totalLinesOfCode") or 0)
+    report.avg_complexity = float(summary.get("avgComplexity") or 0.0)
+    report.dependency_count = int(summary.get("dependencyCount") or 0)
+    report.truncated = summary.get("truncated")
+    session.add(report)
+    if commit:
+        session.commit()
+
+
+def save_report_records(job_id: str, records: Iterable[UDMRecord], *, batch_size: int = INSERT_BATCH) -> None:
+    """Bulk-insert a UDM record stream into the code_unit/dependency/connection tables.
+
+    Rows are inserted and committed batch_size at a time as the stream is
+    produced, so neither memory nor a write transaction grows with the
+    report. The header and summary land on the report row last; the report
+    only becomes readable once its status is set to completed, and
+    delete_report_records cleans up after a failed run.
+    """
+    with get_session() as session:
+        report = session.exec(select(AnalysisReport).where(AnalysisReport.job_id == job_id)).one_or_none()
+        if report is None:
+            raise LookupError(f"Unknown report {job_id}")
+        _write_records(session, report, records, batch_size)
+
+
+def delete_report_records(job_id: str) -> None:
+    with get_session() as session:
+        report_id = session.exec(select(AnalysisReport.id).where(AnalysisReport.job_id == job_id)).first()
+        if report_id is None:
+            return
+        for model, _ in _ROW_BUILDERS.values():
+            session.execute(delete(model).where(model.report_id == report_id))
+        session.execute(delete(ReportRendition).where(ReportRendition.report_id == report_id))
+        session.commit()
+
+
+def iter_report_section(
+    report_id: UUID, section: str, *, units: Optional[UnitQuery] = None, batch_size: int = READ_BATCH
+) -> Iterator[str]:
+    """Yield one UDM list section as newline-separated JSON items, batch_size rows at a time.
+
+    units filters and projects the codeUnits section.
+    """
+    if section == SECTIONS[CODE_UNIT] and units is not None:
+        for batch in iter_code_units(report_id, units, batch_size=batch_size):
+            if batch:
+                yield "\n".join(dump_line(unit) for unit in batch)
+        return
+    model, columns, to_item = _ITEM_BUILDERS[section]
+    statement = (
+        select(*(getattr(model, column) for column in columns))
+        .where(model.report_id == report_id)
+        .order_by(model.id)
+        .execution_options(yield_per=batch_size)
+    )
+    with get_session() as session:
+        for rows in session.execute(statement).partitions():
+            yield "\n".join(dump_line(to_item(row)) for row in rows)
+
+
+def _encode_cursor(sort: str, values: List[Any]) -> str:
+    raw = json.dumps([sort, *values], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(sort: str, cursor: str) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if not isinstance(values, list) or len(values) < 2 or values[0] != sort:
+        raise InvalidCursor("Cursor does not match the requested ordering")
+    return values[1:]
+
+
+def _unit_statement(report_id: UUID, query: UnitQuery, after: Optional[List[Any]] = None):
+    model = CodeUnitRecord
+    if query.sort == "path":
+        sort_key: Any = model.path
+    elif query.sort in ("loc", "complexity"):
+        sort_key = func.coalesce(getattr(model, query.sort), -1)
+    else:
+        sort_key = model.id
+    columns = (model.id, model.unit_id, model.type, model.path, model.loc, model.complexity, model.comment_lines)
+    statement = select(*columns, sort_key.label("sort_key")).where(model.report_id == report_id)
+    if query.path_prefix:
+        statement = statement.where(model.path >= query.path_prefix, model.path < query.path_prefix + _MAX_CHAR)
+    if query.min_complexity is not None:
+        statement = statement.where(model.complexity >= query.min_complexity)
+    if query.unit_type:
+        statement = statement.where(model.type == query.unit_type)
+
+    descending = query.sort in ("loc", "complexity")
+    if after is not None:
+        last_key, last_id = after[0], after[-1]
+        if query.sort == "report":
+            statement = statement.where(model.id > last_id)
+        else:
+            beyond = sort_key < last_key if descending else sort_key > last_key
+            statement = statement.where(or_(beyond, and_(sort_key == last_key, model.id > last_id)))
+    if query.sort == "report":
+        return statement.order_by(model.id)
+    return statement.order_by(sort_key.desc() if descending else sort_key, model.id)
+
+
+def iter_code_units(report_id: UUID, query: UnitQuery, *, batch_size: int = READ_BATCH) -> Iterator[List[dict]]:
+    """Yield the code units matching query in batches of at most batch_size."""
+    statement = _unit_statement(report_id, query)
+    if query.limit is not None:
+        statement = statement.limit(query.limit)
+    with get_session() as session:
+        for rows in session.execute(statement.execution_options(yield_per=batch_size)).partitions():
+            yield [query.project(_code_unit_item(row)) for row in rows]
+
+
+def query_code_units(
+    report_id: UUID, query: UnitQuery, *, cursor: Optional[str] = None, limit: int = 500
+) -> Tuple[List[dict], Optional[str]]:
+    """Return one page of code units plus the cursor of the next page, if any.
+
+    Paging is keyset based (the cursor holds the last sort key and row id),
+    so deep pages cost the same as the first and stay stable while reading.
+    """
+    after = _decode_cursor(query.sort, cursor) if cursor else None
+    statement = _unit_statement(report_id, query, after).limit(limit + 1)
+    with get_session() as session:
+        rows = session.execute(statement).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        values = [last.id] if query.sort == "report" else [last.sort_key, last.id]
+        next_cursor = _encode_cursor(query.sort, values)
+    return [query.project(_code_unit_item(row)) for row in rows], next_cursor
+
+
+def directory_level(report_id: UUID, path: str = "") -> List[dict]:
+    """Aggregate FILE units one directory level below path.
+
+    Each entry is a file or an immediate subdirectory with its file count,
+    total lines of code and mean file complexity, largest first. Rows are
+    streamed through a prefix range scan, so memory grows with the number of
+    entries on the level, not the size of the report.
+    """
+    prefix = path.strip("/")
+    prefix = f"{prefix}/" if prefix else ""
+    model = CodeUnitRecord
+    statement = (
+        select(model.path, model.loc, model.complexity)
+        .where(model.report_id == report_id, model.type == "FILE")
+        .execution_options(yield_per=READ_BATCH)
+    )
+    if prefix:
+        statement = statement.where(model.path >= prefix, model.path < prefix + _MAX_CHAR)
+
+    entries: Dict[str, dict] = {}
+    with get_session() as session:
+        for row in session.execute(statement):
+            name, separator, _ = row.path[len(prefix) :].partition("/")
+            entry = entries.get(name)
+            if entry is None:
+                entry = entries[name] = {
+                    "name": name,
+                    "path": prefix + name,
+                    "type": "directory" if separator else "file",
+                    "files": 0,
+                    "loc": 0,
+                    "complexity": 0.0,
+                }
+            entry["files"] += 1
+            entry["loc"] += row.loc or 0
+            entry["complexity"] += row.complexity or 0.0
+    for entry in entries.values():
+        entry["complexity"] = round(entry["complexity"] / entry["files"], 2)
+    return sorted(entries.values(), key=lambda entry: (-entry["loc"], entry["name"]))
+
+
+def report_header(report: AnalysisReport) -> dict:
+    analyzed_at = report.analyzed_at
+    if analyzed_at is not None and analyzed_at.tzinfo is None:
+        analyzed_at = analyzed_at.replace(tzinfo=timezone.utc)
+    return {
+        "nexusVersion": report.nexus_version,
+        "projectName": report.project_name,
+        "languages": report.languages or [],
+        "analysisTimestamp": _TIMESTAMP.dump_python(analyzed_at, mode="json"),
+    }
+
+
+def report_summary(report: AnalysisReport) -> dict:
+    summary = {
+        "totalFiles": report.total_files or 0,
+        "totalLinesOfCode": report.total_loc or 0,
+        "avgComplexity": report.avg_complexity or 0.0,
+        "dependencyCount": report.dependency_count or 0,
+    }
+    if report.truncated:
+        summary["truncated"] = report.truncated
+    return summary
+
+
+def get_report_sections(report: AnalysisReport, *, units: Optional[UnitQuery] = None) -> Optional[SectionReader]:
+    """Return a reader over the report's stored UDM, or None when it has none.
+
+    units filters the code units that are read. Reports that predate the
+    normalised tables and have not been migrated yet are served from their
+    udm blob.
+    """
+    if report.nexus_version is not None:
+        header = dump_line(report_header(report))
+        summary = dump_line(report_summary(report))
+        report_id = report.id
+
+        def read(section: str) -> Iterable[str]:
+            if section == HEADER:
+                return [header]
+            if section == SUMMARY:
+                return [summary]
+            return iter_report_section(report_id, section, units=units)
+
+        return read
+    if report.udm:
+        payload = report.udm
+        if units is not None:
+            payload = {**payload, "codeUnits": units.apply(payload.get("codeUnits") or [])}
+        return payload_sections(payload)
+    return None
+
+
+def _payload_records(payload: dict) -> Iterator[UDMRecord]:
+    yield HEADER, {key: value for key, value in payload.items() if key not in {*SECTIONS.values(), SUMMARY}}
+    yield SUMMARY, payload.get(SUMMARY) or {}
+    for kind, section in SECTIONS.items():
+        for item in payload.get(section) or []:
+            yield kind, item
+
+
+def migrate_legacy_reports(*, batch_size: int = INSERT_BATCH) -> int:
+    """Move reports stored as a udm blob into the normalised tables.
+
+    Each report's rows are inserted, and its blob cleared, in a single
+    transaction, so an interrupted migration leaves nothing behind and is
+    simply picked up again on the next start. Returns the number of
+    reports migrated.
+    """
+    with get_session() as session:
+        pending = (
+            select(AnalysisReport.job_id)
+            .where(AnalysisReport.nexus_version.is_(None))
+            .where(AnalysisReport.udm.is_not(None))
+            .where(cast(AnalysisReport.udm, String) != "null")
+        )
+        job_ids = list(session.exec(pending))
+
+    migrated = 0
+    for job_id in job_ids:
+        with get_session() as session:
+            report = session.exec(select(AnalysisReport).where(AnalysisReport.job_id == job_id)).one_or_none()
+            if report is None or report.nexus_version is not None or not report.udm:
+                continue
+            _write_records(session, report, _payload_records(report.udm), batch_size, commit=False)
+            report.udm = None
+            session.add(report)
+            session.commit()
+            migrated += 1
+
+    if migrated:
+        LOGGER.info("Migrated %s stored reports to normalised tables", migrated)
+    return migrated
+
+
+__all__ = [
+    "InvalidCursor",
+    "UNIT_METRICS",
+    "UNIT_SORTS",
+    "UnitQuery",
+    "delete_report_records",
+    "directory_level",
+    "get_report_sections",
+    "iter_code_units",
+    "iter_report_section",
+    "migrate_legacy_reports",
+    "query_code_units",
+    "report_header",
+    "report_summary",
+    "save_report_records",
+]
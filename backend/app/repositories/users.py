@@ -5,7 +5,7 @@ from uuid import UUID
 
 from sqlmodel import select
 
-from ..db import get_session
+from ..db import async_repository, get_async_session, get_session
 from ..models import User
 
 
@@ -32,3 +32,28 @@ def get_user(user_id: UUID) -> Optional[User]:
     with get_session() as session:
         statement = select(User).where(User.id == user_id)
         return session.exec(statement).one_or_none()
+
+
+@async_repository(create_user)
+async def create_user_async(email: str, display_name: str) -> User:
+    async with get_async_session() as session:
+        existing = (await session.exec(select(User).where(User.email == email))).one_or_none()
+        if existing:
+            return existing
+        user = User(email=email, display_name=display_name)
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
+        return user
+
+
+@async_repository(list_users)
+async def list_users_async() -> List[User]:
+    async with get_async_session() as session:
+        return list(await session.exec(select(User).order_by(User.created_at.desc())))
+
+
+@async_repository(get_user)
+async def get_user_async(user_id: UUID) -> Optional[User]:
+    async with get_async_session() as session:
+        return (await session.exec(select(User).where(User.id == user_id))).one_or_none()
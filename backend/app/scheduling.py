@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Sequence, TypeVar
+
+from .celery_app import LARGE_QUEUE, MAX_PRIORITY, SMALL_QUEUE
+from .settings import env_number
+
+#: Projects with at least this many analysable files go to the large queue.
+LARGE_PROJECT_FILES = env_number("NEXUS_LARGE_PROJECT_FILES", 5000, int, minimum=1)
+#: Pending or running analyses one user may have at once (0 = unlimited).
+USER_MAX_ACTIVE_JOBS = env_number("NEXUS_USER_MAX_ACTIVE_JOBS", 3, int, minimum=0)
+#: Priority given to large projects; small ones start at 0.
+LARGE_PROJECT_PRIORITY = 5
+#: Analyses of one batch running at once, at most; requests may ask for fewer.
+BATCH_PARALLELISM = env_number("NEXUS_BATCH_PARALLELISM", 4, int, minimum=1)
+#: Projects a single batch may contain.
+BATCH_MAX_PROJECTS = env_number("NEXUS_BATCH_MAX_PROJECTS", 1000, int, minimum=1)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class JobRoute:
+    queue: str
+    priority: int
+
+
+def route_job(files: int, active_jobs: int = 0) -> JobRoute:
+    """Pick the queue and priority of a new analysis.
+
+    Size decides the queue and the base priority; each analysis the user
+    already has in flight pushes the new one back a step, so someone
+    submitting a batch does not starve everybody else on the same queue.
+    """
+    large = files >= LARGE_PROJECT_FILES
+    base = LARGE_PROJECT_PRIORITY if large else 0
+    return JobRoute(queue=LARGE_QUEUE if large else SMALL_QUEUE, priority=min(MAX_PRIORITY, base + active_jobs))
+
+
+def over_user_limit(active_jobs: int) -> bool:
+    return USER_MAX_ACTIVE_JOBS > 0 and active_jobs >= USER_MAX_ACTIVE_JOBS
+
+
+#: Batches are background work: the large queue at the lowest priority, behind interactive requests.
+BATCH_ROUTE = JobRoute(queue=LARGE_QUEUE, priority=MAX_PRIORITY)
+
+
+def batch_lanes(jobs: Sequence[T], parallelism: int) -> List[List[T]]:
+    """Deal jobs round-robin into at most parallelism lanes that each run one job at a time."""
+    lanes = max(1, min(parallelism, len(jobs)))
+    return [list(jobs[index::lanes]) for index in range(lanes)] if jobs else []
+
+
+__all__ = [
+    "BATCH_MAX_PROJECTS",
+    "BATCH_PARALLELISM",
+    "BATCH_ROUTE",
+    "JobRoute",
+    "LARGE_PROJECT_FILES",
+    "USER_MAX_ACTIVE_JOBS",
+    "batch_lanes",
+    "over_user_limit",
+    "route_job",
+]
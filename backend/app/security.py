@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, List, Optional
 
 from fastapi import HTTPException, status
 
@@ -15,14 +16,22 @@ KEY_PROJECT_FILES = {
     "build.gradle.kts",
     "Cargo.toml",
 }
+#: Directories never searched for projects: dependencies, build output and hidden directories.
+PROJECT_SCAN_SKIP = {"node_modules", "venv", "__pycache__", "target", "build", "dist"}
 
 
 def get_allowed_root() -> Path:
     root = os.environ.get("NEXUS_ALLOWED_ROOT")
+    return _allowed_root(root, None if root else os.getcwd())
+
+
+@lru_cache(maxsize=16)
+def _allowed_root(root: Optional[str], cwd: Optional[str]) -> Path:
+    # Resolved (and created) once per configured root instead of on every request.
     if root:
         base = Path(root).expanduser().resolve()
     else:
-        base = (Path.cwd() / "apps").resolve()
+        base = (Path(cwd) / "apps").resolve()
     if not base.exists():
         base.mkdir(parents=True, exist_ok=True)
     if not base.is_dir():
@@ -79,3 +88,33 @@ def is_within_root(path: Path, root: Path) -> bool:
         return True
     except ValueError:
         return False
+
+
+def find_projects(root: Path, *, max_depth: int) -> List[Path]:
+    """Directories at most max_depth levels below root that contain a KEY_PROJECT_FILES marker.
+
+    A project's own subdirectories are not searched further, so vendored or
+    nested packages are analysed as part of it. Results are in path order.
+    """
+    projects: List[Path] = []
+    stack: List[tuple[Path, int]] = [(root, 0)]
+    while stack:
+        directory, depth = stack.pop()
+        try:
+            entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+        except OSError:
+            continue
+        if any(entry.name in KEY_PROJECT_FILES and entry.is_file() for entry in entries):
+            projects.append(directory)
+            continue
+        if depth >= max_depth:
+            continue
+        subdirs = [
+            Path(entry.path)
+            for entry in entries
+            if entry.is_dir(follow_symlinks=False)
+            and not entry.name.startswith(".")
+            and entry.name not in PROJECT_SCAN_SKIP
+        ]
+        stack.extend((subdir, depth + 1) for subdir in reversed(subdirs))
+    return projects
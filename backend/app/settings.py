@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import logging
+import os
+from typing import Callable, Optional, Sequence, TypeVar
+
+LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T", int, float)
+
+
+def env_number(name: str, default: T, cast: Callable[[str], T], *, minimum: Optional[T] = None) -> T:
+    """A numeric setting; a malformed value is logged and replaced by default instead of failing the caller.
+
+    Settings are read while the API and worker modules are imported, so a
+    typo in one must not take the whole process down. Values below minimum
+    count as malformed.
+    """
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        number = cast(value.strip())
+    except ValueError:
+        LOGGER.warning("Ignoring %s=%r: not a valid %s; using %s.", name, value, cast.__name__, default)
+        return default
+    if minimum is not None and number < minimum:
+        LOGGER.warning("Ignoring %s=%r: below the minimum of %s; using %s.", name, value, minimum, default)
+        return default
+    return number
+
+
+def env_choice(name: str, default: str, choices: Sequence[str]) -> str:
+    value = (os.getenv(name) or default).strip().lower()
+    if value not in choices:
+        LOGGER.warning("Ignoring %s=%r: expected one of %s; using %s.", name, value, ", ".join(choices), default)
+        return default
+    return value
+
+
+__all__ = ["env_choice", "env_number"]
@@ -1,18 +1,27 @@
 from __future__ import annotations
 
 import logging
-import sys
+import os
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Sequence
 
-from celery import states
+from celery import chain, chord, group, states
 from celery.result import AsyncResult
 
 from .celery_app import celery_app
-from .core.orchestrator import AnalysisError, AnalysisOrchestrator
+from .core.budget import CANCELLED, FILE_BUDGET, TIME_BUDGET, AnalysisBudget
+from .core.cache import MetricsCache
+from .core.context import count_changed_files
+from .core.orchestrator import EXECUTOR_KINDS, FINGERPRINT_STRATEGIES, AnalysisError, AnalysisOrchestrator
+from .core.plugins import PluginSpec
 from .models import AnalysisStatus
-from .repositories.reports import update_report_status
+from .progress import ProgressBroker, progress_event, redis_broker
+from .repositories.batches import BatchJob, complete_batch
+from .repositories.reports import cancellation_requested, get_report_file_state, update_report_status
+from .repositories.renditions import save_report_renditions
+from .repositories.udm import delete_report_records, save_report_records
+from .settings import env_choice, env_number
 
 LOGGER = logging.getLogger(__name__)
 
@@ -24,75 +33,284 @@ class JobStatus(str, Enum):
     FAILED = "failed"
 
 
-PY_PLUGIN_SRC = Path(__file__).resolve().parents[2] / "plugins" / "python_analyzer" / "src"
-JS_PLUGIN_SRC = Path(__file__).resolve().parents[2] / "plugins" / "javascript_analyzer" / "src"
-JAVA_PLUGIN_SRC = Path(__file__).resolve().parents[2] / "plugins" / "java_analyzer" / "src"
+PLUGINS_DIR = Path(__file__).resolve().parents[2] / "plugins"
+#: Packages of the analyzers shipped in plugins/, by directory name.
+BUNDLED_PACKAGES = ("python", "javascript", "java")
 
-for plugin_src in (PY_PLUGIN_SRC, JS_PLUGIN_SRC, JAVA_PLUGIN_SRC):
-    if plugin_src.exists():
-        plugin_path = str(plugin_src)
-        if plugin_path not in sys.path:
-            sys.path.append(plugin_path)
 
-orchestrator = AnalysisOrchestrator()
+def _bundled_plugins() -> tuple[PluginSpec, ...]:
+    """Specs of the bundled analyzers, read from each package's metadata module.
 
-try:
-    from nexus_analyzer_python.plugin import PythonAnalyzer
+    They are registered by metadata and only imported (radon included) once
+    a project with one of their markers or extensions is analysed.
+    """
+    specs = []
+    for package in BUNDLED_PACKAGES:
+        path = PLUGINS_DIR / f"{package}_analyzer" / "src"
+        try:
+            specs.append(PluginSpec.from_metadata(f"nexus_analyzer_{package}.metadata", path=str(path)))
+        except ImportError as exc:
+            LOGGER.warning("%s analyzer plugin is not available at %s: %s", package, path, exc)
+    return tuple(specs)
 
-    orchestrator.plugin_manager.register(PythonAnalyzer())
-except ModuleNotFoundError:
-    LOGGER.warning("Python analyzer plugin is not available on PYTHONPATH.")
 
-try:
-    from nexus_analyzer_javascript.plugin import JavaScriptAnalyzer
+BUNDLED_PLUGINS = _bundled_plugins()
 
-    orchestrator.plugin_manager.register(JavaScriptAnalyzer())
-except ModuleNotFoundError:
-    LOGGER.warning("JavaScript analyzer plugin is not available on PYTHONPATH.")
+#: Share of the progress bar covered by the analysis itself, between preparing and storing the report.
+ANALYSIS_PROGRESS = (10, 85)
+#: ProgressTracker snapshot keys passed on with running-job updates.
+SNAPSHOT_FIELDS = ("phase", "filesDiscovered", "filesDone", "filesTotal", "bytesRead")
 
-try:
-    from nexus_analyzer_java.plugin import JavaAnalyzer
 
-    orchestrator.plugin_manager.register(JavaAnalyzer())
-except ModuleNotFoundError:
-    LOGGER.warning("Java analyzer plugin is not available on PYTHONPATH.")
+PLUGIN_EXECUTOR = env_choice("NEXUS_PLUGIN_EXECUTOR", "thread", EXECUTOR_KINDS)
+PLUGIN_WORKERS = env_number("NEXUS_PLUGIN_WORKERS", 0, int) or None
+FINGERPRINT_MODE = env_choice("NEXUS_FINGERPRINT", "git", FINGERPRINT_STRATEGIES)
+#: Upper bounds for every analysis (0 = unlimited); requests may only ask for less.
+TIME_BUDGET_SECONDS = env_number("NEXUS_ANALYSIS_TIME_BUDGET", 0.0, float) or None
+FILE_BUDGET_COUNT = env_number("NEXUS_ANALYSIS_FILE_BUDGET", 0, int) or None
+#: Seconds between checks for a cancellation request while an analysis runs.
+CANCEL_POLL_INTERVAL = env_number("NEXUS_CANCEL_POLL_INTERVAL", 1.0, float, minimum=0.0)
+#: Extra seconds before Celery kills a task that overran its time budget without noticing
+#: (e.g. stuck inside a single huge file).
+TIME_LIMIT_GRACE = 300
 
+orchestrator = AnalysisOrchestrator(
+    executor=PLUGIN_EXECUTOR,
+    max_workers=PLUGIN_WORKERS,
+    cache=MetricsCache.from_env(),
+    fingerprint=FINGERPRINT_MODE,
+)
 
-@celery_app.task(bind=True, name="nexus.execute_analysis", autoretry_for=(), retry_backoff=False)
-def execute_analysis_task(self, project_path: str) -> Dict[str, Any]:
-    """Celery task that runs the Nexus orchestrator."""
+for spec in BUNDLED_PLUGINS:
+    orchestrator.plugin_manager.register_lazy(spec)
+
+
+@celery_app.task(
+    bind=True,
+    name="nexus.execute_analysis",
+    autoretry_for=(),
+    retry_backoff=False,
+    time_limit=TIME_BUDGET_SECONDS + TIME_LIMIT_GRACE if TIME_BUDGET_SECONDS else None,
+)
+def execute_analysis_task(
+    self,
+    project_path: str,
+    base_job_id: Optional[str] = None,
+    time_budget: Optional[float] = None,
+    file_budget: Optional[int] = None,
+    batch_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Celery task that runs the Nexus orchestrator.
+
+    Within a batch a failed analysis is only recorded on its report, so the
+    rest of its lane still runs.
+    """
     job_id = self.request.id
-    payload = perform_analysis(job_id, project_path, progress_callback=self.update_state)
+    try:
+        payload = perform_analysis(
+            job_id,
+            project_path,
+            progress_callback=self.update_state,
+            base_job_id=base_job_id,
+            progress_broker=redis_broker(),
+            time_budget=time_budget,
+            file_budget=file_budget,
+        )
+    except Exception as exc:
+        if batch_id is None:
+            raise
+        return {"jobId": job_id, "summary": None, "error": str(exc)}
     return payload
 
 
-def perform_analysis(job_id: str, project_path: str, progress_callback=None) -> Dict[str, Any]:
+@celery_app.task(name="nexus.finish_batch")
+def finish_batch_task(batch_id: str) -> None:
+    complete_batch(batch_id)
+
+
+def schedule_batch(
+    batch_id: str,
+    lanes: Sequence[Sequence[BatchJob]],
+    *,
+    queue: str,
+    priority: int,
+    time_budget: Optional[float] = None,
+    file_budget: Optional[int] = None,
+) -> None:
+    """Queue a batch as a chord of one chain per lane.
+
+    Each chain runs its analyses one after another, so at most len(lanes) of
+    the batch run at once whatever the number of workers; the chord's
+    callback marks the batch finished. Every analysis keeps its job id as
+    task id, so the per-job status endpoints work as usual.
+    """
+    chains = [
+        chain(
+            *(
+                execute_analysis_task.si(
+                    job.project_path, job.base_job_id, time_budget, file_budget, batch_id=batch_id
+                ).set(task_id=job.job_id, queue=queue, priority=priority)
+                for job in lane
+            )
+        )
+        for lane in lanes
+    ]
+    chord(group(chains), finish_batch_task.si(batch_id)).apply_async()
+
+
+def _tighter(requested: Optional[float], configured: Optional[float]) -> Optional[float]:
+    limits = [limit for limit in (requested, configured) if limit]
+    return min(limits) if limits else None
+
+
+def analysis_budget(
+    job_id: str, time_budget: Optional[float] = None, file_budget: Optional[int] = None
+) -> AnalysisBudget:
+    """The budget of one job: the tighter of its own and the configured limits, plus cancellation."""
+    return AnalysisBudget(
+        max_seconds=_tighter(time_budget, TIME_BUDGET_SECONDS),
+        max_files=_tighter(file_budget, FILE_BUDGET_COUNT),
+        cancelled=lambda: cancellation_requested(job_id),
+        poll_interval=CANCEL_POLL_INTERVAL,
+    )
+
+
+def truncation_summary(budget: AnalysisBudget) -> str:
+    if budget.reason == CANCELLED:
+        detail = "cancelled"
+    elif budget.reason == TIME_BUDGET:
+        detail = f"time budget of {budget.max_seconds:g}s exceeded"
+    elif budget.reason == FILE_BUDGET:
+        detail = f"file budget of {budget.max_files} files reached"
+    else:
+        detail = budget.reason or "stopped"
+    return f"Analysis stopped early ({detail}); partial results for {budget.files_admitted} files"
+
+
+class JobProgress:
+    """Send a job's progress to the Celery task state and to a progress broker."""
+
+    def __init__(self, job_id: str, progress_callback=None, broker: Optional[ProgressBroker] = None) -> None:
+        self.job_id = job_id
+        self.progress_callback = progress_callback
+        self.broker = broker
+
+    def report(
+        self,
+        status: JobStatus,
+        progress: int,
+        message: Optional[str],
+        *,
+        error: Optional[str] = None,
+        snapshot: Optional[dict] = None,
+    ) -> None:
+        snapshot = snapshot or {}
+        files = {key: snapshot.get(key) for key in SNAPSHOT_FIELDS}
+        if self.progress_callback and status == JobStatus.RUNNING:
+            self.progress_callback(state="PROGRESS", meta={"progress": progress, "message": message, **files})
+        if self.broker is not None:
+            self.broker.publish(
+                self.job_id,
+                progress_event(
+                    self.job_id,
+                    status.value,
+                    progress,
+                    message,
+                    error=error,
+                    phase=files["phase"],
+                    files_done=files["filesDone"],
+                    files_total=files["filesTotal"],
+                    files_discovered=files["filesDiscovered"],
+                    bytes_read=files["bytesRead"],
+                ),
+            )
+
+    def analysis(self, snapshot: dict) -> None:
+        """ProgressCallback for the orchestrator: scale file progress into ANALYSIS_PROGRESS."""
+        low, high = ANALYSIS_PROGRESS
+        total = snapshot.get("filesTotal") or 0
+        if snapshot.get("phase") == "discovering":
+            message = "Discovering files"
+        else:
+            message = f"Analyzed {snapshot.get('filesDone', 0)} of {total} files" if total else "Analyzer running"
+        self.report(JobStatus.RUNNING, low + int((high - low) * snapshot["fraction"]), message, snapshot=snapshot)
+
+
+def perform_analysis(
+    job_id: str,
+    project_path: str,
+    progress_callback=None,
+    base_job_id: Optional[str] = None,
+    progress_broker: Optional[ProgressBroker] = None,
+    time_budget: Optional[float] = None,
+    file_budget: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Run the orchestrator and stream the report into the UDM tables as it is produced.
+
+    With base_job_id, files unchanged since that report are carried forward
+    from its stored file state instead of being analysed again. Only a small
+    summary is returned, so the Celery result backend never carries the UDM;
+    clients read the report back from the database. Progress goes to
+    progress_callback (Celery's update_state) and, as events, to
+    progress_broker. An analysis that is cancelled or runs out of its time or
+    file budget completes with the files read so far, marked truncated.
+    """
+    if cancellation_requested(job_id):
+        LOGGER.info("Skipping analysis %s, cancelled before it started", job_id)
+        return {"jobId": job_id, "summary": None}
     LOGGER.info("Starting analysis for %s", project_path)
+    budget = analysis_budget(job_id, time_budget, file_budget)
+    job_progress = JobProgress(job_id, progress_callback, progress_broker)
     update_report_status(job_id, AnalysisStatus.RUNNING, summary="Analyzer started")
-    if progress_callback:
-        progress_callback(state="PROGRESS", meta={"progress": 10, "message": "Preparing analyzers"})
+    job_progress.report(JobStatus.RUNNING, ANALYSIS_PROGRESS[0], "Preparing analyzers")
     try:
-        udm = orchestrator.analyze(project_path)
-        if progress_callback:
-            progress_callback(state="PROGRESS", meta={"progress": 85, "message": "Preparing report"})
-        payload = udm.model_dump(mode="json", by_alias=True)
-        update_report_status(job_id, AnalysisStatus.COMPLETED, summary="Analysis completed", udm=payload)
+        baseline = get_report_file_state(base_job_id) if base_job_id else None
+        if base_job_id:
+            LOGGER.info("Analysing %s incrementally against %s", project_path, base_job_id)
+        stream = orchestrator.stream(project_path, baseline=baseline, progress=job_progress.analysis, budget=budget)
+        save_report_records(job_id, stream)
+        snapshot = stream.progress.snapshot()
+        job_progress.report(JobStatus.RUNNING, ANALYSIS_PROGRESS[1], "Preparing report", snapshot=snapshot)
+        save_report_renditions(job_id)
+        summary = "Analysis completed"
+        if baseline is not None:
+            changed = count_changed_files(baseline, stream.file_state)
+            summary = f"Analysis completed ({changed} changed files since {base_job_id})"
+        if stream.truncated:
+            summary = truncation_summary(budget)
+            LOGGER.warning("Analysis %s of %s: %s", job_id, project_path, summary)
+        update_report_status(
+            job_id,
+            AnalysisStatus.COMPLETED,
+            summary=summary,
+            file_state=stream.file_state,
+            revision=stream.revision,
+        )
+        job_progress.report(JobStatus.COMPLETED, 100, summary, snapshot=snapshot)
         LOGGER.info("Completed analysis for %s", project_path)
-        return payload
+        return {"jobId": job_id, "summary": stream.summary}
     except (AnalysisError, FileNotFoundError, NotADirectoryError) as exc:
         LOGGER.exception("Analysis failed for %s: %s", project_path, exc)
-        update_report_status(job_id, AnalysisStatus.FAILED, summary=str(exc))
+        fail_analysis(job_id, str(exc))
+        job_progress.report(JobStatus.FAILED, 100, "Analysis failed", error=str(exc))
         raise exc
     except Exception as exc:  # pragma: no cover - defensive
         LOGGER.exception("Unexpected failure for %s: %s", project_path, exc)
-        update_report_status(job_id, AnalysisStatus.FAILED, summary=str(exc))
+        fail_analysis(job_id, str(exc))
+        job_progress.report(JobStatus.FAILED, 100, "Analysis failed", error=str(exc))
         raise exc
 
 
+def fail_analysis(job_id: str, message: str) -> None:
+    delete_report_records(job_id)
+    update_report_status(job_id, AnalysisStatus.FAILED, summary=message)
+
+
 def map_celery_state(result: AsyncResult) -> dict[str, Optional[Any]]:
     """Translate Celery AsyncResult state into API-friendly response."""
     state = result.state
     info = result.info if isinstance(result.info, dict) else {}
+    files: Dict[str, Any] = {}
 
     if state in {states.PENDING, states.RECEIVED, states.QUEUED}:
         mapped_state = JobStatus.PENDING
@@ -104,6 +322,7 @@ def map_celery_state(result: AsyncResult) -> dict[str, Optional[Any]]:
         progress = int(info.get("progress", 25))
         message = str(info.get("message") or "Analyzer running")
         error = None
+        files = {key: info.get(key) for key in SNAPSHOT_FIELDS}
     elif state == states.SUCCESS:
         mapped_state = JobStatus.COMPLETED
         progress = 100
@@ -125,7 +344,16 @@ def map_celery_state(result: AsyncResult) -> dict[str, Optional[Any]]:
         "progress": progress,
         "message": message,
         "error": error,
+        **files,
     }
 
 
-__all__ = ["execute_analysis_task", "celery_app", "JobStatus", "map_celery_state", "perform_analysis"]
+__all__ = [
+    "execute_analysis_task",
+    "celery_app",
+    "finish_batch_task",
+    "JobStatus",
+    "map_celery_state",
+    "perform_analysis",
+    "schedule_batch",
+]
@@ -0,0 +1,117 @@
+"""Micro-benchmark of per-file metrics for the JavaScript and Java analyzers.
+
+"before" is how the plugins used to measure a file: a Python loop over
+splitlines() for LOC plus two or three re.findall passes with uncompiled
+patterns for complexity. "after" is the shared single-pass CLikeScanner,
+which also skips keywords in comments and strings and counts comment lines.
+Both run over the same generated corpus of large files.
+
+    PYTHONPATH=.:backend python backend/benchmarks/clike_scan.py --files 40 --lines 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+BACKEND = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(BACKEND), str(BACKEND.parent)]
+for plugin in ("javascript_analyzer", "java_analyzer"):
+    sys.path.append(str(BACKEND.parent / "plugins" / plugin / "src"))
+
+from nexus_analyzer_java.plugin import SCANNER as JAVA_SCANNER  # noqa: E402
+from nexus_analyzer_javascript.plugin import SCANNER as JS_SCANNER  # noqa: E402
+
+JS_LINES = (
+    "function handle{n}(request, response) {{",
+    "  // check the cache first, if it is warm",
+    "  const key = `user:${{request.id}}:{n}`;",
+    "  if (cache.has(key) && !request.fresh) {{ return cache.get(key); }}",
+    "  for (const item of request.items || []) {{ total += item.price; }}",
+    "  const label = 'for ' + (ready ? \"while\" : \"case\");",
+    "  /* switch over the kinds",
+    "     of request */",
+    "  switch (request.kind) {{ case 'a': break; default: break; }}",
+    "  return items.map((item) => item.id);",
+    "}}",
+    "",
+)
+JAVA_LINES = (
+    "  public int handle{n}(Request request) {{",
+    "    // if the cache is warm, use it",
+    "    String key = \"user:\" + request.id() + \":{n}\";",
+    "    if (cache.containsKey(key) && !request.fresh()) {{ return cache.get(key); }}",
+    "    for (Item item : request.items()) {{ total += item.price(); }}",
+    "    char quote = '\"';",
+    "    /* switch over the kinds",
+    "       of request */",
+    "    switch (request.kind()) {{ case A: break; default: break; }}",
+    "    while (total > 0 || retries-- > 0) {{ total -= step; }}",
+    "  }}",
+    "",
+)
+
+
+def legacy_js(text: str) -> tuple:
+    loc = sum(1 for line in text.splitlines() if line.strip())
+    function_count = len(re.findall(r"\bfunction\b|=>", text))
+    decision_points = len(re.findall(r"\b(if|for|while|case|catch|switch)\b|&&|\|\|", text))
+    return loc, max(1.0, function_count + decision_points * 0.5)
+
+
+def legacy_java(text: str) -> tuple:
+    loc = sum(1 for line in text.splitlines() if line.strip())
+    decision_keywords = len(re.findall(r"\b(if|for|while|case|catch|switch)\b", text))
+    logical_ops = len(re.findall(r"&&|\|\|", text))
+    return loc, max(1.0, decision_keywords + logical_ops * 0.5)
+
+
+def corpus(template: tuple, files: int, lines: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    documents = []
+    for _ in range(files):
+        body = []
+        while len(body) < lines:
+            body.extend(line.format(n=rng.randrange(10**6)) for line in template)
+        documents.append("\n".join(body[:lines]) + "\n")
+    return documents
+
+
+def measure(fn: Callable[[str], object], documents: List[str], repeat: int) -> float:
+    """Best seconds over repeat runs for fn over every document."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for document in documents:
+            fn(document)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--lines", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    languages = (
+        ("JavaScript", JS_LINES, legacy_js, JS_SCANNER.scan),
+        ("Java", JAVA_LINES, legacy_java, JAVA_SCANNER.scan),
+    )
+    for seed, (label, template, before, after) in enumerate(languages):
+        documents = corpus(template, args.files, args.lines, seed)
+        megabytes = sum(len(document) for document in documents) / 1e6
+        print(f"{label}: {args.files} files x {args.lines} lines ({megabytes:.1f} MB)")
+        for variant, fn in (("before (splitlines + findall)", before), ("after (single-pass scanner)", after)):
+            seconds = measure(fn, documents, args.repeat)
+            print(f"  {variant:30} {seconds * 1000:8.1f} ms   {megabytes / seconds:6.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
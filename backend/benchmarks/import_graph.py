@@ -0,0 +1,95 @@
+"""Building the Python import graph of a large generated project.
+
+A project of --modules files is laid out as src/pkgN/subM/modK.py, every
+directory below src a package with its __init__.py, and every module gets
+--imports imports: absolute, relative, of symbols inside modules and of
+third-party packages. The run
+times building the ModuleIndex from the file list and resolving every
+module's imports to sorted IMPORT targets, twice, and checks both runs agree.
+No files are written; parsing is the analyzer's per-file cost and not part
+of this.
+
+    PYTHONPATH=.:backend python backend/benchmarks/import_graph.py --modules 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(BACKEND), str(BACKEND.parent)]
+sys.path.append(str(BACKEND.parent / "plugins" / "python_analyzer" / "src"))
+
+from nexus_analyzer_python.imports import ModuleIndex, module_id  # noqa: E402
+
+THIRD_PARTY = ("os", "json", "typing", "requests", "numpy.linalg", "django.db.models")
+
+
+def project(modules: int, imports: int, seed: int) -> Dict[str, List[str]]:
+    """Relative path -> import names of a generated project."""
+    rng = random.Random(seed)
+    paths: List[str] = []
+    per_package = 10
+    package = 0
+    while len(paths) < modules:
+        directory = os.path.join("src", f"pkg{package}")
+        paths.append(os.path.join(directory, "__init__.py"))
+        for subpackage in range(20):
+            paths.append(os.path.join(directory, f"sub{subpackage}", "__init__.py"))
+            paths.extend(os.path.join(directory, f"sub{subpackage}", f"mod{n}.py") for n in range(1, per_package))
+        package += 1
+    del paths[modules:]
+    names = [module_id(path).removeprefix("src.").removesuffix(".__init__") for path in paths]
+    sources = {}
+    for path in paths:
+        chosen = []
+        for _ in range(imports):
+            roll = rng.random()
+            if roll < 0.4:
+                chosen.append(rng.choice(names))
+            elif roll < 0.6:
+                chosen.append(f"{rng.choice(names)}.SomeClass")
+            elif roll < 0.8:
+                chosen.append(f".mod{rng.randrange(1, per_package)}")
+            else:
+                chosen.append(rng.choice(THIRD_PARTY))
+        sources[path] = sorted(set(chosen))
+    return sources
+
+
+def build(sources: Dict[str, List[str]]) -> tuple:
+    started = time.perf_counter()
+    index = ModuleIndex(list(sources))
+    indexed = time.perf_counter()
+    edges = []
+    for path, names in sources.items():
+        unit = module_id(path)
+        edges.extend((unit, target) for target in index.targets(unit, names))
+    return indexed - started, time.perf_counter() - indexed, edges
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", type=int, default=50_000)
+    parser.add_argument("--imports", type=int, default=12)
+    args = parser.parse_args()
+
+    sources = project(args.modules, args.imports, seed=1)
+    total_imports = sum(len(names) for names in sources.values())
+    runs = [build(sources) for _ in range(2)]
+    for run, (index_seconds, resolve_seconds, edges) in enumerate(runs, 1):
+        print(
+            f"run {run}: index {index_seconds * 1000:7.1f} ms   resolve {resolve_seconds * 1000:7.1f} ms"
+            f" ({total_imports / resolve_seconds / 1e6:.2f} M imports/s)   {len(edges)} edges"
+        )
+    print(f"{args.modules} modules, {total_imports} imports; runs identical: {runs[0][2] == runs[1][2]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Cold import time of the API (app.main) and the Celery worker module (app.tasks).
+
+Each sample is a fresh interpreter, as on a cold-started container. "lazy"
+imports the module as deployed, with analyzer plugins registered by
+metadata only; "eager" also loads every plugin straight away (radon
+included), which is what importing the module used to cost. The slowest
+modules of one lazy import are listed from python -X importtime.
+
+    PYTHONPATH=.:backend python backend/benchmarks/import_time.py --runs 15
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+ENV = {
+    **os.environ,
+    "PYTHONPATH": os.pathsep.join([str(BACKEND), str(BACKEND.parent), os.environ.get("PYTHONPATH", "")]),
+    "NEXUS_CACHE_DIR": "",
+}
+EAGER = "from app.tasks import orchestrator; orchestrator.plugin_manager.plugins"
+TARGETS = {"api (app.main)": "import app.main", "worker (app.tasks)": "import app.tasks"}
+
+
+def sample(statement: str) -> float:
+    """Seconds one fresh interpreter spends running statement, measured inside it."""
+    code = f"import time; _t = time.perf_counter(); {statement}; print(time.perf_counter() - _t)"
+    output = subprocess.run([sys.executable, "-c", code], env=ENV, check=True, capture_output=True, text=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def slowest_modules(statement: str, count: int) -> list[tuple[int, str]]:
+    """(cumulative microseconds, module) of the imports two levels deep with the largest cost."""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement], env=ENV, check=True, capture_output=True, text=True
+    )
+    rows = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip())) // 2  # -X importtime indents nested imports
+        if cumulative.strip().isdigit() and depth <= 1:
+            rows.append((int(cumulative), "  " * depth + name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    sample(TARGETS["worker (app.tasks)"])  # warm the bytecode cache
+    for label, statement in TARGETS.items():
+        for mode, code in (("lazy", statement), ("eager", f"{statement}; {EAGER}")):
+            times = sorted(sample(code) for _ in range(args.runs))
+            print(
+                f"{label:20} {mode:6} median {statistics.median(times) * 1000:7.1f} ms"
+                f"   min {times[0] * 1000:7.1f} ms   max {times[-1] * 1000:7.1f} ms"
+            )
+    print()
+    for label, statement in TARGETS.items():
+        print(f"slowest imports of {label}:")
+        for cumulative, name in slowest_modules(statement, args.top):
+            print(f"  {cumulative / 1000:7.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Load benchmark for GET /api/status/{job_id}: threadpool handler vs async handler.
+
+"before" is the status handler as it used to be, a sync function that loads
+the full report row through get_session() in Starlette's threadpool; "after"
+is the current async route. Both run in-process against the same file SQLite
+database, with many status polls in flight at once.
+
+    PYTHONPATH=.:backend python backend/benchmarks/status_load.py --requests 5000 --concurrency 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from uuid import uuid4
+
+BACKEND = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(BACKEND), str(BACKEND.parent)]
+os.environ.setdefault("NEXUS_DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/status-bench.db")
+os.environ["NEXUS_TASK_MODE"] = "inline"
+os.environ.setdefault("NEXUS_CACHE_DIR", "")
+
+import httpx  # noqa: E402
+from fastapi import HTTPException  # noqa: E402
+
+from app.db import async_engine, init_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import AnalysisStatus  # noqa: E402
+from app.repositories.reports import create_report, get_report, update_report_status  # noqa: E402
+
+LEGACY_PATH = "/bench/legacy-status"
+
+
+# Registered on the real app so both variants share its middleware stack.
+@app.get(LEGACY_PATH + "/{job_id}")
+def legacy_status(job_id: str) -> dict:
+    report = get_report(job_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    completed = report.status == AnalysisStatus.COMPLETED
+    return {"status": report.status.value, "progress": 100 if completed else 50, "message": report.summary}
+
+
+async def run_load(path: str, total: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    queue: asyncio.Queue[None] = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def worker() -> None:
+            while not queue.empty():
+                queue.get_nowait()
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=500)
+    args = parser.parse_args()
+
+    init_db()
+    job_id = uuid4().hex
+    create_report(job_id, "/bench", None)
+    update_report_status(job_id, AnalysisStatus.COMPLETED, summary="Analysis completed")
+    print(f"database: {os.environ['NEXUS_DATABASE_URL']} (async engine: {'yes' if async_engine else 'no'})")
+
+    asyncio.run(compare(job_id, args.requests, args.concurrency))
+
+
+async def compare(job_id: str, total: int, concurrency: int) -> None:
+    # One event loop for both runs: the async engine's pool is bound to it.
+    variants = (("before (sync, threadpool)", LEGACY_PATH), ("after (async)", "/api/status"))
+    for label, prefix in variants:
+        path = f"{prefix}/{job_id}"
+        await run_load(path, min(total, 200), concurrency)  # warm up
+        result = await run_load(path, total, concurrency)
+        print(
+            f"{label:28} {result['rps']:8.0f} req/s   p50 {result['p50_ms']:7.1f} ms   p99 {result['p99_ms']:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
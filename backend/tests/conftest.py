@@ -6,6 +6,7 @@ from fastapi.testclient import TestClient
 
 os.environ.setdefault("NEXUS_DATABASE_URL", "sqlite+pysqlite:///:memory:")
 os.environ.setdefault("NEXUS_ALLOWED_ROOT", os.getcwd())
+os.environ.setdefault("NEXUS_CACHE_DIR", "")
 
 from app.main import app  # noqa: E402
 from app.db import init_db  # noqa: E402
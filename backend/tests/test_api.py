@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 import os
 from pathlib import Path
 
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError
 
 
 def test_health_endpoint(client: TestClient) -> None:
@@ -22,3 +27,440 @@ def test_filesystem_listing(client: TestClient, tmp_path: Path, monkeypatch) ->
     payload = response.json()
     assert payload["path"] == "."
     assert any(entry["name"] == "project" for entry in payload["entries"])
+
+
+def test_inline_analysis_builds_on_previous_report(client: TestClient, tmp_path: Path, monkeypatch) -> None:
+    project = tmp_path / "web"
+    project.mkdir()
+    (project / "package.json").write_text("{}", encoding="utf-8")
+    (project / "index.js").write_text("if (ready) { start(); }\n", encoding="utf-8")
+    monkeypatch.setenv("NEXUS_ALLOWED_ROOT", str(tmp_path))
+    monkeypatch.setattr("app.api.routes.TASK_MODE", "inline")
+
+    first = client.post("/api/analyze", json={"projectPath": "web"}).json()["jobId"]
+    assert client.get(f"/api/status/{first}").json()["status"] == "completed"
+
+    (project / "index.js").write_text("if (ready) { start(); }\nstop();\n", encoding="utf-8")
+    second = client.post("/api/analyze", json={"projectPath": "web"}).json()["jobId"]
+    detail = client.get(f"/api/reports/{second}").json()
+    assert detail["baseJobId"] == first
+    assert detail["udm"]["summary"]["totalFiles"] == 1
+
+    fresh = client.post("/api/analyze", json={"projectPath": "web", "incremental": False}).json()["jobId"]
+    assert client.get(f"/api/reports/{fresh}").json()["baseJobId"] is None
+
+    foreign = client.post("/api/analyze", json={"projectPath": ".", "baseJobId": first})
+    assert foreign.status_code == 400
+
+
+def test_report_streams_as_json_or_ndjson(client: TestClient, tmp_path: Path, monkeypatch) -> None:
+    project = tmp_path / "svc"
+    project.mkdir()
+    (project / "package.json").write_text('{"dependencies": {"vue": "^3.5.0"}}', encoding="utf-8")
+    (project / "a.js").write_text("run();\n", encoding="utf-8")
+    (project / "b.js").write_text("if (x) { y(); }\n", encoding="utf-8")
+    monkeypatch.setenv("NEXUS_ALLOWED_ROOT", str(tmp_path))
+    monkeypatch.setattr("app.api.routes.TASK_MODE", "inline")
+
+    job_id = client.post("/api/analyze", json={"projectPath": "svc"}).json()["jobId"]
+
+    report = client.get(f"/api/report/{job_id}")
+    assert report.status_code == 200
+    udm = report.json()
+    assert udm["projectName"] == "svc"
+    assert sorted(unit["path"] for unit in udm["codeUnits"]) == ["a.js", "b.js"]
+    assert udm["summary"]["dependencyCount"] == 1
+
+    ndjson = client.get(f"/api/report/{job_id}", params={"format": "ndjson"})
+    assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+    kinds = [json.loads(line)["kind"] for line in ndjson.text.splitlines()]
+    assert kinds == ["header", "summary", "codeUnit", "codeUnit", "dependency"]
+
+
+def test_report_is_served_precompressed_with_strong_etag(client: TestClient, tmp_path: Path, monkeypatch) -> None:
+    project = tmp_path / "cached"
+    project.mkdir()
+    (project / "package.json").write_text("{}", encoding="utf-8")
+    (project / "main.js").write_text("if (a) { b(); }\n", encoding="utf-8")
+    monkeypatch.setenv("NEXUS_ALLOWED_ROOT", str(tmp_path))
+    monkeypatch.setattr("app.api.routes.TASK_MODE", "inline")
+
+    job_id = client.post("/api/analyze", json={"projectPath": "cached"}).json()["jobId"]
+
+    plain = client.get(f"/api/report/{job_id}", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["cache-control"] == "public, max-age=31536000, immutable"
+    etag = plain.headers["etag"]
+    assert etag == f'"{hashlib.sha256(plain.content).hexdigest()}"'
+
+    gzipped = client.get(f"/api/report/{job_id}", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["etag"] == etag[:-1] + '-gzip"'
+    assert "Accept-Encoding" in gzipped.headers["vary"]
+    assert gzipped.json() == plain.json()
+
+    revalidated = client.get(
+        f"/api/report/{job_id}", headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["etag"]}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+    detail = client.get(f"/api/reports/{job_id}")
+    assert detail.headers["etag"] == etag[:-1] + '-detail"'
+    assert client.get(f"/api/reports/{job_id}", headers={"If-None-Match": detail.headers["etag"]}).status_code == 304
+
+    projected = client.get(f"/api/report/{job_id}", params={"fields": "summary"})
+    assert "etag" not in projected.headers
+    assert projected.headers["cache-control"].endswith("immutable")
+
+
+def test_progress_is_pushed_as_server_sent_events(client: TestClient, tmp_path: Path, monkeypatch) -> None:
+    project = tmp_path / "live"
+    project.mkdir()
+    (project / "package.json").write_text("{}", encoding="utf-8")
+    (project / "index.js").write_text("start();\n", encoding="utf-8")
+    monkeypatch.setenv("NEXUS_ALLOWED_ROOT", str(tmp_path))
+    monkeypatch.setattr("app.api.routes.TASK_MODE", "inline")
+
+    job_id = client.post("/api/analyze", json={"projectPath": "live"}).json()["jobId"]
+    events = client.get(f"/api/status/{job_id}/events")
+    assert events.headers["content-type"].startswith("text/event-stream")
+    frames = [json.loads(line[len("data: "):]) for line in events.text.splitlines() if line.startswith("data: ")]
+    assert frames[-1]["status"] == "completed"
+    assert client.get("/api/status/unknown/events").status_code == 404
+
+    from app.progress import LocalProgressBroker, progress_event
+
+    broker = LocalProgressBroker()
+
+    async def listen() -> list:
+        received = []
+        async for event in broker.subscribe("job", heartbeat=0.01):
+            if event is None:
+                # Publish from another thread, as an inline analysis does.
+                await asyncio.to_thread(broker.publish, "job", progress_event("job", "running", 40, files_done=2))
+                await asyncio.to_thread(broker.publish, "job", progress_event("job", "completed", 100))
+                continue
+            received.append(event)
+            if event["status"] == "completed":
+                return received
+        return received
+
+    received = asyncio.run(listen())
+    assert [(event["status"], event["filesDone"]) for event in received] == [("running", 2), ("completed", None)]
+    assert broker.latest_event("job")["status"] == "completed"
+
+
+def test_legacy_udm_blob_is_migrated_to_tables(client: TestClient, monkeypatch) -> None:
+    from app.db import get_session
+    from app.models import AnalysisReport, AnalysisStatus, CodeUnitRecord
+    from app.repositories.reports import create_report, get_report
+    from app.repositories import udm as udm_module
+    from app.repositories.udm import migrate_legacy_reports
+    from sqlmodel import select
+
+    udm = {
+        "nexusVersion": "1.0.0",
+        "projectName": "legacy",
+        "languages": ["Python"],
+        "analysisTimestamp": "2024-05-01T10:00:00Z",
+        "summary": {"totalFiles": 2, "totalLinesOfCode": 30, "avgComplexity": 2.5, "dependencyCount": 1},
+        "codeUnits": [
+            {"id": "a", "type": "FILE", "path": "a.py", "metrics": {"loc": 10, "complexity": 2.0, "commentLines": None}},
+            {"id": "b", "type": "FILE", "path": "b.py", "metrics": {"loc": 20, "complexity": 3.0, "commentLines": None}},
+        ],
+        "dependencies": [
+            {"id": "requests", "name": "requests", "version": None, "type": "DIRECT", "license": None, "vulnerabilities": []}
+        ],
+        "connections": [{"sourceUnitId": "a", "targetUnitId": "b", "type": "IMPORT"}],
+    }
+    report = create_report("legacy-job", "/srv/legacy", None)
+    with get_session() as session:
+        stored = session.get(AnalysisReport, report.id)
+        stored.udm = udm
+        stored.status = AnalysisStatus.COMPLETED
+        session.add(stored)
+        session.commit()
+
+    def interrupted(payload: dict):
+        yield from list(records(payload))[:3]
+        raise RuntimeError("worker killed")
+
+    records = udm_module._payload_records
+    monkeypatch.setattr(udm_module, "_payload_records", interrupted)
+    with pytest.raises(RuntimeError):
+        migrate_legacy_reports(batch_size=1)
+    monkeypatch.setattr(udm_module, "_payload_records", records)
+    with get_session() as session:
+        assert not session.exec(select(CodeUnitRecord.id).where(CodeUnitRecord.report_id == report.id)).all()
+    assert get_report("legacy-job").udm == udm
+
+    assert migrate_legacy_reports(batch_size=1) == 1
+    assert migrate_legacy_reports() == 0
+    assert not get_report("legacy-job").udm
+    with get_session() as session:
+        paths = session.exec(select(CodeUnitRecord.path).where(CodeUnitRecord.report_id == report.id)).all()
+    assert sorted(paths) == ["a.py", "b.py"]
+
+    monkeypatch.setattr("app.api.routes.TASK_MODE", "inline")
+    assert client.get("/api/report/legacy-job").json() == udm
+
+
+def test_report_pages_filters_and_directory_levels(client: TestClient, tmp_path: Path, monkeypatch) -> None:
+    project = tmp_path / "paged"
+    (project / "src" / "lib").mkdir(parents=True)
+    (project / "package.json").write_text("{}", encoding="utf-8")
+    (project / "index.js").write_text("run();\n", encoding="utf-8")
+    (project / "src" / "app.js").write_text("if (a) { b(); }\nif (c) { d(); }\nfunction e() {}\n", encoding="utf-8")
+    (project / "src" / "lib" / "util.js").write_text("x();\ny();\n", encoding="utf-8")
+    monkeypatch.setenv("NEXUS_ALLOWED_ROOT", str(tmp_path))
+    monkeypatch.setattr("app.api.routes.TASK_MODE", "inline")
+    job_id = client.post("/api/analyze", json={"projectPath": "paged"}).json()["jobId"]
+
+    summary_only = client.get(f"/api/report/{job_id}", params={"fields": "projectName,summary"}).json()
+    assert set(summary_only) == {"projectName", "summary"}
+    assert client.get(f"/api/report/{job_id}", params={"fields": "bogus"}).status_code == 400
+
+    top = client.get(f"/api/report/{job_id}", params={"top": 1, "metrics": "loc", "fields": "codeUnits"}).json()
+    assert top["codeUnits"] == [{"id": "src.app", "type": "FILE", "path": "src/app.js", "metrics": {"loc": 3}}]
+
+    paths = []
+    cursor = None
+    while True:
+        params = {"limit": 1, "sort": "path", **({"cursor": cursor} if cursor else {})}
+        page = client.get(f"/api/reports/{job_id}/units", params=params).json()
+        paths.extend(unit["path"] for unit in page["items"])
+        cursor = page["nextCursor"]
+        if cursor is None:
+            break
+    assert paths == ["index.js", "src/app.js", "src/lib/util.js"]
+    assert client.get(f"/api/report/{job_id}/units", params={"cursor": "nope"}).status_code == 400
+
+    filtered = client.get(f"/api/report/{job_id}/units", params={"pathPrefix": "src/", "minComplexity": 2}).json()
+    assert [unit["path"] for unit in filtered["items"]] == ["src/app.js"]
+
+    root = client.get(f"/api/report/{job_id}/tree").json()
+    assert root["path"] == "."
+    assert [(entry["name"], entry["type"], entry["files"], entry["loc"]) for entry in root["entries"]] == [
+        ("src", "directory", 2, 5),
+        ("index.js", "file", 1, 1),
+    ]
+    nested = client.get(f"/api/reports/{job_id}/tree", params={"path": "src"}).json()
+    assert [entry["path"] for entry in nested["entries"]] == ["src/app.js", "src/lib"]
+
+
+def test_async_repositories_run_on_async_engine(tmp_path: Path, monkeypatch) -> None:
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel import SQLModel, create_engine
+
+    from app.models import AnalysisStatus
+    from app.repositories.reports import (
+        create_report_async,
+        find_latest_completed_job_id_async,
+        get_report_status_async,
+    )
+    from app.repositories.users import create_user_async, get_user_async
+
+    database = tmp_path / "async.db"
+    SQLModel.metadata.create_all(create_engine(f"sqlite:///{database}"))
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database}")
+    monkeypatch.setattr("app.db.async_engine", async_engine)
+
+    async def scenario() -> None:
+        user = await create_user_async("async@example.com", "Async")
+        assert (await get_user_async(user.id)).email == "async@example.com"
+        await create_report_async("async-job", "/async", user.id)
+        assert await get_report_status_async("async-job") == (AnalysisStatus.PENDING, None)
+        assert await get_report_status_async("missing") is None
+        assert await find_latest_completed_job_id_async("/async") is None
+        await async_engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_database_config_tunes_pool_and_sqlite_connections(tmp_path: Path, monkeypatch) -> None:
+    from dataclasses import replace
+
+    from sqlalchemy import text
+    from sqlalchemy.pool import StaticPool
+
+    from app.db import DatabaseConfig, create_db_engine
+
+    monkeypatch.setenv("NEXUS_DB_POOL_SIZE", "3")
+    monkeypatch.setenv("NEXUS_DB_MAX_OVERFLOW", "0")
+    monkeypatch.setenv("NEXUS_SQLITE_BUSY_TIMEOUT_MS", "1234")
+    config = replace(DatabaseConfig.from_env(), url=f"sqlite:///{tmp_path / 'tuned.db'}")
+
+    engine = create_db_engine(config)
+    assert engine.pool.size() == 3
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+    engine.dispose()
+
+    memory = create_db_engine(replace(config, url="sqlite+pysqlite:///:memory:"))
+    assert isinstance(memory.pool, StaticPool)
+
+    # A typo in a pool setting is logged and the default used, rather than failing init_db.
+    monkeypatch.setenv("NEXUS_DB_POOL_TIMEOUT", "30s")
+    monkeypatch.setenv("NEXUS_DB_POOL_SIZE", "0")
+    malformed = DatabaseConfig.from_env()
+    assert (malformed.pool_timeout, malformed.pool_size) == (DatabaseConfig.pool_timeout, DatabaseConfig.pool_size)
+
+
+def test_malformed_settings_fall_back_to_defaults(monkeypatch, caplog) -> None:
+    from app.settings import env_choice, env_number
+
+    monkeypatch.setenv("NEXUS_PLUGIN_WORKERS", "four")
+    monkeypatch.setenv("NEXUS_ANALYSIS_TIME_BUDGET", " 90 ")
+    monkeypatch.setenv("NEXUS_PLUGIN_EXECUTOR", "fork")
+    monkeypatch.setenv("NEXUS_CANCEL_POLL_INTERVAL", "-1")
+    assert env_number("NEXUS_PLUGIN_WORKERS", 0, int) == 0
+    assert env_number("NEXUS_ANALYSIS_TIME_BUDGET", 0.0, float) == 90.0
+    assert env_choice("NEXUS_PLUGIN_EXECUTOR", "thread", ("thread", "process")) == "thread"
+    assert env_number("NEXUS_CANCEL_POLL_INTERVAL", 1.0, float, minimum=0.0) == 1.0
+    for name in ("NEXUS_PLUGIN_WORKERS", "NEXUS_PLUGIN_EXECUTOR", "NEXUS_CANCEL_POLL_INTERVAL"):
+        assert name in caplog.text
+
+
+def test_analyses_stop_on_budget_or_cancellation(client: TestClient, tmp_path: Path, monkeypatch) -> None:
+    from app.repositories.reports import create_report
+    from app.tasks import perform_analysis
+
+    project = tmp_path / "big"
+    project.mkdir()
+    (project / "package.json").write_text("{}", encoding="utf-8")
+    for index in range(5):
+        (project / f"m{index}.js").write_text("run();\n", encoding="utf-8")
+    monkeypatch.setenv("NEXUS_ALLOWED_ROOT", str(tmp_path))
+    monkeypatch.setattr("app.api.routes.TASK_MODE", "inline")
+
+    job_id = client.post("/api/analyze", json={"projectPath": "big", "fileBudget": 2}).json()["jobId"]
+    job = client.get(f"/api/status/{job_id}").json()
+    assert job["status"] == "completed" and "file budget of 2 files" in job["message"]
+    udm = client.get(f"/api/report/{job_id}").json()
+    assert udm["summary"]["truncated"] == "fileBudget"
+    assert [unit["path"] for unit in udm["codeUnits"]] == ["m0.js", "m1.js"]
+
+    assert client.delete(f"/api/analyze/{job_id}").status_code == 409
+    assert client.delete("/api/analyze/missing").status_code == 404
+
+    create_report("queued-job", str(project), None)
+    cancelled = client.delete("/api/analyze/queued-job")
+    assert cancelled.status_code == 202 and cancelled.json()["status"] == "failed"
+    perform_analysis("queued-job", str(project))  # the worker skips it
+    assert client.get("/api/status/queued-job").json()["message"] == "Analysis cancelled"
+
+
+def test_identical_analysis_requests_share_one_job(client: TestClient, tmp_path: Path, monkeypatch) -> None:
+    from app.api.routes import probe_project
+    from app.repositories.reports import create_report
+
+    project = tmp_path / "popular"
+    project.mkdir()
+    (project / "package.json").write_text("{}", encoding="utf-8")
+    (project / "index.js").write_text("start();\n", encoding="utf-8")
+    monkeypatch.setenv("NEXUS_ALLOWED_ROOT", str(tmp_path))
+    monkeypatch.setattr("app.api.routes.TASK_MODE", "inline")
+
+    first = client.post("/api/analyze", json={"projectPath": "popular"}).json()
+    assert first["shared"] is False
+    again = client.post("/api/analyze", json={"projectPath": "popular"}).json()
+    assert again["jobId"] == first["jobId"] and again["shared"] is True
+
+    monkeypatch.setattr("app.api.routes.REUSE_WINDOW", 0)
+    fresh = client.post("/api/analyze", json={"projectPath": "popular"}).json()
+    assert fresh["jobId"] != first["jobId"] and fresh["shared"] is False
+
+    # An identical job still in flight is joined even without a freshness window.
+    probe = asyncio.run(probe_project(str(project)))
+    create_report("in-flight", str(project), None, fingerprint=probe.fingerprint)
+    assert client.post("/api/analyze", json={"projectPath": "popular"}).json()["jobId"] == "in-flight"
+
+    (project / "index.js").write_text("start();\nstop();\n", encoding="utf-8")
+    changed = client.post("/api/analyze", json={"projectPath": "popular"}).json()
+    assert changed["jobId"] not in {"in-flight", first["jobId"]}
+
+    # Another API process may register the identical job after this one looked; the unique
+    # in-flight index still lets only one job through, and the loser shares it.
+    async def lookup_too_early(*_args) -> None:
+        return None
+
+    probe = asyncio.run(probe_project(str(project)))
+    create_report("racer", str(project), None, fingerprint=probe.fingerprint)
+    monkeypatch.setattr("app.api.routes.find_shared_job_id_async", lookup_too_early)
+    raced = client.post("/api/analyze", json={"projectPath": "popular"}).json()
+    assert raced["jobId"] == "racer" and raced["shared"] is True
+    with pytest.raises(IntegrityError):
+        create_report("duplicate", str(project), None, fingerprint=probe.fingerprint)
+
+
+def test_jobs_are_routed_by_size_and_limited_per_user(client: TestClient, tmp_path: Path, monkeypatch) -> None:
+    from uuid import UUID
+
+    from app.celery_app import LARGE_QUEUE, SMALL_QUEUE
+    from app.repositories.reports import create_report
+    from app.scheduling import route_job
+
+    monkeypatch.setattr("app.scheduling.LARGE_PROJECT_FILES", 3)
+    assert route_job(2) == route_job(2, 0) and route_job(2).queue == SMALL_QUEUE
+    assert route_job(2, active_jobs=2).priority == 2
+    assert route_job(3).queue == LARGE_QUEUE and route_job(3, active_jobs=9).priority == 9
+
+    project = tmp_path / "svc"
+    project.mkdir()
+    (project / "package.json").write_text("{}", encoding="utf-8")
+    (project / "a.js").write_text("run();\n", encoding="utf-8")
+    monkeypatch.setenv("NEXUS_ALLOWED_ROOT", str(tmp_path))
+    monkeypatch.setattr("app.api.routes.TASK_MODE", "inline")
+    monkeypatch.setattr("app.scheduling.USER_MAX_ACTIVE_JOBS", 1)
+    user = client.post("/api/users", json={"email": "busy@example.com", "displayName": "Busy"}).json()
+
+    job = client.post("/api/analyze", json={"projectPath": "svc", "userId": user["id"]}).json()
+    assert job["queue"] == SMALL_QUEUE
+
+    create_report("queued", "/elsewhere", UUID(user["id"]), queue=LARGE_QUEUE)
+    (project / "a.js").write_text("run();\nrun();\n", encoding="utf-8")
+    limited = client.post("/api/analyze", json={"projectPath": "svc", "userId": user["id"]})
+    assert limited.status_code == 429 and limited.headers["retry-after"] == "30"
+
+    queues = {item["name"]: item for item in client.get("/api/queues").json()["queues"]}
+    assert queues[LARGE_QUEUE]["depth"] == 1 and queues[LARGE_QUEUE]["oldestWaitSeconds"] >= 0
+    assert queues[SMALL_QUEUE]["started"] >= 1 and queues[SMALL_QUEUE]["depth"] == 0
+
+
+def test_batch_analyses_projects_found_below_root(client: TestClient, tmp_path: Path, monkeypatch) -> None:
+    from app.scheduling import batch_lanes
+
+    assert batch_lanes(list(range(5)), 2) == [[0, 2, 4], [1, 3]]
+    assert batch_lanes([1], 4) == [[1]] and batch_lanes([], 4) == []
+
+    services = tmp_path / "services"
+    for name in ("api", "web", "worker"):
+        (services / name).mkdir(parents=True)
+        (services / name / "package.json").write_text("{}", encoding="utf-8")
+        (services / name / "index.js").write_text("run();\n", encoding="utf-8")
+    (services / "web" / "node_modules" / "dep").mkdir(parents=True)
+    (services / "web" / "node_modules" / "dep" / "package.json").write_text("{}", encoding="utf-8")
+    (services / "docs").mkdir()
+    monkeypatch.setenv("NEXUS_ALLOWED_ROOT", str(tmp_path))
+    monkeypatch.setattr("app.api.routes.TASK_MODE", "inline")
+
+    assert client.post("/api/batches", json={"root": "services", "projectPaths": ["services/api"]}).status_code == 422
+    batch = client.post("/api/batches", json={"root": "services", "parallelism": 2}).json()
+    assert batch["parallelism"] == 2
+    assert [Path(job["projectPath"]).name for job in batch["jobs"]] == ["api", "web", "worker"]
+
+    state = client.get(f"/api/batches/{batch['batchId']}").json()
+    assert state["status"] == "completed" and state["completedAt"] is not None
+    assert (state["total"], state["completed"], state["pending"]) == (3, 3, 0)
+    for job in batch["jobs"]:
+        assert client.get(f"/api/status/{job['jobId']}").json()["status"] == "completed"
+
+    again = client.post("/api/batches", json={"projectPaths": ["services/api", "services/api/"]}).json()
+    assert len(again["jobs"]) == 1
+    jobs = client.get(f"/api/batches/{again['batchId']}").json()["jobs"]
+    assert jobs[0]["baseJobId"] == batch["jobs"][0]["jobId"]
+    assert client.get("/api/batches/unknown").status_code == 404
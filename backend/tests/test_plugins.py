@@ -1,10 +1,24 @@
 from __future__ import annotations
 
+import json
+import os
+import shutil
+import struct
+import subprocess
 import sys
 from pathlib import Path
 
+import pytest
+
+from app.core.budget import AnalysisBudget
+from app.core.cache import DEFAULT_MAX_ENTRIES, MetricsCache
+from app.core.discovery import root_scan
+from app.core.gitrepo import GitFingerprints, GitIndexError, GitWorkTree, parse_index
 from app.core.orchestrator import AnalysisOrchestrator
-from app.core.plugins import PluginManager
+from app.core.plugins import PluginManager, PluginSpec
+from app.core.serialize import dump_line, iter_udm_json, iter_udm_ndjson
+from app.core.stream import SECTIONS
+from app.core.walker import scan_tree
 
 PY_PLUGIN_SRC = Path(__file__).resolve().parents[2] / "plugins" / "python_analyzer" / "src"
 JS_PLUGIN_SRC = Path(__file__).resolve().parents[2] / "plugins" / "javascript_analyzer" / "src"
@@ -15,7 +29,9 @@ for plugin_src in (PY_PLUGIN_SRC, JS_PLUGIN_SRC, JAVA_PLUGIN_SRC):
         sys.path.append(str(plugin_src))
 
 from nexus_analyzer_python.plugin import PythonAnalyzer  # type: ignore  # noqa: E402
-from nexus_analyzer_java.plugin import JavaAnalyzer  # type: ignore  # noqa: E402
+from nexus_analyzer_java.declarations import Unresolved, declarations  # type: ignore  # noqa: E402
+from nexus_analyzer_java.plugin import SCANNER, JavaAnalyzer  # type: ignore  # noqa: E402
+from nexus_analyzer_javascript.plugin import JavaScriptAnalyzer  # type: ignore  # noqa: E402
 
 
 def test_python_analyzer_reports_code_units(tmp_path: Path) -> None:
@@ -46,6 +62,85 @@ def test_python_analyzer_reports_code_units(tmp_path: Path) -> None:
     assert any(unit.path.endswith("module.py") for unit in udm.codeUnits)
 
 
+def test_python_analyzer_reports_class_and_function_units(tmp_path: Path) -> None:
+    project_dir = tmp_path / "units"
+    project_dir.mkdir()
+    (project_dir / "requirements.txt").write_text("", encoding="utf-8")
+    (project_dir / "shapes.py").write_text(
+        "class Box:\n"
+        "    @property\n"
+        "    def size(self):\n"
+        "        return self._size\n"
+        "\n"
+        "    @size.setter\n"
+        "    def size(self, value):\n"
+        "        if value < 0:\n"
+        "            raise ValueError(value)\n"
+        "        self._size = value\n"
+        "\n"
+        "\n"
+        "def area(box):\n"
+        "    def half(x):\n"
+        "        return x / 2 if x else 0\n"
+        "    return half(box.size) * 2\n",
+        encoding="utf-8",
+    )
+
+    manager = PluginManager()
+    manager.register(PythonAnalyzer(workers=1))
+    udm = AnalysisOrchestrator(plugin_manager=manager).analyze(str(project_dir))
+
+    units = {unit.id: (unit.type.value, unit.path, unit.metrics.loc, unit.metrics.complexity) for unit in udm.codeUnits}
+    assert units == {
+        "shapes": ("FILE", "shapes.py", 16, 1.75),
+        "shapes.Box": ("CLASS", "shapes.py", 10, 3.0),
+        "shapes.Box.size": ("FUNCTION", "shapes.py", 2, 1.0),
+        "shapes.Box.size@7": ("FUNCTION", "shapes.py", 4, 2.0),
+        "shapes.area": ("FUNCTION", "shapes.py", 4, 1.0),
+        "shapes.area.half": ("FUNCTION", "shapes.py", 2, 2.0),
+    }
+    assert udm.summary.totalFiles == 1 and udm.summary.totalLinesOfCode == 16
+
+
+def test_python_analyzer_connects_imported_project_modules(tmp_path: Path) -> None:
+    project_dir = tmp_path / "graph"
+    package = project_dir / "src" / "shop"
+    (package / "billing").mkdir(parents=True)
+    (project_dir / "pyproject.toml").write_text("[project]\nname='shop'\n", encoding="utf-8")
+    (package / "__init__.py").write_text("from .models import Order\n", encoding="utf-8")
+    (package / "models.py").write_text("import json\nimport shop.models\n", encoding="utf-8")
+    (package / "billing" / "__init__.py").write_text("", encoding="utf-8")
+    (package / "billing" / "invoice.py").write_text(
+        "import os\n"
+        "from .. import models\n"
+        "from . import tax, missing\n"
+        "from shop.models import Order\n"
+        "def render():\n"
+        "    import shop.billing\n",
+        encoding="utf-8",
+    )
+    (package / "billing" / "tax.py").write_text("from shop import *\n", encoding="utf-8")
+    (project_dir / "manage.py").write_text("import shop.billing.invoice.render\n", encoding="utf-8")
+
+    manager = PluginManager()
+    manager.register(PythonAnalyzer(workers=1))
+    orchestrator = AnalysisOrchestrator(plugin_manager=manager)
+    udm = orchestrator.analyze(str(project_dir))
+
+    edges = [(edge.sourceUnitId, edge.targetUnitId, edge.type.value) for edge in udm.connections]
+    assert edges == [
+        ("manage", "src.shop.billing.invoice", "IMPORT"),
+        ("src.shop.__init__", "src.shop.models", "IMPORT"),
+        ("src.shop.billing.invoice", "src.shop.billing.__init__", "IMPORT"),
+        ("src.shop.billing.invoice", "src.shop.billing.tax", "IMPORT"),
+        ("src.shop.billing.invoice", "src.shop.models", "IMPORT"),
+        ("src.shop.billing.tax", "src.shop.__init__", "IMPORT"),
+    ]
+    unit_ids = {unit.id for unit in udm.codeUnits}
+    assert {target for _, target, _ in edges} <= unit_ids
+    assert orchestrator.analyze(str(project_dir)).connections == udm.connections
+
+
 def test_java_analyzer_handles_pom(tmp_path: Path) -> None:
     project_dir = tmp_path / "java-demo"
     src_dir = project_dir / "src" / "main" / "java" / "example"
@@ -84,3 +179,541 @@ def test_java_analyzer_handles_pom(tmp_path: Path) -> None:
     assert udm.projectName == "java-demo"
     assert udm.summary.totalFiles == 1
     assert any(dep.name.startswith("com.example:demo") or dep.name.startswith("org.springframework") for dep in udm.dependencies)
+
+
+def test_java_analyzer_reports_types_imports_and_inheritance(tmp_path: Path) -> None:
+    project_dir = tmp_path / "shapes"
+    src_dir = project_dir / "src" / "com" / "acme"
+    files = {
+        "shape/Shape.java": "package com.acme.shape;\npublic abstract class Shape implements Drawable {}\n",
+        "shape/Drawable.java": "package com.acme.shape;\npublic interface Drawable { void draw(); }\n",
+        "shape/Sized.java": "package com.acme.shape;\npublic interface Sized<T> extends Comparable<T> {}\n",
+        "util/Maths.java": "package com.acme.util;\npublic final class Maths { public static int square(int x) { return x * x; } }\n",
+        "app/Circle.java": (
+            "package com.acme.app;\n"
+            "import java.util.List;\n"
+            "import com.acme.shape.*;\n"
+            "import static com.acme.util.Maths.square;\n"
+            "/* class Fake extends Shape { */\n"
+            "public final class Circle<T extends Number> extends Shape\n"
+            "        implements com.acme.shape.Sized<Circle<T>>, Node.Visitor {\n"
+            "    String label = \"class Label extends Circle {\";\n"
+            "    public void draw() { if (square(1) > 0 && label != null) { } }\n"
+            "    interface Node { interface Visitor {} }\n"
+            "    record Point(int x, int y) implements Node {}\n"
+            "}\n"
+        ),
+    }
+    for rel, content in files.items():
+        (src_dir / rel).parent.mkdir(parents=True, exist_ok=True)
+        (src_dir / rel).write_text(content, encoding="utf-8")
+    (project_dir / "pom.xml").write_text("<project/>", encoding="utf-8")
+
+    manager = PluginManager()
+    manager.register(JavaAnalyzer())
+    udm = AnalysisOrchestrator(plugin_manager=manager).analyze(str(project_dir))
+
+    types = {unit.id: unit.type.value for unit in udm.codeUnits if unit.type.value != "FILE"}
+    assert types == {
+        "src.com.acme.app.Circle.Circle": "CLASS",
+        "src.com.acme.app.Circle.Circle.Node": "INTERFACE",
+        "src.com.acme.app.Circle.Circle.Node.Visitor": "INTERFACE",
+        "src.com.acme.app.Circle.Circle.Point": "CLASS",
+        "src.com.acme.shape.Drawable.Drawable": "INTERFACE",
+        "src.com.acme.shape.Shape.Shape": "CLASS",
+        "src.com.acme.shape.Sized.Sized": "INTERFACE",
+        "src.com.acme.util.Maths.Maths": "CLASS",
+    }
+    circle = next(unit for unit in udm.codeUnits if unit.id == "src.com.acme.app.Circle")
+    assert circle.metrics.complexity == 1.5
+
+    edges = sorted((edge.sourceUnitId, edge.targetUnitId, edge.type.value) for edge in udm.connections)
+    assert edges == [
+        ("src.com.acme.app.Circle", "src.com.acme.util.Maths.Maths", "IMPORT"),
+        ("src.com.acme.app.Circle.Circle", "src.com.acme.app.Circle.Circle.Node.Visitor", "IMPLEMENTATION"),
+        ("src.com.acme.app.Circle.Circle", "src.com.acme.shape.Shape.Shape", "INHERITANCE"),
+        ("src.com.acme.app.Circle.Circle", "src.com.acme.shape.Sized.Sized", "IMPLEMENTATION"),
+        ("src.com.acme.app.Circle.Circle.Point", "src.com.acme.app.Circle.Circle.Node", "IMPLEMENTATION"),
+        ("src.com.acme.shape.Shape.Shape", "src.com.acme.shape.Drawable.Drawable", "IMPLEMENTATION"),
+    ]
+
+    # Until the index is complete only the names a file refers to are held, not its declarations.
+    drawable = declarations(SCANNER.scan(files["shape/Drawable.java"]).captured)
+    assert Unresolved.of("Drawable", drawable) is None
+    shape = declarations(SCANNER.scan(files["shape/Shape.java"]).captured)
+    assert Unresolved.of("Shape", shape) == ("Shape", "com.acme.shape", (), (("Shape", (), ("Drawable",)),))
+
+
+def test_java_types_declared_twice_keep_their_own_supertypes(tmp_path: Path) -> None:
+    project_dir = tmp_path / "modules"
+    files = {
+        "api/src/com/acme/Base.java": "package com.acme;\npublic class Base {}\n",
+        "api/src/com/acme/Marker.java": "package com.acme;\npublic interface Marker {}\n",
+        "api/src/com/acme/Dup.java": "package com.acme;\npublic class Dup extends Base {}\n",
+        "stubs/src/com/acme/Dup.java": "package com.acme;\npublic class Dup implements Marker {}\n",
+    }
+    for rel, content in files.items():
+        (project_dir / rel).parent.mkdir(parents=True, exist_ok=True)
+        (project_dir / rel).write_text(content, encoding="utf-8")
+    (project_dir / "pom.xml").write_text("<project/>", encoding="utf-8")
+
+    payload = JavaAnalyzer().analyze(str(project_dir))
+
+    edges = sorted((edge["sourceUnitId"], edge["targetUnitId"], edge["type"]) for edge in payload["connections"])
+    assert edges == [
+        ("api.src.com.acme.Dup.Dup", "api.src.com.acme.Base.Base", "INHERITANCE"),
+        ("stubs.src.com.acme.Dup.Dup", "api.src.com.acme.Marker.Marker", "IMPLEMENTATION"),
+    ]
+
+
+def test_scan_tree_prunes_skipped_directories(tmp_path: Path) -> None:
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "index.ts").write_text("export const a = 1;\n", encoding="utf-8")
+    (tmp_path / "src" / "App.VUE").write_text("<template></template>\n", encoding="utf-8")
+    vendored = tmp_path / "node_modules" / "left-pad"
+    vendored.mkdir(parents=True)
+    (vendored / "index.js").write_text("module.exports = 1;\n", encoding="utf-8")
+
+    index = scan_tree(tmp_path, skip_dirs={"node_modules"}, extensions={".ts", ".vue", ".js"})
+
+    assert index.select({".ts", ".vue", ".js"}) == [str(Path("src") / "App.VUE"), str(Path("src") / "index.ts")]
+    assert index.select({".js"}) == []
+
+
+def test_javascript_analyzer_ignores_node_modules(tmp_path: Path) -> None:
+    project_dir = tmp_path / "web"
+    (project_dir / "src").mkdir(parents=True)
+    (project_dir / "package.json").write_text('{"dependencies": {"vue": "^3.5.0"}}', encoding="utf-8")
+    (project_dir / "src" / "main.js").write_text("if (a && b) { run(); }\n", encoding="utf-8")
+    vendored = project_dir / "node_modules" / "vue"
+    vendored.mkdir(parents=True)
+    (vendored / "index.js").write_text("module.exports = {};\n", encoding="utf-8")
+
+    manager = PluginManager()
+    manager.register(JavaScriptAnalyzer())
+    udm = AnalysisOrchestrator(plugin_manager=manager).analyze(str(project_dir))
+
+    assert [unit.path for unit in udm.codeUnits] == [str(Path("src") / "main.js")]
+    assert udm.summary.dependencyCount == 1
+
+
+def test_clike_metrics_skip_keywords_in_comments_and_strings(tmp_path: Path) -> None:
+    project_dir = tmp_path / "web"
+    project_dir.mkdir()
+    (project_dir / "package.json").write_text("{}", encoding="utf-8")
+    source = (
+        "// if this is for you\n"
+        "\n"
+        "const label = 'if ' + \"while\";\n"
+        "const tpl = `for\n"
+        "\n"
+        "case`;\n"
+        "/* switch\n"
+        "   catch */ if (a && b) { run(() => 1); }\n"
+        "const notify = elsewhere;\n"
+    )
+    (project_dir / "main.js").write_text(source, encoding="utf-8")
+
+    manager = PluginManager()
+    manager.register(JavaScriptAnalyzer())
+    udm = AnalysisOrchestrator(plugin_manager=manager).analyze(str(project_dir))
+
+    metrics = udm.codeUnits[0].metrics
+    assert metrics.loc == sum(1 for line in source.splitlines() if line.strip())
+    assert metrics.comment_lines == 3
+    # Only the code outside comments and strings counts: "=>" adds one, "if" and "&&" half each.
+    assert metrics.complexity == 2.0
+
+
+def test_javascript_analyzer_resolves_imports_and_tsconfig_aliases(tmp_path: Path) -> None:
+    project_dir = tmp_path / "web"
+    files = {
+        "package.json": '{"dependencies": {"vue": "^3.5.0"}}',
+        "tsconfig.base.json": '{\n  // shared by every package\n  "compilerOptions": {"paths": {"@/*": ["src/*"],},},\n}',
+        "tsconfig.json": '{"extends": "./tsconfig.base", "compilerOptions": {"baseUrl": "."}}',
+        "config.js": "module.exports = {};\n",
+        "src/main.ts": (
+            "import { createApp } from 'vue';\n"
+            "import App from './App.vue';\n"
+            "import { slug } from '@/utils';\n"
+            "import './lib/helper.js';\n"
+            "export * from './types';\n"
+            "// import Old from './old';\n"
+            "const note = \"from './old'\";\n"
+            "const config = require('../config');\n"
+            "const lazy = () => import('./lazy');\n"
+        ),
+        "src/App.vue": "<script setup lang=\"ts\">\nimport { slug } from '@/utils/index';\n</script>\n",
+        "src/utils/index.ts": "export const slug = (s: string) => s;\n",
+        "src/lib/helper.ts": "import { slug } from 'src/utils';\n",
+        "src/types.ts": "export type Id = string;\n",
+        "src/lazy.tsx": "export default 1;\n",
+        "src/old.ts": "export default 0;\n",
+    }
+    for rel, content in files.items():
+        (project_dir / rel).parent.mkdir(parents=True, exist_ok=True)
+        (project_dir / rel).write_text(content, encoding="utf-8")
+
+    manager = PluginManager()
+    manager.register(JavaScriptAnalyzer())
+    udm = AnalysisOrchestrator(plugin_manager=manager).analyze(str(project_dir))
+
+    edges = [(edge.sourceUnitId, edge.targetUnitId, edge.type.value) for edge in udm.connections]
+    assert edges == [
+        ("src.App", "src.utils.index", "IMPORT"),
+        ("src.lib.helper", "src.utils.index", "IMPORT"),
+        ("src.main", "config", "IMPORT"),
+        ("src.main", "src.App", "IMPORT"),
+        ("src.main", "src.lazy", "IMPORT"),
+        ("src.main", "src.lib.helper", "IMPORT"),
+        ("src.main", "src.types", "IMPORT"),
+        ("src.main", "src.utils.index", "IMPORT"),
+    ]
+
+
+def test_orchestrator_merges_polyglot_reports(tmp_path: Path) -> None:
+    project_dir = tmp_path / "polyglot"
+    (project_dir / "web").mkdir(parents=True)
+    (project_dir / "requirements.txt").write_text("requests==2.31.0\n", encoding="utf-8")
+    (project_dir / "package.json").write_text('{"dependencies": {"vue": "^3.5.0"}}', encoding="utf-8")
+    (project_dir / "app.py").write_text("def run(flag):\n    if flag:\n        return 1\n    return 0\n", encoding="utf-8")
+    (project_dir / "web" / "main.js").write_text("function go() { return 1; }\n", encoding="utf-8")
+
+    manager = PluginManager()
+    manager.register(PythonAnalyzer())
+    manager.register(JavaScriptAnalyzer())
+
+    for executor in ("thread", "serial"):
+        udm = AnalysisOrchestrator(plugin_manager=manager, executor=executor).analyze(str(project_dir))
+
+        assert udm.languages == ["Python", "JavaScript"]
+        assert sorted(unit.path for unit in udm.codeUnits if unit.type == "FILE") == ["app.py", str(Path("web") / "main.js")]
+        assert udm.summary.totalFiles == 2
+        assert udm.summary.totalLinesOfCode == 5
+        assert udm.summary.avgComplexity == 1.5
+        assert udm.summary.dependencyCount == 2
+
+
+def test_streamed_report_round_trips_through_sections(tmp_path: Path) -> None:
+    project_dir = tmp_path / "sectioned"
+    project_dir.mkdir()
+    (project_dir / "package.json").write_text('{"dependencies": {"vue": "^3.5.0"}}', encoding="utf-8")
+    for idx in range(20):
+        (project_dir / f"m{idx}.js").write_text("function f() { return 1; }\n", encoding="utf-8")
+
+    manager = PluginManager()
+    manager.register(JavaScriptAnalyzer())
+    orchestrator = AnalysisOrchestrator(plugin_manager=manager)
+    stream = orchestrator.stream(str(project_dir))
+
+    # One block per record, as a table-backed reader yields one per fetched batch.
+    blocks: dict = {}
+    for kind, value in stream:
+        blocks.setdefault(SECTIONS.get(kind, kind), []).append(dump_line(value))
+    assert len(blocks["codeUnits"]) == 20
+    assert stream.summary["totalFiles"] == 20
+
+    document = json.loads("".join(iter_udm_json(lambda section: blocks.get(section, []))))
+    expected = orchestrator.analyze(str(project_dir)).model_dump(mode="json", by_alias=True)
+    assert document["summary"] == expected["summary"]
+    assert document["codeUnits"] == expected["codeUnits"]
+    assert document["dependencies"] == expected["dependencies"]
+    assert document["languages"] == ["JavaScript"]
+
+    records = [json.loads(line) for line in "".join(iter_udm_ndjson(lambda s: blocks.get(s, []))).splitlines()]
+    assert [record["kind"] for record in records[:2]] == ["header", "summary"]
+    assert sum(record["kind"] == "codeUnit" for record in records) == 20
+
+
+def test_python_analyzer_parallel_matches_serial(tmp_path: Path, monkeypatch) -> None:
+    project_dir = tmp_path / "sharded"
+    project_dir.mkdir()
+    (project_dir / "pyproject.toml").write_text("[project]\nname='sharded'\n", encoding="utf-8")
+    for idx in range(12):
+        branches = "".join(f"    if value == {n}:\n        return {n}\n" for n in range(idx % 4))
+        (project_dir / f"mod_{idx}.py").write_text(f"def f(value):\n{branches}    return -1\n", encoding="utf-8")
+
+    serial = PythonAnalyzer(workers=1).analyze(str(project_dir))
+    parallel = PythonAnalyzer(workers=2, parallel_threshold=4, chunk_size=3).analyze(str(project_dir))
+
+    assert parallel["codeUnits"] == serial["codeUnits"]
+    assert parallel["summary"] == serial["summary"]
+
+    # A malformed or negative worker setting falls back to the CPU count rather than failing the job.
+    for value in ("four", "-2"):
+        monkeypatch.setenv("NEXUS_PYTHON_WORKERS", value)
+        assert PythonAnalyzer().workers == (os.cpu_count() or 1)
+
+
+def test_metrics_cache_reuses_unchanged_files(tmp_path: Path, monkeypatch) -> None:
+    project_dir = tmp_path / "cached"
+    project_dir.mkdir()
+    (project_dir / "package.json").write_text("{}", encoding="utf-8")
+    (project_dir / "a.js").write_text("if (x) { y(); }\n", encoding="utf-8")
+    (project_dir / "b.js").write_text("while (x) { y(); }\n", encoding="utf-8")
+
+    cache = MetricsCache(tmp_path / "cache" / "metrics.sqlite3", max_entries=10)
+    manager = PluginManager()
+    manager.register(JavaScriptAnalyzer())
+    orchestrator = AnalysisOrchestrator(plugin_manager=manager, cache=cache)
+
+    first = orchestrator.analyze(str(project_dir))
+    assert cache.snapshot() == {"hits": 0, "misses": 2, "evictions": 0}
+
+    (project_dir / "b.js").write_text("while (x) { if (y) { z(); } }\n", encoding="utf-8")
+    second = orchestrator.analyze(str(project_dir))
+
+    assert cache.snapshot() == {"hits": 1, "misses": 3, "evictions": 0}
+    assert first.codeUnits[0] == second.codeUnits[0]
+    assert second.codeUnits[1].metrics.complexity == 1.0
+
+    cache.max_entries = 2
+    (project_dir / "c.js").write_text("run();\n", encoding="utf-8")
+    orchestrator.analyze(str(project_dir))
+    assert cache.stats.evictions == 2
+
+    # A malformed entry limit is logged and replaced by the default instead of failing every job.
+    monkeypatch.setenv("NEXUS_CACHE_DIR", str(tmp_path / "env-cache"))
+    monkeypatch.setenv("NEXUS_CACHE_MAX_ENTRIES", "200k")
+    assert MetricsCache.from_env().max_entries == DEFAULT_MAX_ENTRIES
+
+
+def test_incremental_run_only_measures_changed_files(tmp_path: Path, monkeypatch) -> None:
+    project_dir = tmp_path / "incremental"
+    project_dir.mkdir()
+    (project_dir / "package.json").write_text("{}", encoding="utf-8")
+    (project_dir / "a.js").write_text("if (x) { y(); }\n", encoding="utf-8")
+    (project_dir / "b.js").write_text("run();\n", encoding="utf-8")
+
+    measured: list[list[str]] = []
+    original = JavaScriptAnalyzer._measure
+
+    def spy(self, root, rel_paths, progress):
+        measured.append(list(rel_paths))
+        return original(self, root, rel_paths, progress)
+
+    monkeypatch.setattr(JavaScriptAnalyzer, "_measure", spy)
+    manager = PluginManager()
+    manager.register(JavaScriptAnalyzer())
+    orchestrator = AnalysisOrchestrator(plugin_manager=manager)
+
+    first = orchestrator.run(str(project_dir))
+    (project_dir / "b.js").write_text("run();\nrun();\n", encoding="utf-8")
+    (project_dir / "c.js").write_text("go();\n", encoding="utf-8")
+    second = orchestrator.run(str(project_dir), baseline=first.file_state)
+
+    assert measured == [["a.js", "b.js"], ["b.js", "c.js"]]
+    assert [unit.path for unit in second.udm.codeUnits] == ["a.js", "b.js", "c.js"]
+    assert second.udm.summary.totalLinesOfCode == 4
+    assert set(second.file_state["JavaScript"]["files"]) == {"a.js", "b.js", "c.js"}
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git executable not available")
+def test_git_fingerprints_use_index_blob_ids(tmp_path: Path) -> None:
+    repo = tmp_path / "repo"
+    project_dir = repo / "services" / "web"
+    project_dir.mkdir(parents=True)
+    (project_dir / "package.json").write_text("{}", encoding="utf-8")
+    (project_dir / "a.js").write_text("if (x) { y(); }\n", encoding="utf-8")
+    (project_dir / "b.js").write_text("run();\n", encoding="utf-8")
+    for path in project_dir.iterdir():
+        os.utime(path, ns=(1_600_000_000_000_000_000, 1_600_000_000_000_000_000))
+
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ["git", "-c", "user.email=ci@example.com", "-c", "user.name=ci", *args],
+            cwd=repo,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+
+    git("init", "-q")
+    git("add", ".")
+    git("commit", "-q", "-m", "init")
+    (project_dir / "b.js").write_text("run();\nrun();\n", encoding="utf-8")
+
+    manager = PluginManager()
+    manager.register(JavaScriptAnalyzer())
+    result = AnalysisOrchestrator(plugin_manager=manager, fingerprint="git").run(str(project_dir))
+
+    files = result.file_state["JavaScript"]["files"]
+    assert result.revision == git("rev-parse", "HEAD")
+    assert files["a.js"][0] == "git:" + git("rev-parse", "HEAD:services/web/a.js")
+    assert not files["b.js"][0].startswith("git:")
+
+    # Probing stops counting at the limit and fingerprints the tree by HEAD and the index alone.
+    git_probe = AnalysisOrchestrator(plugin_manager=manager, fingerprint="git").probe(str(project_dir), limit=1)
+    assert git_probe.files == 1 and git_probe.fingerprint is not None
+    git("add", ".")
+    staged = AnalysisOrchestrator(plugin_manager=manager, fingerprint="git").probe(str(project_dir), limit=1)
+    assert staged.fingerprint not in {None, git_probe.fingerprint}
+    stat_orchestrator = AnalysisOrchestrator(plugin_manager=manager, fingerprint="stat")
+    assert stat_orchestrator.probe(str(project_dir), limit=1).fingerprint is None  # too large to stat cheaply
+    assert stat_orchestrator.probe(str(project_dir)).files == 2
+
+
+def test_truncated_git_index_falls_back_to_stat_fingerprints(tmp_path: Path) -> None:
+    header = struct.pack(">4sLL", b"DIRC", 4, 2)
+    entry = struct.pack(">LLLLLLLLLL", 0, 0, 1, 0, 0, 1, 0o100644, 0, 0, 4) + bytes(20) + struct.pack(">H", 4)
+    index = header + entry + b"\x00a.js\x00" + entry + b"\x85"  # the second path's varint is cut short
+    with pytest.raises(GitIndexError):
+        parse_index(index)
+    with pytest.raises(GitIndexError):
+        parse_index(index[: len(header) + 30])
+
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "index").write_bytes(index)
+    worktree = GitWorkTree.discover(tmp_path)
+    assert worktree is not None
+    assert GitFingerprints.for_project(worktree, tmp_path) is None
+
+
+def test_stream_reports_rate_limited_file_progress(tmp_path: Path) -> None:
+    project_dir = tmp_path / "progress"
+    project_dir.mkdir()
+    (project_dir / "package.json").write_text("{}", encoding="utf-8")
+    for index in range(5):
+        (project_dir / f"m{index}.js").write_text("run();\n", encoding="utf-8")
+
+    manager = PluginManager()
+    manager.register(JavaScriptAnalyzer())
+    snapshots: list[dict] = []
+    stream = AnalysisOrchestrator(plugin_manager=manager).stream(str(project_dir), progress=snapshots.append)
+    stream.progress.interval = 3600  # only forced emissions get through
+    list(stream)
+
+    phases = [snapshot["phase"] for snapshot in snapshots]
+    assert phases == ["discovering", "analyzing", "measuring", "dependencies", "finished"]
+    measuring = snapshots[phases.index("measuring")]
+    assert measuring["filesTotal"] == 5 and measuring["filesDone"] == 0 and measuring["bytesRead"] == 0
+    assert snapshots[-1] == {
+        "phase": "finished",
+        "filesDiscovered": 5,
+        "filesTotal": 5,
+        "filesDone": 5,
+        "bytesRead": 5 * len("run();\n"),
+        "fraction": 1.0,
+    }
+
+
+def test_budget_truncates_analysis_between_files(tmp_path: Path) -> None:
+    project_dir = tmp_path / "budget"
+    project_dir.mkdir()
+    (project_dir / "requirements.txt").write_text("", encoding="utf-8")
+    for index in range(4):
+        (project_dir / f"m{index}.py").write_text("def f():\n    return 1\n", encoding="utf-8")
+
+    manager = PluginManager()
+    manager.register(PythonAnalyzer(workers=1))
+    orchestrator = AnalysisOrchestrator(plugin_manager=manager)
+
+    now = [0.0]
+    budget = AnalysisBudget(max_seconds=10, clock=lambda: now[0])
+    stream = orchestrator.stream(str(project_dir), budget=budget)
+    payload = {"codeUnits": []}
+    for kind, value in stream:
+        if kind == "codeUnit" and value["type"] == "FILE":
+            payload["codeUnits"].append(value)
+            now[0] += 6  # the second file takes the run past its time budget
+    assert [unit["path"] for unit in payload["codeUnits"]] == ["m0.py", "m1.py"]
+    assert stream.summary["truncated"] == "timeBudget" and stream.summary["totalFiles"] == 2
+
+    requested: list[bool] = []
+    budget = AnalysisBudget(cancelled=lambda: bool(requested), poll_interval=0)
+    stream = orchestrator.stream(str(project_dir), budget=budget)
+    units = []
+    for kind, value in stream:
+        if kind == "codeUnit" and value["type"] == "FILE":
+            units.append(value)
+            requested.append(True)  # cancelled while the first file is being stored
+    assert stream.truncated == "cancelled" and len(units) == 1
+
+    complete = orchestrator.run(str(project_dir))
+    assert complete.udm.summary.totalFiles == 4
+    assert "truncated" not in complete.udm.summary.model_dump()
+
+
+def test_discovery_uses_one_shallow_memoized_root_scan(tmp_path: Path) -> None:
+    deep = tmp_path / "scripts" / "a" / "b" / "c"
+    deep.mkdir(parents=True)
+    (deep / "tool.py").write_text("print(1)\n", encoding="utf-8")
+    (tmp_path / "node_modules" / "dep").mkdir(parents=True)
+    (tmp_path / "node_modules" / "dep" / "setup.py").write_text("", encoding="utf-8")
+    (tmp_path / "package.json").write_text("{}", encoding="utf-8")
+
+    class Legacy(JavaScriptAnalyzer):
+        name = "Legacy"
+        applies_to = None  # plugins without applies_to are asked to discover() themselves
+
+        def discover(self, path: str) -> bool:
+            return True
+
+    manager = PluginManager()
+    for plugin in (PythonAnalyzer(), JavaAnalyzer(), JavaScriptAnalyzer(), Legacy()):
+        manager.register(plugin)
+
+    # Python files below the sampled depth do not make a Python project.
+    assert [plugin.name for plugin in manager.find_applicable(str(tmp_path))] == ["JavaScript", "Legacy"]
+    scan = root_scan(str(tmp_path))
+    assert scan is root_scan(str(tmp_path)) and scan.files == {"package.json"}
+
+    (tmp_path / "scripts" / "build.py").write_text("print(2)\n", encoding="utf-8")
+    assert root_scan(str(tmp_path)) is scan  # only root changes invalidate the scan
+    (tmp_path / "requirements.txt").write_text("", encoding="utf-8")
+    assert PythonAnalyzer().discover(str(tmp_path))
+    assert [plugin.name for plugin in manager.find_applicable(str(tmp_path))] == ["Python", "JavaScript", "Legacy"]
+    assert root_scan(str(tmp_path)).has_extension({".py"})
+    assert not PythonAnalyzer().discover(str(tmp_path / "package.json"))
+
+
+def test_plugins_are_imported_only_when_a_project_may_need_them(tmp_path: Path, monkeypatch) -> None:
+    from app.tasks import BUNDLED_PLUGINS
+
+    for spec, plugin in zip(BUNDLED_PLUGINS, (PythonAnalyzer, JavaScriptAnalyzer, JavaAnalyzer), strict=True):
+        assert spec.name == plugin.name and spec.markers == plugin.markers
+    assert BUNDLED_PLUGINS[0].extensions == {".py"}
+
+    source = tmp_path / "src"
+    source.mkdir()
+    (source / "lazy_probe_plugin.py").write_text(
+        "from app.core.analyzer import AnalyzerPlugin\n"
+        "class ProbeAnalyzer(AnalyzerPlugin):\n"
+        "    name = 'Probe'\n"
+        "    markers = frozenset({'probe.toml'})\n"
+        "    def discover(self, path):\n"
+        "        return False\n"
+        "    def analyze(self, path, context=None):\n"
+        "        return {}\n"
+        "class Shapeless:\n"
+        "    name = 'Shapeless'\n"
+        "    def discover(self, path):\n"
+        "        return True\n",
+        encoding="utf-8",
+    )
+    (source / "lazy_probe_meta.py").write_text(
+        "NAME = 'Probe'\nTARGET = 'lazy_probe_plugin:ProbeAnalyzer'\nMARKERS = {'probe.toml'}\n", encoding="utf-8"
+    )
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    for module in ("lazy_probe_plugin", "lazy_probe_meta"):
+        monkeypatch.delitem(sys.modules, module, raising=False)
+    other, probe = tmp_path / "other", tmp_path / "probe"
+    other.mkdir()
+    probe.mkdir()
+    (probe / "probe.toml").write_text("", encoding="utf-8")
+
+    manager = PluginManager()
+    spec = PluginSpec.from_metadata("lazy_probe_meta", path=str(source))
+    assert spec == PluginSpec("Probe", "lazy_probe_plugin:ProbeAnalyzer", frozenset({"probe.toml"}), path=str(source))
+    manager.register_lazy(spec)
+    manager.register_lazy(PluginSpec("Broken", "missing_module:Analyzer", markers=frozenset({"broken.toml"})))
+    # Anything but an analyzer is refused, even with a discover() method.
+    manager.register_lazy(PluginSpec("Shapeless", "lazy_probe_plugin:Shapeless", markers=frozenset({"probe.toml"})))
+
+    assert manager.find_applicable(str(other)) == []
+    assert "lazy_probe_plugin" not in sys.modules
+    assert [plugin.name for plugin in manager.find_applicable(str(probe))] == ["Probe"]
+    assert "lazy_probe_plugin" in sys.modules
+    assert manager.get_plugin("Probe") is manager.plugins[0]
+    assert manager.get_plugin("Broken") is None  # logged and dropped
+    assert manager.get_plugin("Shapeless") is None
@@ -7,8 +7,11 @@ import type {
   CreateUserPayload,
   ReportSummary,
   ReportDetail,
+  ReportTreeResponse,
+  CodeUnitQuery,
+  CodeUnitPage,
 } from "@/types/api";
-import type { UnifiedDataModel } from "@/types/udm";
+import type { CodeUnit, UnifiedDataModel } from "@/types/udm";
 
 const API_BASE = (import.meta.env.VITE_API_BASE_URL ?? "").replace(/\/$/, "");
 
@@ -54,14 +57,80 @@ export async function triggerAnalysis(payload: AnalyzeRequest): Promise<AnalyzeR
   });
 }
 
+export async function cancelAnalysis(jobId: string): Promise<JobStatusResponse> {
+  return request<JobStatusResponse>(`/api/analyze/${jobId}`, { method: "DELETE" });
+}
+
 export async function fetchJobStatus(jobId: string): Promise<JobStatusResponse> {
   return request<JobStatusResponse>(`/api/status/${jobId}`);
 }
 
+/**
+ * Follow a job's progress over server-sent events. onUnavailable is called
+ * when the stream cannot be used (or breaks) so the caller can fall back to
+ * polling. Returns a function that closes the stream.
+ */
+export function subscribeJobStatus(
+  jobId: string,
+  onStatus: (status: JobStatusResponse) => void,
+  onUnavailable: () => void,
+): () => void {
+  if (typeof EventSource === "undefined") {
+    onUnavailable();
+    return () => undefined;
+  }
+  const source = new EventSource(buildUrl(`/api/status/${jobId}/events`));
+  let finished = false;
+  source.addEventListener("progress", (event) => {
+    const status = JSON.parse((event as MessageEvent<string>).data) as JobStatusResponse;
+    if (status.status === "completed" || status.status === "failed") {
+      finished = true;
+      source.close();
+    }
+    onStatus(status);
+  });
+  source.onerror = () => {
+    source.close();
+    if (!finished) {
+      onUnavailable();
+    }
+  };
+  return () => source.close();
+}
+
 export async function fetchReport(jobId: string): Promise<UnifiedDataModel> {
   return request<UnifiedDataModel>(`/api/report/${jobId}`);
 }
 
+function unitQueryParams(query: CodeUnitQuery = {}): URLSearchParams {
+  const params = new URLSearchParams();
+  if (query.pathPrefix) params.set("pathPrefix", query.pathPrefix);
+  if (query.minComplexity !== undefined) params.set("minComplexity", String(query.minComplexity));
+  if (query.sort) params.set("sort", query.sort);
+  if (query.metrics?.length) params.set("metrics", query.metrics.join(","));
+  if (query.top !== undefined) params.set("top", String(query.top));
+  return params;
+}
+
+export async function fetchCodeUnits(
+  jobId: string,
+  query: CodeUnitQuery = {},
+  cursor?: string | null,
+  limit = 500,
+): Promise<CodeUnitPage<CodeUnit>> {
+  const params = unitQueryParams(query);
+  params.set("limit", String(limit));
+  if (cursor) params.set("cursor", cursor);
+  return request<CodeUnitPage<CodeUnit>>(`/api/report/${jobId}/units?${params.toString()}`);
+}
+
+export async function fetchReportTree(jobId: string, path = ""): Promise<ReportTreeResponse> {
+  const params = new URLSearchParams();
+  if (path && path !== ".") params.set("path", path);
+  const qs = params.toString();
+  return request<ReportTreeResponse>(`/api/report/${jobId}/tree${qs ? `?${qs}` : ""}`);
+}
+
 export async function listUsers(): Promise<UserRecord[]> {
   return request<UserRecord[]>("/api/users");
 }
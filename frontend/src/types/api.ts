@@ -14,10 +14,19 @@ export interface FilesystemResponse {
 export interface AnalyzeRequest {
   projectPath: string;
   userId?: string;
+  baseJobId?: string;
+  incremental?: boolean;
+  /** Seconds and files after which the analysis stops with partial results. */
+  timeBudget?: number;
+  fileBudget?: number;
 }
 
 export interface AnalyzeResponse {
   jobId: string;
+  /** True when an identical running or freshly completed job was returned instead of a new one. */
+  shared?: boolean;
+  /** Celery queue the job was routed to, by project size. */
+  queue?: string;
 }
 
 export type JobStateStatus = "pending" | "running" | "completed" | "failed";
@@ -27,6 +36,11 @@ export interface JobStatusResponse {
   progress: number;
   message?: string | null;
   error?: string | null;
+  phase?: string | null;
+  filesDone?: number | null;
+  filesTotal?: number | null;
+  filesDiscovered?: number | null;
+  bytesRead?: number | null;
 }
 
 export interface UserRecord {
@@ -49,8 +63,37 @@ export interface ReportSummary {
   summary?: string | null;
   createdAt: string;
   completedAt?: string | null;
+  baseJobId?: string | null;
+  revision?: string | null;
 }
 
 export interface ReportDetail extends ReportSummary {
   udm?: Record<string, unknown> | null;
 }
+
+export interface ReportTreeEntry {
+  name: string;
+  path: string;
+  type: "directory" | "file";
+  files: number;
+  loc: number;
+  complexity: number;
+}
+
+export interface ReportTreeResponse {
+  path: string;
+  entries: ReportTreeEntry[];
+}
+
+export interface CodeUnitQuery {
+  pathPrefix?: string;
+  minComplexity?: number;
+  sort?: "report" | "path" | "loc" | "complexity";
+  metrics?: string[];
+  top?: number;
+}
+
+export interface CodeUnitPage<T> {
+  items: T[];
+  nextCursor?: string | null;
+}
@@ -35,6 +35,8 @@ export interface Summary {
   totalLinesOfCode: number;
   avgComplexity: number;
   dependencyCount: number;
+  /** Set when the analysis stopped early: "cancelled", "timeBudget" or "fileBudget". */
+  truncated?: string;
 }
 
 export interface UnifiedDataModel {
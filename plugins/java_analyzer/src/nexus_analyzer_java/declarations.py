@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import re
+import sys
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from backend.app.core.clike import Capture
+
+#: Scanner captures (see CLikeScanner) for the declarations of a Java file. Type headers run
+#: from the keyword up to the body's brace, which is left to the scanner's nesting count.
+_TYPE_HEADER = r"\s+([A-Za-z_$][\w$]*[^{;]*)(?=\{)"
+CAPTURES = {
+    "package": r"package\s+([\w$.]+)\s*;",
+    "static_import": r"import\s+static\s+([\w$.]+(?:\s*\.\s*\*)?)\s*;",
+    "import": r"import\s+([\w$.]+(?:\s*\.\s*\*)?)\s*;",
+    "class": rf"class{_TYPE_HEADER}",
+    "interface": rf"interface{_TYPE_HEADER}",
+    "enum": rf"enum{_TYPE_HEADER}",
+    # "record" is only a keyword in front of a component list.
+    "record": r"record\s+([A-Za-z_$][\w$]*\s*(?:<[^{;]*?>)?\s*\([^{;]*)(?=\{)",
+    "annotation": rf"@interface{_TYPE_HEADER}",
+}
+TYPE_KINDS = {"class": "CLASS", "enum": "CLASS", "record": "CLASS", "interface": "INTERFACE", "annotation": "INTERFACE"}
+
+_GENERICS = re.compile(r"<[^<>]*>")
+_PARENTHESES = re.compile(r"\([^()]*\)")
+_ANNOTATION = re.compile(r"@[\w$.]+")
+_HEADER = re.compile(
+    r"\s*(?P<name>[A-Za-z_$][\w$]*)\s*"
+    r"(?:extends\s+(?P<extends>.*?))?\s*(?:implements\s+(?P<implements>.*?))?\s*(?:permits\s+.*)?$",
+    re.DOTALL,
+)
+_TYPE_NAME = re.compile(r"[A-Za-z_$][\w$]*(?:\s*\.\s*[A-Za-z_$][\w$]*)*")
+
+
+def _names(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return [re.sub(r"\s+", "", name) for name in _TYPE_NAME.findall(text)]
+
+
+def parse_header(header: str) -> Optional[Tuple[str, List[str], List[str]]]:
+    """(name, extends, implements) of a type header such as "Box<T> extends Base<T> implements A, B"."""
+    text = header
+    while "<" in text:
+        stripped = _GENERICS.sub("", text)
+        if stripped == text:
+            break
+        text = stripped
+    text = _ANNOTATION.sub(" ", _PARENTHESES.sub(" ", text))
+    match = _HEADER.match(text)
+    if match is None:
+        return None
+    return match.group("name"), _names(match.group("extends")), _names(match.group("implements"))
+
+
+def declarations(captured: Sequence[Capture]) -> dict:
+    """The package, imports and types of one file from captures of a scanner nesting on braces.
+
+    Types nested in other types are named Outer.Inner. The result holds
+    names only and is cached with the file's metrics; see Unresolved for the
+    part the analyzer keeps until the whole project is indexed.
+    """
+    package = ""
+    imports: List[str] = []
+    types: List[list] = []  # [kind, name within the file, extends, implements]
+    enclosing: List[Tuple[str, int]] = []  # (qualified name, brace depth of its body)
+    for capture in captured:
+        # A type is left once a closing brace returns below its body.
+        while enclosing and enclosing[-1][1] > capture.low:
+            enclosing.pop()
+        kind = capture.kind
+        if kind == "package":
+            package = capture.value
+        elif kind == "import" or kind == "static_import":
+            imports.append(re.sub(r"\s+", "", capture.value))
+        else:
+            header = parse_header(capture.value)
+            if header is None:
+                continue
+            name, extends, implements = header
+            qualname = f"{enclosing[-1][0]}.{name}" if enclosing else name
+            enclosing.append((qualname, capture.depth + 1))
+            types.append([TYPE_KINDS[kind], qualname, extends, implements])
+    return {"package": package, "imports": imports, "types": types}
+
+
+class Unresolved(NamedTuple):
+    """What one file still needs once the whole project is indexed: the names it refers to.
+
+    Types without supertypes are left out, as the index already holds
+    them, and every name is interned: a large project repeats the same
+    imports and supertypes across thousands of files.
+    """
+
+    file_id: str
+    package: str
+    imports: Tuple[str, ...]
+    supertypes: Tuple[Tuple[str, Tuple[str, ...], Tuple[str, ...]], ...]  # (name within the file, extends, implements)
+
+    @classmethod
+    def of(cls, file_id: str, declared: dict) -> Optional["Unresolved"]:
+        """The names of declarations(...) that connections() resolves, or None when there are none."""
+        intern = sys.intern
+        supertypes = tuple(
+            (intern(qualname), tuple(map(intern, extends)), tuple(map(intern, implements)))
+            for _, qualname, extends, implements in declared["types"]
+            if extends or implements
+        )
+        if not declared["imports"] and not supertypes:
+            return None
+        return cls(file_id, intern(declared["package"]), tuple(map(intern, declared["imports"])), supertypes)
+
+
+class TypeIndex:
+    """Fully qualified Java type names mapped to their unit ids, filled one file at a time.
+
+    A name declared by two files (say in main and test source sets) keeps
+    the first unit in path order as the target of references to it; each
+    file's own types remain the sources of their connections. Resolving a name is a few dict lookups
+    following Java's scoping: enclosing types, single-type imports, the
+    file's own package, on-demand (.*) imports, then the name as written.
+    """
+
+    def __init__(self) -> None:
+        self._units: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._units)
+
+    def add(self, package: str, qualname: str, unit_id: str) -> None:
+        self._units.setdefault(f"{package}.{qualname}" if package else qualname, unit_id)
+
+    def imported(self, name: str) -> Optional[str]:
+        """The unit an import statement names: the longest project type its name starts with."""
+        if name.endswith(".*"):
+            name = name[:-2]
+        while name:
+            unit_id = self._units.get(name)
+            if unit_id is not None:
+                return unit_id
+            name = name.rpartition(".")[0]
+        return None
+
+    def connections(self, unresolved: Unresolved) -> Iterator[Tuple[str, str, str]]:
+        """(source, target, type) of the IMPORT, INHERITANCE and IMPLEMENTATION edges of one file."""
+        file_id, package, imports, supertypes = unresolved
+        single: Dict[str, str] = {}
+        on_demand: List[str] = []
+        for name in imports:
+            if name.endswith(".*"):
+                on_demand.append(name[:-2])
+            else:
+                single.setdefault(name.rpartition(".")[2], name)
+        targets = {self.imported(name) for name in imports}
+        targets.discard(None)
+        for target in sorted(targets):  # type: ignore[type-var]
+            yield file_id, target, "IMPORT"
+
+        prefix = f"{package}." if package else ""
+        for qualname, extends, implements in supertypes:
+            # The declaring file's own unit: another file may have claimed the same qualified name.
+            source = f"{file_id}.{qualname}"
+            scopes = [qualname[:end] for end in _dots(qualname)]
+            relations = [(name, "INHERITANCE") for name in extends]
+            relations += [(name, "IMPLEMENTATION") for name in implements]
+            for name, relation in relations:
+                target = self._resolve(name, prefix, scopes, single, on_demand)
+                if target is not None and target != source:
+                    yield source, target, relation
+
+    def _resolve(
+        self, name: str, prefix: str, scopes: Sequence[str], single: Dict[str, str], on_demand: Sequence[str]
+    ) -> Optional[str]:
+        first, _, rest = name.partition(".")
+        candidates = [f"{prefix}{scope}.{name}" for scope in scopes]
+        if first in single:
+            candidates.append(f"{single[first]}.{rest}" if rest else single[first])
+        candidates.append(prefix + name)
+        candidates.extend(f"{package}.{name}" for package in on_demand)
+        candidates.append(name)
+        units = self._units
+        return next((units[candidate] for candidate in candidates if candidate in units), None)
+
+
+def _dots(qualname: str) -> List[int]:
+    """End offsets of the enclosing scopes of qualname, innermost first (the type itself included)."""
+    ends = [index for index, char in enumerate(qualname) if char == "."]
+    return [len(qualname), *reversed(ends)]
+
+
+__all__ = ["CAPTURES", "TYPE_KINDS", "TypeIndex", "Unresolved", "declarations", "parse_header"]
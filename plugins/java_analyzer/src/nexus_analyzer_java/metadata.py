@@ -0,0 +1,18 @@
+"""What the backend needs to register this plugin without importing it.
+
+PluginSpec.from_metadata reads these constants; the analyzer takes its
+name and markers from here too, so the two cannot drift apart.
+"""
+
+from __future__ import annotations
+
+NAME = "Java"
+TARGET = "nexus_analyzer_java.plugin:JavaAnalyzer"
+POM_FILE = "pom.xml"
+GRADLE_FILES = frozenset({"build.gradle", "build.gradle.kts"})
+#: Root build files of a Maven or Gradle project.
+MARKERS = frozenset({POM_FILE, *GRADLE_FILES})
+#: Empty: Java sources without a build file are not analysed as a project.
+DISCOVERY_EXTENSIONS: frozenset[str] = frozenset()
+
+__all__ = ["DISCOVERY_EXTENSIONS", "GRADLE_FILES", "MARKERS", "NAME", "POM_FILE", "TARGET"]
@@ -3,87 +3,124 @@ from __future__ import annotations
 import re
 import xml.etree.ElementTree as ET
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterator, List, Optional, Sequence, Tuple
 
 from backend.app.core.analyzer import AnalyzerPlugin
+from backend.app.core.clike import CLikeScanner
+from backend.app.core.context import AnalysisContext
+from backend.app.core.progress import ProgressTracker
+from backend.app.core.stream import CODE_UNIT, CONNECTION, DEPENDENCY, LANGUAGES, SUMMARY, UDMRecord, collect_payload
+from backend.app.core.walker import FileIndex, scan_tree
 
-SKIP_DIRS = {".git", ".hg", "build", "out", ".idea", "target", ".gradle"}
+from .declarations import CAPTURES, TypeIndex, Unresolved, declarations
+from .metadata import GRADLE_FILES, MARKERS, NAME, POM_FILE
+
+SKIP_DIRS = {".git", ".hg", "build", "out", ".idea", "target", ".gradle", "node_modules"}
 JAVA_EXTENSIONS = {".java"}
-POM_FILE = "pom.xml"
-GRADLE_FILES = {"build.gradle", "build.gradle.kts"}
+#: Decisions add one to a file's complexity, logical operators half. Package, import and type
+#: declarations are captured with their brace depth, which tells nested types apart.
+SCANNER = CLikeScanner(
+    {"decision": ("if", "for", "while", "case", "catch", "switch"), "logical": ("&&", "||")},
+    {"decision": 1.0, "logical": 0.5},
+    strings=('"', "'"),
+    multiline_strings=('"""',),
+    captures=CAPTURES,
+    nesting=("{", "}"),
+)
 
 
 class JavaAnalyzer(AnalyzerPlugin):
-    name = "Java"
+    name = NAME
+    version = "0.3.0"
+    extensions = frozenset(JAVA_EXTENSIONS)
+    skip_dirs = frozenset(SKIP_DIRS)
+    reports_progress = True
+    markers = MARKERS
 
     def discover(self, path: str) -> bool:
         root = Path(path)
-        return any((root / marker).exists() for marker in [POM_FILE, *GRADLE_FILES])
+        return any((root / marker).exists() for marker in MARKERS)
 
-    def analyze(self, path: str) -> dict:
-        root = Path(path)
-        java_files = list(self._iter_java_files(root))
+    def analyze(self, path: str, context: Optional[AnalysisContext] = None) -> dict:
+        return collect_payload(self.stream(path, context))
 
-        code_units = []
+    def stream(self, path: str, context: Optional[AnalysisContext] = None) -> Iterator[UDMRecord]:
+        root = Path(path)
+        context = context or AnalysisContext(root=root, files=self._scan(root))
+        java_files = context.files.select(JAVA_EXTENSIONS, SKIP_DIRS)
         total_loc = 0
-        complexity_samples: List[float] = []
-
-        for file_path in java_files:
-            rel = file_path.relative_to(root)
-            try:
-                text = file_path.read_text(encoding="utf-8", errors="ignore")
-            except OSError:
-                continue
-
-            loc = self._count_loc(text)
-            total_loc += loc
-            complexity = self._estimate_complexity(text)
-            complexity_samples.append(complexity)
-
-            code_units.append(
-                {
-                    "id": ".".join(rel.with_suffix("").parts),
-                    "type": "FILE",
-                    "path": str(rel),
-                    "metrics": {
-                        "loc": loc,
-                        "complexity": round(complexity, 2),
-                    },
-                }
-            )
-
+        complexity_total = 0.0
+        measured_files = 0
+        # Units stream out and are indexed file by file. Connections wait for the whole index, so
+        # until then only the names each file refers to are kept (see Unresolved).
+        types = TypeIndex()
+        pending: List[Unresolved] = []
+
+        progress = context.progress
+        progress.expect(len(java_files))
+        progress.start("measuring")
+
+        yield LANGUAGES, ["Java"]
+        measurements = context.measure(self, java_files, lambda rel_paths: self._measure(root, rel_paths, progress))
+        for rel_path, metrics in measurements:
+            rel = Path(rel_path)
+            total_loc += metrics["loc"]
+            complexity_total += metrics["complexity"]
+            measured_files += 1
+            progress.advance()
+
+            file_id = ".".join(rel.with_suffix("").parts)
+            yield CODE_UNIT, {
+                "id": file_id,
+                "type": "FILE",
+                "path": str(rel),
+                "metrics": {
+                    "loc": metrics["loc"],
+                    "commentLines": metrics.get("commentLines"),
+                    "complexity": round(metrics["complexity"], 2),
+                },
+            }
+            for kind, qualname, _, _ in metrics["types"]:
+                unit_id = f"{file_id}.{qualname}"
+                types.add(metrics["package"], qualname, unit_id)
+                yield CODE_UNIT, {"id": unit_id, "type": kind, "path": str(rel)}
+            unresolved = Unresolved.of(file_id, metrics)
+            if unresolved is not None:
+                pending.append(unresolved)
+
+        for unresolved in pending:
+            for source, target, relation in types.connections(unresolved):
+                yield CONNECTION, {"sourceUnitId": source, "targetUnitId": target, "type": relation}
+
+        progress.start("dependencies")
         dependencies = self._collect_dependencies(root)
-        avg_complexity = (
-            round(sum(complexity_samples) / len(complexity_samples), 2) if complexity_samples else 0.0
-        )
-
-        return {
-            "languages": ["Java"],
-            "summary": {
-                "totalFiles": len(java_files),
-                "totalLinesOfCode": total_loc,
-                "avgComplexity": avg_complexity,
-                "dependencyCount": len(dependencies),
-            },
-            "codeUnits": code_units,
-            "dependencies": dependencies,
-            "connections": [],
+        for dependency in dependencies:
+            yield DEPENDENCY, dependency
+
+        yield SUMMARY, {
+            "totalFiles": measured_files,
+            "totalLinesOfCode": total_loc,
+            "avgComplexity": round(complexity_total / measured_files, 2) if measured_files else 0.0,
+            "dependencyCount": len(dependencies),
         }
 
-    def _iter_java_files(self, root: Path) -> Iterable[Path]:
-        for file in root.rglob("*.java"):
-            if any(part in SKIP_DIRS for part in file.parts):
+    def _measure(self, root: Path, rel_paths: Sequence[str], progress: ProgressTracker) -> Iterator[Tuple[str, dict]]:
+        for rel in rel_paths:
+            try:
+                data = (root / rel).read_bytes()
+            except OSError:
                 continue
-            if file.suffix.lower() in JAVA_EXTENSIONS:
-                yield file
-
-    def _count_loc(self, text: str) -> int:
-        return sum(1 for line in text.splitlines() if line.strip())
-
-    def _estimate_complexity(self, text: str) -> float:
-        decision_keywords = len(re.findall(r"\b(if|for|while|case|catch|switch)\b", text))
-        logical_ops = len(re.findall(r"&&|\|\|", text))
-        return max(1.0, decision_keywords + logical_ops * 0.5)
+            progress.add_bytes(len(data))
+            metrics = SCANNER.scan(data.decode("utf-8", errors="ignore"))
+            yield rel, {
+                "loc": metrics.loc,
+                "commentLines": metrics.comment_lines,
+                "complexity": metrics.complexity,
+                **declarations(metrics.captured),
+            }
+
+    def _scan(self, root: Path) -> FileIndex:
+        return scan_tree(root, skip_dirs=SKIP_DIRS, extensions=JAVA_EXTENSIONS)
 
     def _collect_dependencies(self, root: Path) -> List[dict]:
         if (root / POM_FILE).exists():
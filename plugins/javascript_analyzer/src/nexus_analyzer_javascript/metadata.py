@@ -0,0 +1,16 @@
+"""What the backend needs to register this plugin without importing it.
+
+PluginSpec.from_metadata reads these constants; the analyzer takes its
+name and markers from here too, so the two cannot drift apart.
+"""
+
+from __future__ import annotations
+
+NAME = "JavaScript"
+TARGET = "nexus_analyzer_javascript.plugin:JavaScriptAnalyzer"
+#: Root files of a JavaScript or TypeScript project.
+MARKERS = frozenset({"package.json"})
+#: Empty: loose scripts without a package.json are not analysed as a project.
+DISCOVERY_EXTENSIONS: frozenset[str] = frozenset()
+
+__all__ = ["DISCOVERY_EXTENSIONS", "MARKERS", "NAME", "TARGET"]
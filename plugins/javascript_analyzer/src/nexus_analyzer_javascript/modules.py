@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import posixpath
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+#: Extensions tried, in order, for a specifier that names none (as TypeScript and bundlers do).
+RESOLVE_EXTENSIONS = (".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs", ".vue")
+#: Extensions under which TypeScript sources are imported in ESM code ("./a.js" for a.ts).
+EMITTED_EXTENSIONS = {".js", ".jsx", ".mjs", ".cjs"}
+CONFIG_FILES = ("tsconfig.json", "jsconfig.json")
+#: Relative "extends" followed per config; package presets are not resolved.
+MAX_EXTENDS = 8
+
+_JSONC_NOISE = re.compile(r'("(?:\\.|[^"\\])*")|//[^\n]*|/\*[\s\S]*?\*/')
+_TRAILING_COMMA = re.compile(r'("(?:\\.|[^"\\])*")|,(?=\s*[}\]])')
+
+
+def unit_id(rel_path: str) -> str:
+    """The unit id of a source file: its relative path, dotted and without the suffix."""
+    return ".".join(os.path.splitext(rel_path)[0].split(os.sep))
+
+
+def read_jsonc(path: Path) -> Optional[dict]:
+    """Parse a tsconfig-style file: JSON with comments and trailing commas. None when unreadable."""
+    try:
+        text = path.read_text(encoding="utf-8")
+    except OSError:
+        return None
+    text = _JSONC_NOISE.sub(lambda match: match.group(1) or "", text)
+    text = _TRAILING_COMMA.sub(lambda match: match.group(1) or "", text)
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        LOGGER.debug("Ignoring unparsable %s", path)
+        return None
+    return data if isinstance(data, dict) else None
+
+
+@dataclass(frozen=True)
+class PathAliases:
+    """compilerOptions.baseUrl and paths of one tsconfig, with directories relative to the project root."""
+
+    base_url: Optional[str]
+    exact: Dict[str, Tuple[str, ...]]
+    #: (prefix, suffix, targets) of "prefix*suffix" patterns, longest prefix first.
+    wildcards: Tuple[Tuple[str, str, Tuple[str, ...]], ...]
+
+    @classmethod
+    def from_options(cls, base_url: Optional[str], paths: Dict[str, List[str]], paths_base: str) -> "PathAliases":
+        exact: Dict[str, Tuple[str, ...]] = {}
+        wildcards = []
+        for pattern, targets in paths.items():
+            if not isinstance(targets, list):
+                continue
+            joined = tuple(posixpath.join(paths_base, target) for target in targets if isinstance(target, str))
+            if "*" in pattern:
+                prefix, _, suffix = pattern.partition("*")
+                wildcards.append((prefix, suffix, joined))
+            else:
+                exact[pattern] = joined
+        wildcards.sort(key=lambda wildcard: len(wildcard[0]), reverse=True)
+        return cls(base_url, exact, tuple(wildcards))
+
+    def candidates(self, specifier: str) -> Iterator[str]:
+        """Project paths a bare specifier may stand for, in the order TypeScript tries them."""
+        if specifier in self.exact:
+            yield from self.exact[specifier]
+        else:
+            for prefix, suffix, targets in self.wildcards:
+                fits = len(specifier) >= len(prefix) + len(suffix)
+                if fits and specifier.startswith(prefix) and specifier.endswith(suffix):
+                    star = specifier[len(prefix) : len(specifier) - len(suffix)]
+                    yield from (target.replace("*", star, 1) for target in targets)
+                    break
+        if self.base_url is not None:
+            yield posixpath.join(self.base_url, specifier)
+
+
+class ModuleResolver:
+    """Resolves import specifiers to the project's source files without touching the filesystem per import.
+
+    A lookup table built once from the file list answers for every file by
+    its path, its path without extension (the first of RESOLVE_EXTENSIONS
+    wins) and, for index files, its directory. Relative specifiers are
+    looked up from the importing file's directory; bare ones go through the
+    baseUrl and paths of the nearest tsconfig.json or jsconfig.json, which is
+    read once per directory and follows relative "extends". Anything else,
+    packages from node_modules included, resolves to None.
+    """
+
+    def __init__(self, root: Path, rel_paths: Sequence[str]) -> None:
+        self.root = root
+        rank = {extension: index for index, extension in enumerate(RESOLVE_EXTENSIONS)}
+        ordered = sorted(rel_paths, key=lambda rel: (rank.get(os.path.splitext(rel)[1].lower(), len(rank)), rel))
+        posix = [(rel, rel.replace(os.sep, "/")) for rel in ordered]
+        self._files: Dict[str, str] = {key: rel for rel, key in posix}
+        # Files win over directories of the same name, as in Node and TypeScript.
+        for rel, key in posix:
+            self._files.setdefault(posixpath.splitext(key)[0], rel)
+        for rel, key in posix:
+            stem, _ = posixpath.splitext(key)
+            if posixpath.basename(stem) == "index":
+                self._files.setdefault(posixpath.dirname(stem) or ".", rel)
+        self._aliases: Dict[str, Optional[PathAliases]] = {}
+
+    def resolve(self, source: str, specifier: str) -> Optional[str]:
+        """The relative path of the file source imports with specifier, or None outside the project."""
+        specifier = specifier.split("?", 1)[0]  # bundler queries such as "./icon.svg?raw"
+        if not specifier or specifier.startswith("/"):
+            return None
+        directory = posixpath.dirname(source.replace(os.sep, "/"))
+        if specifier.startswith(("./", "../")) or specifier in (".", ".."):
+            return self._lookup(posixpath.join(directory, specifier))
+        aliases = self._aliases_for(directory)
+        if aliases is not None:
+            for candidate in aliases.candidates(specifier):
+                found = self._lookup(candidate)
+                if found is not None:
+                    return found
+        return None
+
+    def _lookup(self, path: str) -> Optional[str]:
+        key = posixpath.normpath(path)
+        if key == ".." or key.startswith("../"):
+            return None
+        found = self._files.get(key)
+        if found is None:
+            stem, extension = posixpath.splitext(key)
+            if extension in EMITTED_EXTENSIONS:
+                found = self._files.get(stem)
+        return found
+
+    def _aliases_for(self, directory: str) -> Optional[PathAliases]:
+        directory = directory or "."
+        if directory in self._aliases:
+            return self._aliases[directory]
+        aliases = None
+        for name in CONFIG_FILES:
+            config = self.root / directory / name
+            if config.is_file():
+                aliases = self._load_aliases(config)
+                break
+        else:
+            if directory != ".":
+                aliases = self._aliases_for(posixpath.dirname(directory))
+        self._aliases[directory] = aliases
+        return aliases
+
+    def _load_aliases(self, config: Path) -> Optional[PathAliases]:
+        base_url: Optional[Path] = None
+        paths: Optional[Dict[str, List[str]]] = None
+        paths_base = config.parent
+        # The config itself comes first; what it extends only fills in what it leaves out.
+        current: Optional[Path] = config
+        for _ in range(MAX_EXTENDS):
+            if current is None:
+                break
+            data = read_jsonc(current) or {}
+            options = data.get("compilerOptions") or {}
+            if base_url is None and isinstance(options.get("baseUrl"), str):
+                base_url = current.parent / options["baseUrl"]
+            if paths is None and isinstance(options.get("paths"), dict):
+                paths, paths_base = options["paths"], current.parent
+            extends = data.get("extends")
+            current = current.parent / extends if isinstance(extends, str) and extends.startswith(".") else None
+            if current is not None and current.suffix != ".json":
+                current = current.with_name(current.name + ".json")
+        if base_url is None and paths is None:
+            return None
+        if paths is not None and base_url is not None:
+            paths_base = base_url
+        return PathAliases.from_options(
+            self._relative(base_url) if base_url is not None else None, paths or {}, self._relative(paths_base)
+        )
+
+    def _relative(self, directory: Path) -> str:
+        return posixpath.normpath(os.path.relpath(directory, self.root).replace(os.sep, "/"))
+
+
+__all__ = ["ModuleResolver", "PathAliases", "read_jsonc", "unit_id"]
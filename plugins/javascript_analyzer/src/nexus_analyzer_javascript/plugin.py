@@ -1,91 +1,126 @@
 from __future__ import annotations
 
 import json
-import re
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterator, List, Optional, Sequence, Tuple
 
 from backend.app.core.analyzer import AnalyzerPlugin
+from backend.app.core.clike import CLikeScanner
+from backend.app.core.context import AnalysisContext
+from backend.app.core.progress import ProgressTracker
+from backend.app.core.stream import CODE_UNIT, CONNECTION, DEPENDENCY, LANGUAGES, SUMMARY, UDMRecord, collect_payload
+from backend.app.core.walker import FileIndex, scan_tree
+
+from .metadata import MARKERS, NAME
+from .modules import ModuleResolver, unit_id
 
 SKIP_DIRS = {".git", ".hg", "node_modules", "dist", "build", ".next", ".nuxt", ".cache", ".turbo"}
 SOURCE_EXTENSIONS = {".js", ".jsx", ".cjs", ".mjs", ".ts", ".tsx", ".vue"}
+_SPECIFIER = r"""\s*(?:'([^'\n]*)'|"([^"\n]*)")"""
+#: Functions add one to a file's complexity, decisions and logical operators half each. The
+#: specifiers of import/export ... from, side-effect and dynamic imports and require() are captured.
+SCANNER = CLikeScanner(
+    {
+        "function": ("function", "=>"),
+        "decision": ("if", "for", "while", "case", "catch", "switch"),
+        "logical": ("&&", "||"),
+    },
+    {"function": 1.0, "decision": 0.5, "logical": 0.5},
+    strings=('"', "'"),
+    multiline_strings=("`",),
+    captures={
+        "from": rf"from{_SPECIFIER}",
+        "import": rf"import\s*\(?{_SPECIFIER}",
+        "require": rf"require\s*\({_SPECIFIER}",
+    },
+)
 
 
 class JavaScriptAnalyzer(AnalyzerPlugin):
-    name = "JavaScript"
+    name = NAME
+    version = "0.3.0"
+    extensions = frozenset(SOURCE_EXTENSIONS)
+    skip_dirs = frozenset(SKIP_DIRS)
+    reports_progress = True
+    markers = MARKERS
 
     def discover(self, path: str) -> bool:
         root = Path(path)
         return (root / "package.json").exists()
 
-    def analyze(self, path: str) -> dict:
+    def analyze(self, path: str, context: Optional[AnalysisContext] = None) -> dict:
+        return collect_payload(self.stream(path, context))
+
+    def stream(self, path: str, context: Optional[AnalysisContext] = None) -> Iterator[UDMRecord]:
         root = Path(path)
-        source_files = list(self._iter_source_files(root))
-        code_units = []
+        context = context or AnalysisContext(root=root, files=self._scan(root))
+        source_files = context.files.select(SOURCE_EXTENSIONS, SKIP_DIRS)
         total_loc = 0
-        complexity_samples: List[float] = []
-
-        for file_path in source_files:
-            rel_path = file_path.relative_to(root)
-            try:
-                text = file_path.read_text(encoding="utf-8", errors="ignore")
-            except OSError:
-                continue
-
-            loc = self._count_loc(text)
-            total_loc += loc
-
-            complexity_score = self._estimate_complexity(text)
-            complexity_samples.append(complexity_score)
-
-            code_units.append(
-                {
-                    "id": ".".join(rel_path.with_suffix("").parts),
-                    "type": "FILE",
-                    "path": str(rel_path),
-                    "metrics": {
-                        "loc": loc,
-                        "complexity": round(complexity_score, 2),
-                    },
-                }
-            )
-
+        complexity_total = 0.0
+        measured_files = 0
+        resolver = ModuleResolver(root, source_files)
+
+        progress = context.progress
+        progress.expect(len(source_files))
+        progress.start("measuring")
+
+        yield LANGUAGES, ["JavaScript"]
+        measurements = context.measure(self, source_files, lambda rel_paths: self._measure(root, rel_paths, progress))
+        for rel, metrics in measurements:
+            rel_path = Path(rel)
+            total_loc += metrics["loc"]
+            complexity_total += metrics["complexity"]
+            measured_files += 1
+            progress.advance()
+
+            source_id = unit_id(rel)
+            yield CODE_UNIT, {
+                "id": source_id,
+                "type": "FILE",
+                "path": str(rel_path),
+                "metrics": {
+                    "loc": metrics["loc"],
+                    "commentLines": metrics.get("commentLines"),
+                    "complexity": round(metrics["complexity"], 2),
+                },
+            }
+            for target in self._import_targets(resolver, rel, metrics["imports"]):
+                if target != source_id:
+                    yield CONNECTION, {"sourceUnitId": source_id, "targetUnitId": target, "type": "IMPORT"}
+
+        progress.start("dependencies")
         dependencies = self._collect_dependencies(root)
-        avg_complexity = (
-            round(sum(complexity_samples) / len(complexity_samples), 2) if complexity_samples else 0.0
-        )
-
-        return {
-            "languages": ["JavaScript"],
-            "summary": {
-                "totalFiles": len(source_files),
-                "totalLinesOfCode": total_loc,
-                "avgComplexity": avg_complexity,
-                "dependencyCount": len(dependencies),
-            },
-            "codeUnits": code_units,
-            "dependencies": dependencies,
-            "connections": [],
+        for dependency in dependencies:
+            yield DEPENDENCY, dependency
+
+        yield SUMMARY, {
+            "totalFiles": measured_files,
+            "totalLinesOfCode": total_loc,
+            "avgComplexity": round(complexity_total / measured_files, 2) if measured_files else 0.0,
+            "dependencyCount": len(dependencies),
         }
 
-    def _iter_source_files(self, root: Path) -> Iterable[Path]:
-        for path in root.rglob("*"):
-            if not path.is_file():
-                continue
-            if any(part in SKIP_DIRS for part in path.parts):
+    def _measure(self, root: Path, rel_paths: Sequence[str], progress: ProgressTracker) -> Iterator[Tuple[str, dict]]:
+        for rel in rel_paths:
+            try:
+                data = (root / rel).read_bytes()
+            except OSError:
                 continue
-            if path.suffix.lower() in SOURCE_EXTENSIONS:
-                yield path
-
-    def _count_loc(self, text: str) -> int:
-        return sum(1 for line in text.splitlines() if line.strip())
-
-    def _estimate_complexity(self, text: str) -> float:
-        function_count = len(re.findall(r"\bfunction\b|=>", text))
-        decision_points = len(
-            re.findall(r"\b(if|for|while|case|catch|switch)\b|&&|\|\|", text)
-        )
-        return max(1.0, function_count + decision_points * 0.5)
+            progress.add_bytes(len(data))
+            metrics = SCANNER.scan(data.decode("utf-8", errors="ignore"))
+            yield rel, {
+                "loc": metrics.loc,
+                "commentLines": metrics.comment_lines,
+                "complexity": metrics.complexity,
+                "imports": sorted({capture.value for capture in metrics.captured}),
+            }
+
+    def _import_targets(self, resolver: ModuleResolver, rel: str, specifiers: Sequence[str]) -> List[str]:
+        resolved = (resolver.resolve(rel, specifier) for specifier in specifiers)
+        return sorted({unit_id(target) for target in resolved if target is not None})
+
+    def _scan(self, root: Path) -> FileIndex:
+        return scan_tree(root, skip_dirs=SKIP_DIRS, extensions=SOURCE_EXTENSIONS)
 
     def _collect_dependencies(self, root: Path) -> List[dict]:
         package_json = root / "package.json"
@@ -1,3 +1,15 @@
-from .plugin import PythonAnalyzer
+from __future__ import annotations
+
+from typing import Any
+
+
+def __getattr__(name: str) -> Any:
+    # The analyzer is imported on first access, so reading .metadata stays cheap.
+    if name == "PythonAnalyzer":
+        from .plugin import PythonAnalyzer
+
+        return PythonAnalyzer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = ["PythonAnalyzer"]
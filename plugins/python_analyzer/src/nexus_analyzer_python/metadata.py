@@ -0,0 +1,16 @@
+"""What the backend needs to register this plugin without importing it (or radon).
+
+PluginSpec.from_metadata reads these constants; the analyzer takes its
+name and markers from here too, so the two cannot drift apart.
+"""
+
+from __future__ import annotations
+
+NAME = "Python"
+TARGET = "nexus_analyzer_python.plugin:PythonAnalyzer"
+#: Root files of a Python project.
+MARKERS = frozenset({"pyproject.toml", "requirements.txt", "setup.cfg", "setup.py"})
+#: Marker-less projects count when files with these extensions show up near the root.
+DISCOVERY_EXTENSIONS = frozenset({".py"})
+
+__all__ = ["DISCOVERY_EXTENSIONS", "MARKERS", "NAME", "TARGET"]
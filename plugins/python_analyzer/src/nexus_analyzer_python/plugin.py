@@ -1,88 +1,228 @@
 from __future__ import annotations
 
+import ast
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 from pathlib import Path
-from typing import Iterable, List
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-from radon.complexity import cc_visit
+from radon.complexity import cc_visit_ast
 
 from backend.app.core.analyzer import AnalyzerPlugin
+from backend.app.core.context import AnalysisContext
+from backend.app.core.discovery import RootScan, root_scan
+from backend.app.core.progress import ProgressTracker
+from backend.app.core.stream import CODE_UNIT, CONNECTION, DEPENDENCY, LANGUAGES, SUMMARY, UDMRecord, collect_payload
+from backend.app.core.walker import FileIndex, scan_tree
+from backend.app.settings import env_number
+
+from .imports import ModuleIndex, import_names, module_id
+from .metadata import DISCOVERY_EXTENSIONS, MARKERS, NAME
 
 SKIP_DIRS = {".git", ".venv", "venv", "__pycache__", "node_modules", "dist", "build"}
+PYTHON_EXTENSIONS = {".py"}
+
+PARALLEL_THRESHOLD = 200
+MAX_CHUNK_SIZE = 256
+
+#: Fields of one class or function in a measurement's flat "units" list:
+#: kind ("C" or "F"), name qualified within the module, loc, complexity.
+UNIT_STRIDE = 4
+UNIT_TYPES = {"C": "CLASS", "F": "FUNCTION"}
+
+FileMeasurement = Tuple[str, dict]
+#: A measurement with the number of bytes read for it.
+SizedMeasurement = Tuple[FileMeasurement, int]
+
+
+def measure_file(root: str, rel_path: str) -> SizedMeasurement:
+    """Return the relative path with its line count, radon block complexities, units and imports, plus its size.
+
+    The module is parsed once; radon and the import scan share the tree.
+    """
+    with open(os.path.join(root, rel_path), "rb") as handle:
+        data = handle.read()
+    text = data.decode("utf-8", errors="ignore")
+    tree = ast.parse(text)
+    blocks = cc_visit_ast(tree)
+    measurement = {
+        "loc": len(text.splitlines()),
+        "blocks": [block.complexity for block in blocks],
+        "units": flatten_units(blocks),
+        "imports": import_names(tree),
+    }
+    return (rel_path, measurement), len(data)
+
+
+def flatten_units(blocks: Sequence[Any]) -> List[Any]:
+    """Lay out the classes and functions of radon blocks as one flat list (see UNIT_STRIDE).
+
+    Every measurement is kept for the whole run (and in the metrics cache and
+    the report's file state), so a flat list of scalars is used rather than a
+    dict or tuple per unit. Methods, nested classes and closures follow their
+    parent with dotted names; a name defined twice in a module (a property
+    setter, say) gets "@<line>" appended to stay unique.
+    """
+    units: List[Any] = []
+    seen: set = set()
+
+    def add(block: Any, prefix: str) -> None:
+        name = prefix + block.name
+        unique = name if name not in seen else f"{name}@{block.lineno}"
+        seen.add(unique)
+        is_class = hasattr(block, "methods")
+        units.extend(("C" if is_class else "F", unique, block.endline - block.lineno + 1, block.complexity))
+        children = [*block.methods, *block.inner_classes] if is_class else block.closures
+        for child in sorted(children, key=lambda child: child.lineno):
+            add(child, name + ".")
+
+    # cc_visit lists methods next to their classes as well; they are reached through the class.
+    for block in sorted((block for block in blocks if not getattr(block, "is_method", False)), key=lambda b: b.lineno):
+        add(block, "")
+    return units
+
+
+def measure_chunk(root: str, rel_paths: Sequence[str]) -> List[SizedMeasurement]:
+    return [measure_file(root, rel_path) for rel_path in rel_paths]
 
 
 class PythonAnalyzer(AnalyzerPlugin):
-    name = "Python"
+    """Analyzer for Python projects backed by radon.
+
+    Each file becomes a FILE unit followed by a CLASS or FUNCTION unit per
+    class, method and function, all measured from the one radon parse, and
+    by an IMPORT connection to every project module it imports (see
+    ModuleIndex).
+
+    Files are measured serially for small trees. Once a tree has at least
+    parallel_threshold files, the file list is split into chunks and handed to
+    a process pool, because radon parsing is CPU bound and serialised by the
+    GIL. Worker count defaults to NEXUS_PYTHON_WORKERS, or the CPU count.
+    """
+
+    name = NAME
+    version = "0.3.0"
+    extensions = frozenset(PYTHON_EXTENSIONS)
+    skip_dirs = frozenset(SKIP_DIRS)
+    reports_progress = True
+    markers = MARKERS
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        *,
+        parallel_threshold: int = PARALLEL_THRESHOLD,
+        chunk_size: Optional[int] = None,
+    ) -> None:
+        if workers is None:
+            workers = env_number("NEXUS_PYTHON_WORKERS", 0, int, minimum=0) or os.cpu_count() or 1
+        self.workers = max(1, workers)
+        self.parallel_threshold = parallel_threshold
+        self.chunk_size = chunk_size
 
     def discover(self, path: str) -> bool:
-        root = Path(path)
-        if not root.is_dir():
-            return False
+        return self.applies_to(root_scan(path))
 
-        markers = ("pyproject.toml", "requirements.txt", "setup.cfg", "setup.py")
-        if any((root / marker).exists() for marker in markers):
-            return True
+    def applies_to(self, scan: RootScan) -> bool:
+        # Marker-less projects count when Python files show up near the root.
+        return scan.has_marker(self.markers) or scan.has_extension(DISCOVERY_EXTENSIONS)
 
-        return any(self._iter_python_files(root, limit=5))
+    def analyze(self, path: str, context: Optional[AnalysisContext] = None) -> dict:
+        return collect_payload(self.stream(path, context))
 
-    def analyze(self, path: str) -> dict:
+    def stream(self, path: str, context: Optional[AnalysisContext] = None) -> Iterator[UDMRecord]:
         root = Path(path)
-        python_files = list(self._iter_python_files(root))
-        code_units = []
+        context = context or AnalysisContext(root=root, files=self._scan(root))
+        python_files = context.files.select(PYTHON_EXTENSIONS, SKIP_DIRS)
         total_loc = 0
-        complexity_scores: List[float] = []
-
-        for file_path in python_files:
-            rel_path = file_path.relative_to(root)
-            text = file_path.read_text(encoding="utf-8", errors="ignore")
-            loc = len(text.splitlines())
+        complexity_total = 0.0
+        block_count = 0
+        measured_files = 0
+        modules = ModuleIndex(python_files)
+
+        progress = context.progress
+        progress.expect(len(python_files))
+        progress.start("measuring")
+
+        yield LANGUAGES, ["Python"]
+        measurements = context.measure(self, python_files, lambda rel_paths: self._measure(root, rel_paths, progress))
+        for rel, measurement in measurements:
+            rel_path = Path(rel)
+            loc = measurement["loc"]
+            file_complexity = measurement["blocks"]
             total_loc += loc
+            measured_files += 1
+            progress.advance()
 
-            cc_results = cc_visit(text)
-            file_complexity = [block.complexity for block in cc_results]
             if file_complexity:
                 avg_complexity = sum(file_complexity) / len(file_complexity)
-                complexity_scores.extend(file_complexity)
+                complexity_total += sum(file_complexity)
+                block_count += len(file_complexity)
             else:
                 avg_complexity = 0.0
 
-            code_units.append(
-                {
-                    "id": ".".join(rel_path.with_suffix("").parts),
-                    "type": "FILE",
-                    "path": str(rel_path),
-                    "metrics": {
-                        "loc": loc,
-                        "complexity": round(avg_complexity, 2),
-                    },
-                }
-            )
-
+            unit_id = module_id(rel)
+            yield CODE_UNIT, {
+                "id": unit_id,
+                "type": "FILE",
+                "path": str(rel_path),
+                "metrics": {
+                    "loc": loc,
+                    "complexity": round(avg_complexity, 2),
+                },
+            }
+            yield from self._unit_records(unit_id, str(rel_path), measurement["units"])
+            for target in modules.targets(unit_id, measurement["imports"]):
+                yield CONNECTION, {"sourceUnitId": unit_id, "targetUnitId": target, "type": "IMPORT"}
+
+        progress.start("dependencies")
         dependencies = self._collect_dependencies(root)
-        avg_complexity = round(sum(complexity_scores) / len(complexity_scores), 2) if complexity_scores else 0.0
-
-        return {
-            "languages": ["Python"],
-            "summary": {
-                "totalFiles": len(python_files),
-                "totalLinesOfCode": total_loc,
-                "avgComplexity": avg_complexity,
-                "dependencyCount": len(dependencies),
-            },
-            "codeUnits": code_units,
-            "dependencies": dependencies,
-            "connections": [],
+        for dependency in dependencies:
+            yield DEPENDENCY, dependency
+
+        yield SUMMARY, {
+            "totalFiles": measured_files,
+            "totalLinesOfCode": total_loc,
+            "avgComplexity": round(complexity_total / block_count, 2) if block_count else 0.0,
+            "dependencyCount": len(dependencies),
         }
 
-    def _iter_python_files(self, root: Path, limit: int | None = None) -> Iterable[Path]:
-        count = 0
-        for path in root.rglob("*.py"):
-            if any(part in SKIP_DIRS for part in path.parts):
-                continue
-            if path.is_file():
-                yield path
-                count += 1
-                if limit is not None and count >= limit:
-                    return
+    def _unit_records(self, module_id: str, path: str, units: Sequence[Any]) -> Iterator[UDMRecord]:
+        for offset in range(0, len(units), UNIT_STRIDE):
+            kind, name, loc, complexity = units[offset : offset + UNIT_STRIDE]
+            yield CODE_UNIT, {
+                "id": f"{module_id}.{name}",
+                "type": UNIT_TYPES[kind],
+                "path": path,
+                "metrics": {"loc": loc, "complexity": round(complexity, 2)},
+            }
+
+    def _measure(self, root: Path, rel_paths: Sequence[str], progress: ProgressTracker) -> Iterator[FileMeasurement]:
+        # Celery prefork children are daemonic and may not spawn their own pool.
+        if len(rel_paths) < self.parallel_threshold or self.workers < 2 or multiprocessing.current_process().daemon:
+            sized: Iterable[SizedMeasurement] = (measure_file(str(root), rel_path) for rel_path in rel_paths)
+        else:
+            sized = self._measure_parallel(str(root), rel_paths, self.workers)
+        # Workers report sizes with their results, so bytes are counted here.
+        for measurement, size in sized:
+            progress.add_bytes(size)
+            yield measurement
+
+    def _measure_parallel(self, root: str, rel_paths: Sequence[str], workers: int) -> Iterator[SizedMeasurement]:
+        # Several chunks per worker keeps the pool balanced when file sizes vary.
+        chunk_size = self.chunk_size or max(1, min(MAX_CHUNK_SIZE, len(rel_paths) // (workers * 4)))
+        chunks = [rel_paths[start : start + chunk_size] for start in range(0, len(rel_paths), chunk_size)]
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            yield from chain.from_iterable(pool.map(measure_chunk, [root] * len(chunks), chunks))
+        finally:
+            # Queued chunks are dropped when the analysis stops early.
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _scan(self, root: Path) -> FileIndex:
+        return scan_tree(root, skip_dirs=SKIP_DIRS, extensions=PYTHON_EXTENSIONS)
 
     def _collect_dependencies(self, root: Path) -> List[dict]:
         requirements_file = root / "requirements.txt"
@@ -79,7 +79,7 @@ if [ "$NO_INSTALL" = false ]; then
   source "${VENV_DIR}/bin/activate"
   echo -n "Installing Python dependencies… "
   pip install --upgrade pip setuptools wheel >/dev/null 2>&1
-  if pip install --quiet --no-input --progress-bar off -r "${ROOT_DIR}/backend/requirements.txt"; then
+  if pip install --quiet --no-input --progress-bar off -r "${ROOT_DIR}/backend/requirements-test.txt"; then
     echo "done."
   else
     echo "failed." >&2